@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+单产品成本模型 - BOM成本汇总
+展开多层BOM并按工序路线汇总全部产品的单位成本，可试算物料调价的影响
+
+用法：
+    python BOM成本汇总.py
+    python BOM成本汇总.py --set-price M-001=13.5 --set-price M-002=0.18
+"""
+
+import argparse
+
+import abc_data
+import bom_rollup
+
+
+def parse_price(text):
+    """解析 物料编码=单价"""
+    code, sep, value = text.partition("=")
+    try:
+        if not sep:
+            raise ValueError
+        return code.strip(), float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"格式应为 物料编码=单价: {text!r}")
+
+
+def print_costs(costs, title):
+    print(f"\n{title}")
+    print(f"{'产品编码':<10}{'产品名称':<16}{'材料成本':>10}{'人工成本':>10}{'制造费用':>10}{'单位成本':>10}")
+    for c in costs:
+        print(f"{c.product:<12}{c.name:<18}{c.material:>12.4f}{c.labor:>12.4f}"
+              f"{c.overhead:>12.4f}{c.total:>12.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多层BOM展开与工序路线成本汇总")
+    parser.add_argument("--data-dir", default=bom_rollup.DEFAULT_DATA_DIR,
+                        help="物料主数据/工序主数据/产品BOM/工序路线CSV所在目录")
+    parser.add_argument("--set-price", type=parse_price, action="append", default=[],
+                        metavar="物料编码=单价", help="试算物料调价（可重复）")
+    parser.add_argument("--no-cache", action="store_true", help="忽略解析缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    try:
+        rollup = bom_rollup.load_rollup(args.data_dir, cache=not args.no_cache)
+        print_costs(rollup.costs(), "单位产品成本")
+        for code, price in args.set_price:
+            affected = rollup.set_material_price(code, price)
+            print(f"\n{code} 调整为 {price:g} 元，影响 {len(affected)} 个产品")
+        if args.set_price:
+            print_costs(rollup.costs(), "调价后单位产品成本")
+    except abc_data.DataValidationError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
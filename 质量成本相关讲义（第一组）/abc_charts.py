@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 图表数据与离线渲染
+工作簿中各图表（单位成本对比、作业成本分布、单位质量成本构成、资源池产能利用）的数据统一由
+chart_specs() 从 compute_model() 的结果取得；不打开Excel也可把同样的图表
+渲染为SVG（纯Python，无额外依赖）或PNG（需要安装 matplotlib），用于邮件和PDF报告
+
+本模块不导入 openpyxl
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from xml.sax.saxutils import escape
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import pyplot
+except ImportError:  # 没有 matplotlib 时只能输出SVG
+    pyplot = None
+
+# Office 默认主题配色（与工作簿中图表的系列颜色一致）
+PALETTE = ("#4472C4", "#ED7D31", "#A5A5A5", "#FFC000", "#5B9BD5", "#70AD47")
+FONT_FAMILY = "Microsoft YaHei, SimHei, sans-serif"
+FORMATS = ("svg", "png")
+
+
+@dataclass
+class ChartSpec:
+    """一张图表的数据：kind 为 bar（簇状柱形）、stacked（堆积柱形）或 pie"""
+    name: str
+    kind: str
+    title: str
+    categories: list
+    series: list          # [(系列名, [数值, ...]), ...]，饼图只用第一个系列
+    x_title: str = ""
+    y_title: str = ""
+
+
+def chart_specs(model):
+    """由 compute_model() 的结果得到全部图表数据（与工作簿中的图表一一对应）"""
+    models = [prod[1] for prod in model["products"]]
+    specs = [
+        ChartSpec("单位成本对比", "bar", "传统方法 vs ABC方法 单位成本对比", models,
+                  [("传统方法", list(model["traditional_costs"])), ("ABC方法", list(model["abc_costs"]))],
+                  x_title="产品型号", y_title="单位成本（元）"),
+        ChartSpec("作业成本分布", "pie", "作业成本分布",
+                  [cat[0] for cat in model["activity_categories"]],
+                  [("成本金额(元)", [cat[1] for cat in model["activity_categories"]])]),
+    ]
+    if "quality" in model:
+        unit_costs = model["quality"].unit_costs
+        specs.append(ChartSpec(
+            "单位质量成本构成", "stacked", "单位质量成本构成", models,
+            [(f"{c}/件", [round(float(v), 2) for v in unit_costs[:, i]])
+             for i, c in enumerate(model["quality_categories"])],
+            x_title="产品型号", y_title="元/件"))
+    tdabc = model.get("tdabc")
+    if tdabc is not None:
+        used = tdabc.used_hours * tdabc.rates
+        specs.append(ChartSpec(
+            "资源池产能利用", "stacked", "资源池产能成本（已用/闲置）", list(tdabc.pool_names),
+            [("已用产能成本", [round(float(v), 2) for v in used]),
+             # 需求超出产能时闲置部分记为0（超出部分见 "产能利用" 工作表说明列）
+             ("闲置产能成本", [round(max(float(v), 0.0), 2) for v in tdabc.unused_costs])],
+            x_title="资源池", y_title="元"))
+    return specs
+
+
+# ============================================================
+# SVG 渲染
+# ============================================================
+def _nice_max(value):
+    """坐标轴上限取 1/2/2.5/5 × 10^n"""
+    if value <= 0:
+        return 1.0
+    magnitude = 10 ** len(str(int(value)))
+    for step in (0.1, 0.2, 0.25, 0.5, 1.0):
+        if value <= step * magnitude:
+            return step * magnitude
+    return magnitude
+
+
+def _text(x, y, text, size=12, anchor="middle", weight="normal", rotate=None):
+    transform = f' transform="rotate({rotate} {x:.1f} {y:.1f})"' if rotate else ""
+    return (f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" text-anchor="{anchor}" '
+            f'font-weight="{weight}"{transform}>{escape(str(text))}</text>')
+
+
+def _legend(names, x, y):
+    parts = []
+    for i, name in enumerate(names):
+        parts.append(f'<rect x="{x:.1f}" y="{y + i * 20 - 10:.1f}" width="12" height="12" '
+                     f'fill="{PALETTE[i % len(PALETTE)]}"/>')
+        parts.append(_text(x + 18, y + i * 20, name, 11, "start"))
+    return parts
+
+
+def _bar_svg(spec, width, height):
+    left, right, top, bottom = 80, 150, 50, 60
+    plot_w, plot_h = width - left - right, height - top - bottom
+    stacked = spec.kind == "stacked"
+    values = [series[1] for series in spec.series]
+    if stacked:
+        peak = max((sum(col) for col in zip(*values)), default=0)
+    else:
+        peak = max((v for col in values for v in col), default=0)
+    y_max = _nice_max(peak)
+
+    parts = []
+    for k in range(6):
+        y = top + plot_h - plot_h * k / 5
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{left + plot_w}" y2="{y:.1f}" stroke="#D9D9D9"/>')
+        parts.append(_text(left - 6, y + 4, f"{y_max * k / 5:,.0f}", 10, "end"))
+
+    n_cat = max(len(spec.categories), 1)
+    group_w = plot_w / n_cat
+    bar_w = group_w * 0.6 / (1 if stacked else max(len(values), 1))
+    for c, category in enumerate(spec.categories):
+        x0 = left + group_w * c + group_w * 0.2
+        base = 0.0
+        for s, series in enumerate(values):
+            v = series[c]
+            h = plot_h * v / y_max
+            x = x0 if stacked else x0 + s * bar_w
+            y = top + plot_h - plot_h * base / y_max - h
+            parts.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{bar_w:.1f}" height="{h:.1f}" '
+                         f'fill="{PALETTE[s % len(PALETTE)]}"/>')
+            if stacked:
+                base += v
+        parts.append(_text(left + group_w * (c + 0.5), top + plot_h + 18, category, 11))
+
+    parts.append(f'<line x1="{left}" y1="{top + plot_h}" x2="{left + plot_w}" y2="{top + plot_h}" stroke="#595959"/>')
+    parts.append(_text(left + plot_w / 2, height - 15, spec.x_title, 12))
+    parts.append(_text(20, top + plot_h / 2, spec.y_title, 12, rotate=-90))
+    parts += _legend([series[0] for series in spec.series], left + plot_w + 20, top + 20)
+    return parts
+
+
+def _pie_svg(spec, width, height):
+    values = spec.series[0][1]
+    total = sum(values)
+    cx, cy = (width - 150) / 2, height / 2 + 15
+    radius = min(width - 150, height - 60) / 2 - 10
+    parts = []
+    angle = -math.pi / 2   # 与Excel一致，从12点方向顺时针
+    for i, v in enumerate(values):
+        if total <= 0 or v <= 0:
+            continue
+        sweep = 2 * math.pi * v / total
+        color = PALETTE[i % len(PALETTE)]
+        if sweep >= 2 * math.pi - 1e-9:
+            parts.append(f'<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{radius:.1f}" fill="{color}"/>')
+        else:
+            x1, y1 = cx + radius * math.cos(angle), cy + radius * math.sin(angle)
+            x2, y2 = cx + radius * math.cos(angle + sweep), cy + radius * math.sin(angle + sweep)
+            large = 1 if sweep > math.pi else 0
+            parts.append(f'<path d="M{cx:.1f},{cy:.1f} L{x1:.1f},{y1:.1f} '
+                         f'A{radius:.1f},{radius:.1f} 0 {large} 1 {x2:.1f},{y2:.1f} Z" '
+                         f'fill="{color}" stroke="#FFFFFF"/>')
+        mid = angle + sweep / 2
+        parts.append(_text(cx + radius * 0.65 * math.cos(mid), cy + radius * 0.65 * math.sin(mid) + 4,
+                           f"{v / total:.1%}", 11))
+        angle += sweep
+    parts += _legend(spec.categories, width - 140, 70)
+    return parts
+
+
+def render_svg(spec, width=720, height=400):
+    """把一张图表渲染为SVG文本"""
+    body = _pie_svg(spec, width, height) if spec.kind == "pie" else _bar_svg(spec, width, height)
+    return "\n".join([
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="{FONT_FAMILY}">',
+        f'<rect width="{width}" height="{height}" fill="#FFFFFF"/>',
+        _text(width / 2, 28, spec.title, 16, weight="bold"),
+        *body,
+        "</svg>",
+    ])
+
+
+# ============================================================
+# PNG 渲染（可选 matplotlib）
+# ============================================================
+def render_png(spec, path, width=720, height=400, dpi=100):
+    """用 matplotlib 把一张图表渲染为PNG文件"""
+    if pyplot is None:
+        raise RuntimeError("输出PNG需要安装 matplotlib（pip install matplotlib），或改用SVG格式")
+    fig, ax = pyplot.subplots(figsize=(width / dpi, height / dpi), dpi=dpi)
+    try:
+        colors = [PALETTE[i % len(PALETTE)] for i in range(max(len(spec.series), len(spec.categories)))]
+        if spec.kind == "pie":
+            ax.pie(spec.series[0][1], labels=None, colors=colors, autopct="%.1f%%",
+                   startangle=90, counterclock=False)
+            ax.legend(spec.categories, loc="center left", bbox_to_anchor=(1, 0.5))
+            ax.axis("equal")
+        else:
+            n = len(spec.series)
+            positions = range(len(spec.categories))
+            bottom = [0.0] * len(spec.categories)
+            bar_w = 0.6 if spec.kind == "stacked" else 0.6 / n
+            for s, (name, values) in enumerate(spec.series):
+                if spec.kind == "stacked":
+                    ax.bar(positions, values, bar_w, bottom=bottom, label=name, color=colors[s])
+                    bottom = [b + v for b, v in zip(bottom, values)]
+                else:
+                    ax.bar([p - 0.3 + bar_w * (s + 0.5) for p in positions], values, bar_w,
+                           label=name, color=colors[s])
+            ax.set_xticks(list(positions))
+            ax.set_xticklabels(spec.categories)
+            ax.set_xlabel(spec.x_title)
+            ax.set_ylabel(spec.y_title)
+            ax.legend(loc="center left", bbox_to_anchor=(1, 0.5))
+        ax.set_title(spec.title)
+        fig.tight_layout()
+        fig.savefig(path)
+    finally:
+        pyplot.close(fig)
+
+
+def check_format(fmt):
+    """图表格式不支持或缺少所需的库时报错（生成工作簿之前调用，避免做完其余工作才失败）"""
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的图表格式: {fmt}（可选 {'/'.join(FORMATS)}）")
+    if fmt == "png" and pyplot is None:
+        raise RuntimeError("输出PNG需要安装 matplotlib（pip install matplotlib），或改用SVG格式")
+
+
+def export_charts(model, output_dir, fmt="svg"):
+    """把全部图表写到 output_dir，文件名为图表名，返回写出的文件路径列表"""
+    check_format(fmt)
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for spec in chart_specs(model):
+        path = os.path.join(output_dir, f"{spec.name}.{fmt}")
+        if fmt == "svg":
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(render_svg(spec))
+        else:
+            render_png(spec, path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 数据输入层
+从 数据_*.csv 读取模型输入，按块流式解析、按列存为紧凑的 numpy 数组，
+并按文件内容哈希在磁盘上缓存解析结果：输入文件未变时直接读缓存，跳过解析
+"""
+
+import csv
+import hashlib
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+CACHE_DIR_NAME = ".abc_cache"
+SCHEMA_VERSION = "1"
+CHUNK_ROWS = 65536
+TOTAL_ROW_KEY = "合计"
+
+
+class DataValidationError(ValueError):
+    """输入数据校验失败"""
+
+
+@dataclass(frozen=True)
+class Column:
+    """列定义：kind 为 str / int / float / percent"""
+    name: str
+    kind: str = "str"
+    nonnegative: bool = False
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    """表定义：key 为主键列（None 表示无主键）"""
+    file_name: str
+    columns: tuple
+    key: str = None
+    required: bool = True
+
+
+SCHEMAS = {
+    "products": TableSchema("数据_产品信息.csv", key="产品编号", columns=(
+        Column("产品编号"), Column("产品型号"), Column("产品名称"), Column("产品类别"),
+        Column("季度产量", "int", True), Column("批次数", "int", True),
+        Column("平均批量", "int", True), Column("单位售价", "float", True), Column("备注"),
+    )),
+    "workhours": TableSchema("数据_产品工时.csv", key="产品编号", columns=(
+        Column("产品编号"), Column("单件标准工时", "float", True), Column("单件机器小时", "float", True),
+        Column("季度总人工", "float", True), Column("季度总机时", "float", True),
+    )),
+    "direct_costs": TableSchema("数据_直接成本.csv", key="产品编号", columns=(
+        Column("产品编号"), Column("直接材料", "float", True), Column("直接人工", "float", True),
+    )),
+    "overhead": TableSchema("数据_制造费用.csv", key="费用编号", columns=(
+        Column("费用编号"), Column("费用科目"), Column("季度发生额", "float", True), Column("归属性质"),
+    )),
+    "activities": TableSchema("数据_作业清单.csv", key="作业编号", columns=(
+        Column("作业编号"), Column("作业名称"), Column("作业层级"), Column("作业描述"),
+        Column("作业成本", "float", True),
+    )),
+    "cost_drivers": TableSchema("数据_成本动因.csv", key="作业编号", columns=(
+        Column("作业编号"), Column("作业名称"), Column("成本动因"),
+        Column("动因总量", "float", True), Column("作业成本", "float", True), Column("单位"),
+    )),
+    "consumption": TableSchema("数据_动因消耗.csv", columns=(
+        Column("产品编号"), Column("作业编号"), Column("消耗量", "float", True),
+    )),
+    "comparison": TableSchema("数据_成本对比核心数据.csv", key="产品型号", required=False, columns=(
+        Column("产品型号"), Column("传统方法单位成本", "float"), Column("ABC方法单位成本", "float"),
+        Column("差异", "float"), Column("差异率", "percent"), Column("传统方法毛利率", "percent"),
+        Column("ABC方法毛利率", "percent"), Column("分析"),
+    )),
+    "service_departments": TableSchema("数据_辅助部门.csv", key="部门编号", required=False, columns=(
+        Column("部门编号"), Column("部门名称"),
+    )),
+    "resource_drivers": TableSchema("数据_资源动因.csv", required=False, columns=(
+        Column("来源编号"), Column("对象编号"), Column("资源动因"), Column("动因量", "float", True),
+    )),
+    "quality_map": TableSchema("数据_质量成本映射.csv", required=False, columns=(
+        Column("来源类型"), Column("来源编号"), Column("质量成本类别"), Column("比例", "float", True),
+    )),
+    "quality_rates": TableSchema("数据_质量指标.csv", key="产品编号", required=False, columns=(
+        Column("产品编号"), Column("不良率", "percent", True), Column("返工率", "percent", True),
+        Column("外部损失率", "percent", True),
+    )),
+    "capacity_pools": TableSchema("数据_资源产能.csv", key="资源池编号", required=False, columns=(
+        Column("资源池编号"), Column("资源池名称"), Column("季度成本", "float", True),
+        Column("实际产能", "float", True),
+    )),
+    "time_equations": TableSchema("数据_时间方程.csv", required=False, columns=(
+        Column("作业编号"), Column("资源池编号"), Column("计量基础"), Column("条件"),
+        Column("单位时间", "float", True),
+    )),
+}
+
+
+class Table:
+    """按列存储的表，每列是一个 numpy 数组"""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def rows(self, columns=None):
+        """按行返回 Python 原生类型列表（供写 Excel 使用）"""
+        names = columns or list(self.columns)
+        return [list(row) for row in zip(*(self.columns[name].tolist() for name in names))]
+
+    def reorder(self, index):
+        """按索引数组重排所有列"""
+        return Table(self.name, {name: col[index] for name, col in self.columns.items()})
+
+
+@dataclass
+class ABCDataset:
+    """模型全部输入（各产品表已按产品信息表顺序对齐，成本动因表已按作业清单顺序对齐）"""
+    products: Table
+    workhours: Table
+    direct_costs: Table
+    overhead: Table
+    activities: Table
+    cost_drivers: Table
+    consumption: Table
+    comparison: Table = None
+    service_departments: Table = None
+    resource_drivers: Table = None
+    quality_map: Table = None
+    quality_rates: Table = None
+    capacity_pools: Table = None
+    time_equations: Table = None
+
+    @property
+    def product_ids(self):
+        return self.products["产品编号"]
+
+    @property
+    def activity_ids(self):
+        return self.activities["作业编号"]
+
+    def consumption_matrix(self):
+        """产品 × 作业 动因消耗矩阵（长表透视，重复记录累加）"""
+        p_idx = index_of(self.product_ids, self.consumption["产品编号"], "数据_动因消耗.csv 产品编号")
+        a_idx = index_of(self.activity_ids, self.consumption["作业编号"], "数据_动因消耗.csv 作业编号")
+        matrix = np.zeros((len(self.products), len(self.activities)))
+        np.add.at(matrix, (p_idx, a_idx), self.consumption["消耗量"])
+        return matrix
+
+
+def index_of(keys, values, label):
+    """values 中每个值在 keys 中的位置（向量化），找不到时报错"""
+    if len(keys) == 0:
+        if len(values):
+            raise DataValidationError(f"{label} 引用了不存在的编号: {sorted(set(values.tolist()))[:5]}")
+        return np.zeros(0, dtype=int)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    pos = np.searchsorted(sorted_keys, values)
+    pos = np.minimum(pos, len(sorted_keys) - 1)
+    missing = sorted_keys[pos] != values
+    if missing.any():
+        bad = sorted(set(values[missing].tolist()))[:5]
+        raise DataValidationError(f"{label} 引用了不存在的编号: {bad}")
+    return order[pos]
+
+
+def file_hash(path):
+    """文件内容 SHA-256（连同模式版本，用作缓存键）"""
+    digest = hashlib.sha256(SCHEMA_VERSION.encode())
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def schema_tag(schema):
+    """表定义中各列名称和类型的短摘要"""
+    text = "|".join(f"{c.name}:{c.kind}:{c.nonnegative}" for c in schema.columns)
+    return hashlib.sha256(text.encode()).hexdigest()[:8]
+
+
+def _convert(values, column, file_name, first_line):
+    """把一块字符串值转换为该列的 numpy 数组"""
+    raw = np.asarray(values, dtype=str)
+    if column.kind == "str":
+        return raw
+    text = np.char.strip(raw)
+    if column.kind == "percent":
+        text = np.char.rstrip(text, "%")
+    try:
+        dtype = np.int64 if column.kind == "int" else np.float64
+        array = text.astype(np.float64)
+        if column.kind == "int":
+            if not np.all(array == np.round(array)):
+                raise ValueError
+            array = array.astype(dtype)
+    except ValueError:
+        for offset, value in enumerate(values):
+            try:
+                number = float(str(value).strip().rstrip("%"))
+            except ValueError:
+                number = None
+            if number is None or (column.kind == "int" and number != round(number)):
+                raise DataValidationError(
+                    f"{file_name} 第{first_line + offset}行 {column.name} 不是有效数值: {value!r}")
+        raise
+    if column.kind == "percent":
+        array = array / 100
+    if column.nonnegative and (array < 0).any():
+        offset = int(np.argmax(array < 0))
+        raise DataValidationError(
+            f"{file_name} 第{first_line + offset}行 {column.name} 不能为负数: {values[offset]!r}")
+    return array
+
+
+def iter_csv(path, schema, chunk_rows=CHUNK_ROWS, footer=None):
+    """
+    按块产出 {列名: numpy数组}，每块最多 chunk_rows 行，整个文件不会同时放在内存中
+
+    表尾 "合计" 行不产出；footer 为列表时把 (表头, 合计行) 追加进去供调用方核对
+    """
+    file_name = os.path.basename(path)
+    names = [c.name for c in schema.columns]
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        missing = [name for name in names if name not in header]
+        if missing:
+            raise DataValidationError(f"{file_name} 缺少列: {missing}")
+        positions = [header.index(name) for name in names]
+
+        def convert(block, first_line):
+            return {column.name: _convert([row[pos] for row in block], column, file_name, first_line)
+                    for column, pos in zip(schema.columns, positions)}
+
+        block = []
+        first_line = 2
+        for line_no, row in enumerate(reader, 2):
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            if len(row) < len(header):
+                row = row + [""] * (len(header) - len(row))
+            if row[positions[0]].strip() == TOTAL_ROW_KEY:
+                if footer is not None:
+                    footer.append((header, row))
+                continue
+            if not block:
+                first_line = line_no
+            block.append(row)
+            if len(block) >= chunk_rows:
+                yield convert(block, first_line)
+                block = []
+        if block:
+            yield convert(block, first_line)
+
+
+def parse_csv(path, schema, chunk_rows=CHUNK_ROWS):
+    """
+    按块流式解析CSV，返回 {列名: numpy数组}
+
+    每次只把 chunk_rows 行放在内存中转换；表尾 "合计" 行会与明细之和核对后丢弃
+    """
+    file_name = os.path.basename(path)
+    chunks = {column.name: [] for column in schema.columns}
+    footer = []
+    for block in iter_csv(path, schema, chunk_rows, footer):
+        for name, values in block.items():
+            chunks[name].append(values)
+
+    columns = {}
+    for column in schema.columns:
+        parts = chunks[column.name]
+        if parts:
+            columns[column.name] = np.concatenate(parts)
+        else:
+            columns[column.name] = np.array([], dtype=str if column.kind == "str" else float)
+
+    if schema.key is not None:
+        keys = columns[schema.key]
+        if (np.char.str_len(keys) == 0).any():
+            raise DataValidationError(f"{file_name} 存在空的 {schema.key}")
+        unique, counts = np.unique(keys, return_counts=True)
+        if (counts > 1).any():
+            raise DataValidationError(f"{file_name} {schema.key} 重复: {unique[counts > 1][:5].tolist()}")
+
+    for header, row in footer:
+        _check_footer(row, header, columns, schema, file_name)
+    return columns
+
+
+def _check_footer(footer, header, columns, schema, file_name):
+    """合计行中填写的数值必须等于明细之和"""
+    for column in schema.columns:
+        if column.kind not in ("int", "float"):
+            continue
+        value = footer[header.index(column.name)].strip()
+        if not value:
+            continue
+        try:
+            total = float(value)
+        except ValueError:
+            raise DataValidationError(f"{file_name} 合计行 {column.name} 不是数值: {value!r}") from None
+        actual = float(columns[column.name].sum())
+        if not np.isclose(total, actual, rtol=1e-9, atol=0.01):
+            raise DataValidationError(
+                f"{file_name} 合计行 {column.name}={total:,.2f} 与明细之和 {actual:,.2f} 不一致")
+
+
+def load_table(name, data_dir, cache=True, schemas=SCHEMAS):
+    """读取一张表；cache=True 时命中磁盘缓存则跳过解析（schemas 可换成其他数据集的表定义）"""
+    schema = schemas[name]
+    path = os.path.join(data_dir, schema.file_name)
+    if not os.path.exists(path):
+        if schema.required:
+            raise DataValidationError(f"找不到输入文件: {path}")
+        return None
+
+    if not cache:
+        return Table(name, parse_csv(path, schema))
+
+    cache_dir = os.path.join(data_dir, CACHE_DIR_NAME)
+    # 同一文件可能按不同的表定义读取（列不同），缓存按列定义分开存放
+    stem = f"{os.path.splitext(schema.file_name)[0]}-{schema_tag(schema)}"
+    cache_file = os.path.join(cache_dir, f"{stem}-{file_hash(path)[:20]}.npz")
+    if os.path.exists(cache_file):
+        with np.load(cache_file, allow_pickle=False) as npz:
+            return Table(name, {column.name: npz[f"c{i}"] for i, column in enumerate(schema.columns)})
+
+    columns = parse_csv(path, schema)
+    os.makedirs(cache_dir, exist_ok=True)
+    # 同一输入文件的旧缓存作废（多个进程可能同时写缓存，先写临时文件再原子替换）
+    for old in os.listdir(cache_dir):
+        old_file = os.path.join(cache_dir, old)
+        if old.startswith(f"{stem}-") and old.endswith(".npz") and old_file != cache_file:
+            try:
+                os.remove(old_file)
+            except FileNotFoundError:
+                pass
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        np.savez(f, **{f"c{i}": columns[column.name] for i, column in enumerate(schema.columns)})
+    os.replace(tmp_file, cache_file)
+    return Table(name, columns)
+
+
+def _align(table, keys, key_column, label):
+    """把按产品/作业编号的表重排为与 keys 相同的顺序，要求一一对应"""
+    if len(table) != len(keys):
+        raise DataValidationError(f"{label} 行数({len(table)})与主表({len(keys)})不一致")
+    return table.reorder(index_of(table[key_column], keys, label))
+
+
+def load_dataset(data_dir, cache=True):
+    """读取全部输入表并做编号对齐校验"""
+    tables = {name: load_table(name, data_dir, cache) for name in SCHEMAS}
+    product_ids = tables["products"]["产品编号"]
+    activity_ids = tables["activities"]["作业编号"]
+    return ABCDataset(
+        products=tables["products"],
+        workhours=_align(tables["workhours"], product_ids, "产品编号", SCHEMAS["workhours"].file_name),
+        direct_costs=_align(tables["direct_costs"], product_ids, "产品编号",
+                            SCHEMAS["direct_costs"].file_name),
+        overhead=tables["overhead"],
+        activities=tables["activities"],
+        cost_drivers=_align(tables["cost_drivers"], activity_ids, "作业编号",
+                            SCHEMAS["cost_drivers"].file_name),
+        consumption=tables["consumption"],
+        comparison=tables["comparison"],
+        service_departments=tables["service_departments"],
+        resource_drivers=tables["resource_drivers"],
+        quality_map=tables["quality_map"],
+        quality_rates=None if tables["quality_rates"] is None else _align(
+            tables["quality_rates"], product_ids, "产品编号", SCHEMAS["quality_rates"].file_name),
+        capacity_pools=tables["capacity_pools"],
+        time_equations=tables["time_equations"],
+    )
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 作业成本分配引擎
+以作业成本向量和 产品×动因 消耗矩阵为输入，用矩阵运算一次性算出
+分配率、各产品ABC制造费用、单位成本和毛利率
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class ABCResult:
+    """ABC分配结果（所有数组按产品/作业顺序排列）"""
+    product_ids: list
+    activity_ids: list
+    activity_costs: np.ndarray   # (A,) 作业成本
+    driver_totals: np.ndarray    # (A,) 动因总量
+    rates: np.ndarray            # (A,) 分配率
+    consumption: np.ndarray      # (P, A) 各产品动因消耗量
+    overhead: np.ndarray         # (P,) ABC制造费用
+    direct_costs: np.ndarray     # (P,) 直接成本
+    total_costs: np.ndarray      # (P,) 完全成本
+    unit_costs: np.ndarray       # (P,) 单位成本
+    unit_prices: np.ndarray      # (P,) 单位售价
+    unit_margins: np.ndarray     # (P,) 单位毛利
+    margin_rates: np.ndarray     # (P,) 毛利率
+
+    @property
+    def allocation(self):
+        """产品×作业 分配金额矩阵（按需计算，不常驻内存）"""
+        return self.consumption * self.rates
+
+    @property
+    def unabsorbed(self):
+        """各作业未被产品吸收的成本（动因总量大于实际消耗时产生）"""
+        return self.activity_costs - self.overhead_by_activity
+
+    @property
+    def overhead_by_activity(self):
+        """各作业实际分配出去的成本"""
+        return self.rates * self.consumption.sum(axis=0)
+
+
+def driver_rates(activity_costs, driver_totals):
+    """分配率 = 作业成本 / 动因总量（动因总量为0的作业分配率记为0）"""
+    activity_costs = np.asarray(activity_costs, dtype=float)
+    driver_totals = np.asarray(driver_totals, dtype=float)
+    return np.divide(activity_costs, driver_totals,
+                     out=np.zeros_like(activity_costs),
+                     where=driver_totals != 0)
+
+
+def margins(unit_costs, unit_prices):
+    """返回 (单位毛利, 毛利率)，售价为0时毛利率记为0"""
+    unit_margins = unit_prices - unit_costs
+    rates = np.divide(unit_margins, unit_prices,
+                      out=np.zeros_like(unit_margins),
+                      where=unit_prices != 0)
+    return unit_margins, rates
+
+
+def unit_costs(total_costs, quantities):
+    """单位成本 = 完全成本 / 产量（产量为0时记为0）"""
+    total_costs = np.asarray(total_costs, dtype=float)
+    quantities = np.asarray(quantities, dtype=float)
+    return np.divide(total_costs, quantities,
+                     out=np.zeros_like(total_costs),
+                     where=quantities != 0)
+
+
+def allocate(activity_costs, consumption, quantities, direct_costs, unit_prices,
+             driver_totals=None, product_ids=None, activity_ids=None):
+    """
+    ABC成本分配
+
+    activity_costs: (A,) 作业成本
+    consumption:    (P, A) 各产品对各作业动因的消耗量
+    quantities:     (P,) 产量
+    direct_costs:   (P,) 直接成本（直接材料+直接人工）
+    unit_prices:    (P,) 单位售价
+    driver_totals:  (A,) 动因总量；缺省取各产品消耗量之和（全额吸收），
+                    传入实际产能时未用完的部分体现在 ABCResult.unabsorbed
+    """
+    activity_costs = np.asarray(activity_costs, dtype=float)
+    consumption = np.asarray(consumption, dtype=float)
+    if consumption.ndim != 2 or consumption.shape[1] != activity_costs.shape[0]:
+        raise ValueError(
+            f"消耗矩阵形状 {consumption.shape} 与作业数 {activity_costs.shape[0]} 不匹配")
+    if driver_totals is None:
+        driver_totals = consumption.sum(axis=0)
+    driver_totals = np.asarray(driver_totals, dtype=float)
+
+    rates = driver_rates(activity_costs, driver_totals)
+    overhead = consumption @ rates
+    direct_costs = np.asarray(direct_costs, dtype=float)
+    total_costs = direct_costs + overhead
+    units = unit_costs(total_costs, quantities)
+    unit_prices = np.asarray(unit_prices, dtype=float)
+    unit_margins, margin_rates = margins(units, unit_prices)
+
+    n_products, n_activities = consumption.shape
+    return ABCResult(
+        product_ids=list(product_ids) if product_ids is not None else list(range(n_products)),
+        activity_ids=list(activity_ids) if activity_ids is not None else list(range(n_activities)),
+        activity_costs=activity_costs,
+        driver_totals=driver_totals,
+        rates=rates,
+        consumption=consumption,
+        overhead=overhead,
+        direct_costs=direct_costs,
+        total_costs=total_costs,
+        unit_costs=units,
+        unit_prices=unit_prices,
+        unit_margins=unit_margins,
+        margin_rates=margin_rates,
+    )
+
+
+def traditional_allocate(overhead_pool, quantities, direct_costs, unit_prices):
+    """
+    传统成本法：制造费用按产量比例分摊
+
+    返回 (单位成本, 毛利率)
+    """
+    quantities = np.asarray(quantities, dtype=float)
+    shares = quantities / quantities.sum()
+    total_costs = np.asarray(direct_costs, dtype=float) + overhead_pool * shares
+    units = unit_costs(total_costs, quantities)
+    _, margin_rates = margins(units, np.asarray(unit_prices, dtype=float))
+    return units, margin_rates
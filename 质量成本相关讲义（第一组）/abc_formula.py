@@ -0,0 +1,510 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 公式求值与缓存值写入
+openpyxl 只写公式、不写计算结果，其他程序（pandas、openpyxl data_only=True、
+报表ETL）读到的公式单元格都是空值。本模块在进程内对模型用到的公式子集求值
+（四则运算、乘方、比较、SUM/MIN/MAX/AVERAGE/ROUND/ABS/IF/INDEX、单元格/区域引用、
+跨表引用如 基础数据!H3、工作簿级名称如 产品_产量），并把结果作为缓存值写回xlsx中公式旁的 <v> 元素
+"""
+
+import os
+import re
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+import abc_profile
+
+
+class FormulaError(ValueError):
+    """公式超出支持范围或存在循环引用"""
+
+
+class ExcelError(str):
+    """Excel错误值（#DIV/0!、#VALUE! 等），在运算中向外传播"""
+
+
+DIV0 = ExcelError("#DIV/0!")
+VALUE = ExcelError("#VALUE!")
+REF = ExcelError("#REF!")
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?) |
+    (?P<ref>(?:(?:'(?:[^']|'')+'|[^\s!'"()+\-*/^,:=<>&]+)!)?
+            \$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?) |
+    (?P<func>[A-Za-z][A-Za-z0-9.]*)\s*\( |
+    (?P<name>[^\W\d][\w.]*) |
+    (?P<string>"(?:[^"]|"")*") |
+    (?P<op><>|<=|>=|[-+*/^(),=<>&%])
+)""", re.X)
+
+_CELL = re.compile(r"\$?([A-Za-z]{1,3})\$?(\d+)")
+
+
+def tokenize(formula):
+    """把公式（不含开头的 "="）切分为 (类型, 文本) 列表"""
+    tokens = []
+    pos = 0
+    text = formula.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise FormulaError(f"无法解析公式: ={formula}（位置 {pos}）")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """递归下降解析，生成嵌套元组形式的语法树"""
+
+    def __init__(self, formula):
+        self.formula = formula
+        self.tokens = tokenize(formula)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            raise FormulaError(f"公式语法错误: ={self.formula}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.comparison()
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"公式语法错误: ={self.formula}")
+        return node
+
+    def comparison(self):
+        node = self.concat()
+        while self.peek() in [("op", op) for op in ("=", "<>", "<", ">", "<=", ">=")]:
+            op = self.take()[1]
+            node = ("binop", op, node, self.concat())
+        return node
+
+    def concat(self):
+        node = self.additive()
+        while self.peek() == ("op", "&"):
+            self.take()
+            node = ("binop", "&", node, self.additive())
+        return node
+
+    def additive(self):
+        node = self.multiplicative()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            op = self.take()[1]
+            node = ("binop", op, node, self.multiplicative())
+        return node
+
+    def multiplicative(self):
+        node = self.power()
+        while self.peek() in (("op", "*"), ("op", "/")):
+            op = self.take()[1]
+            node = ("binop", op, node, self.power())
+        return node
+
+    def power(self):
+        node = self.unary()
+        while self.peek() == ("op", "^"):
+            self.take()
+            node = ("binop", "^", node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek() in (("op", "-"), ("op", "+")):
+            op = self.take()[1]
+            operand = self.unary()
+            return ("neg", operand) if op == "-" else operand
+        return self.percent()
+
+    def percent(self):
+        node = self.primary()
+        while self.peek() == ("op", "%"):
+            self.take()
+            node = ("binop", "/", node, ("num", 100.0))
+        return node
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == "number":
+            return ("num", float(text))
+        if kind == "string":
+            return ("str", text[1:-1].replace('""', '"'))
+        if kind == "ref":
+            return ("ref", text)
+        if kind == "name":
+            return ("name", text)
+        if kind == "func":
+            args = []
+            if self.peek() != ("op", ")"):
+                args.append(self.comparison())
+                while self.peek() == ("op", ","):
+                    self.take()
+                    args.append(self.comparison())
+            self.take(")")
+            return ("func", text.upper(), args)
+        if (kind, text) == ("op", "("):
+            node = self.comparison()
+            self.take(")")
+            return node
+        raise FormulaError(f"公式语法错误: ={self.formula}")
+
+
+def parse(formula):
+    """解析公式文本（可带开头的 "="），返回语法树"""
+    return _Parser(formula[1:] if formula.startswith("=") else formula).parse()
+
+
+def split_ref(ref, default_sheet):
+    """'基础数据!H3:H7' -> (工作表名, (首行, 首列), (末行, 末列))"""
+    sheet = default_sheet
+    if "!" in ref:
+        sheet, ref = ref.rsplit("!", 1)
+        if sheet.startswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    parts = ref.split(":")
+    corners = []
+    for part in parts:
+        match = _CELL.fullmatch(part)
+        corners.append((int(match.group(2)), column_index_from_string(match.group(1).upper())))
+    first, last = corners[0], corners[-1]
+    return (sheet, (min(first[0], last[0]), min(first[1], last[1])),
+            (max(first[0], last[0]), max(first[1], last[1])))
+
+
+def _to_number(value):
+    """算术运算中的取值规则：空值为0，布尔为0/1，数字文本按数字处理"""
+    if isinstance(value, ExcelError):
+        return value
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        if text.endswith("%"):
+            return float(text[:-1]) / 100
+        return float(text)
+    except ValueError:
+        return VALUE
+
+
+def _numbers_in(values):
+    """SUM 等聚合函数的取值规则：区域中只计数字，直接给出的参数按算术规则转换"""
+    result = []
+    for value, from_range in values:
+        if isinstance(value, ExcelError):
+            return value
+        if from_range:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                result.append(float(value))
+        else:
+            number = _to_number(value)
+            if isinstance(number, ExcelError):
+                return number
+            result.append(number)
+    return result
+
+
+def _excel_round(value, digits):
+    """Excel ROUND：远离零方向舍入"""
+    factor = 10 ** digits
+    scaled = abs(value) * factor
+    rounded = int(scaled + 0.5 + 1e-9) / factor
+    return rounded if value >= 0 else -rounded
+
+
+_FUNCTIONS = {
+    "SUM": lambda nums: sum(nums),
+    "MIN": lambda nums: min(nums) if nums else 0.0,
+    "MAX": lambda nums: max(nums) if nums else 0.0,
+    "AVERAGE": lambda nums: sum(nums) / len(nums) if nums else DIV0,
+}
+
+
+class FormulaEvaluator:
+    """
+    对工作簿中的公式单元格求值（结果缓存，检测循环引用）
+
+    wb 为普通模式（非只读、非只写）打开或构建的 openpyxl 工作簿
+    """
+
+    def __init__(self, wb):
+        self.wb = wb
+        self._values = {}
+        self._active = set()
+
+    def _raw(self, sheet, row, col):
+        if sheet not in self.wb.sheetnames:
+            return REF
+        # 直接读取已存在的单元格，避免 ws.cell() 为空白位置创建单元格
+        cell = self.wb[sheet]._cells.get((row, col))
+        return None if cell is None else cell.value
+
+    def cell_value(self, sheet, row, col):
+        """单元格的值：公式单元格返回求值结果"""
+        key = (sheet, row, col)
+        if key in self._values:
+            return self._values[key]
+        raw = self._raw(sheet, row, col)
+        if not (isinstance(raw, str) and raw.startswith("=")):
+            return raw
+        if key in self._active:
+            raise FormulaError(f"循环引用: {sheet}!{get_column_letter(col)}{row}")
+        self._active.add(key)
+        try:
+            value = self._eval(parse(raw), sheet)
+            if isinstance(value, list):
+                # 单个区域作为整个公式时取左上角单元格
+                value = value[0] if value else None
+        finally:
+            self._active.discard(key)
+        self._values[key] = value
+        return value
+
+    def value(self, sheet, coordinate):
+        """按 "H3" 形式的坐标取值"""
+        _, (row, col), _ = split_ref(coordinate, sheet)
+        return self.cell_value(sheet, row, col)
+
+    def _name_ref(self, name):
+        """工作簿级名称 -> 引用文本"""
+        defined = self.wb.defined_names.get(name)
+        if defined is None:
+            return None
+        return defined.attr_text.lstrip("=")
+
+    def _range_values(self, ref, sheet):
+        sheet, (r1, c1), (r2, c2) = split_ref(ref, sheet)
+        return [self.cell_value(sheet, r, c) for r in range(r1, r2 + 1) for c in range(c1, c2 + 1)]
+
+    def _eval(self, node, sheet):
+        kind = node[0]
+        if kind == "num" or kind == "str":
+            return node[1]
+        if kind == "ref":
+            values = self._range_values(node[1], sheet)
+            return values if ":" in node[1] else values[0]
+        if kind == "name":
+            ref = self._name_ref(node[1])
+            if ref is None:
+                return ExcelError("#NAME?")
+            return self._eval(("ref", ref), sheet)
+        if kind == "neg":
+            value = _to_number(self._scalar(node[1], sheet))
+            return value if isinstance(value, ExcelError) else -value
+        if kind == "binop":
+            return self._binop(node[1], self._scalar(node[2], sheet), self._scalar(node[3], sheet))
+        if kind == "func":
+            return self._func(node[1], node[2], sheet)
+        raise FormulaError(f"不支持的语法: {node!r}")
+
+    def _scalar(self, node, sheet):
+        value = self._eval(node, sheet)
+        if isinstance(value, list):
+            return VALUE
+        return value
+
+    def _binop(self, op, left, right):
+        for value in (left, right):
+            if isinstance(value, ExcelError):
+                return value
+        if op == "&":
+            return f"{'' if left is None else left}{'' if right is None else right}"
+        if op in ("=", "<>", "<", ">", "<=", ">="):
+            if isinstance(left, str) or isinstance(right, str):
+                left, right = str(left or "").upper(), str(right or "").upper()
+            else:
+                left, right = _to_number(left), _to_number(right)
+            return {"=": left == right, "<>": left != right, "<": left < right,
+                    ">": left > right, "<=": left <= right, ">=": left >= right}[op]
+        left, right = _to_number(left), _to_number(right)
+        for value in (left, right):
+            if isinstance(value, ExcelError):
+                return value
+        if op == "+":
+            return left + right
+        if op == "-":
+            return left - right
+        if op == "*":
+            return left * right
+        if op == "/":
+            return DIV0 if right == 0 else left / right
+        if op == "^":
+            try:
+                return float(left ** right)
+            except (OverflowError, ZeroDivisionError, TypeError):
+                return ExcelError("#NUM!")
+        raise FormulaError(f"不支持的运算符: {op}")
+
+    def _index(self, args, sheet):
+        """INDEX(区域, 行号[, 列号])：单行或单列区域可只给一个序号"""
+        if not 2 <= len(args) <= 3 or args[0][0] not in ("ref", "name"):
+            raise FormulaError("INDEX 的第一个参数须为区域或名称，且需要2或3个参数")
+        ref = args[0][1] if args[0][0] == "ref" else self._name_ref(args[0][1])
+        if ref is None:
+            return ExcelError("#NAME?")
+        positions = [_to_number(self._scalar(arg, sheet)) for arg in args[1:]]
+        for value in positions:
+            if isinstance(value, ExcelError):
+                return value
+        target_sheet, (r1, c1), (r2, c2) = split_ref(ref, sheet)
+        if len(positions) == 1:
+            positions = [positions[0], 1] if c1 == c2 else [1, positions[0]]
+        row, col = (int(p) for p in positions)
+        if not (1 <= row <= r2 - r1 + 1 and 1 <= col <= c2 - c1 + 1):
+            return REF
+        return self.cell_value(target_sheet, r1 + row - 1, c1 + col - 1)
+
+    def _func(self, name, args, sheet):
+        if name == "INDEX":
+            return self._index(args, sheet)
+        if name == "IF":
+            if not 2 <= len(args) <= 3:
+                raise FormulaError("IF 需要2或3个参数")
+            condition = self._scalar(args[0], sheet)
+            if isinstance(condition, ExcelError):
+                return condition
+            if isinstance(condition, str):
+                return VALUE
+            if condition:
+                return self._scalar(args[1], sheet)
+            return self._scalar(args[2], sheet) if len(args) == 3 else False
+        if name in ("ROUND", "ABS"):
+            values = [_to_number(self._scalar(arg, sheet)) for arg in args]
+            for value in values:
+                if isinstance(value, ExcelError):
+                    return value
+            if name == "ABS" and len(values) == 1:
+                return abs(values[0])
+            if name == "ROUND" and len(values) == 2:
+                return _excel_round(values[0], int(values[1]))
+            raise FormulaError(f"{name} 参数个数错误")
+        if name in _FUNCTIONS:
+            collected = []
+            for arg in args:
+                value = self._eval(arg, sheet)
+                if isinstance(value, list):
+                    collected.extend((v, True) for v in value)
+                else:
+                    collected.append((value, arg[0] == "ref"))
+            numbers = _numbers_in(collected)
+            if isinstance(numbers, ExcelError):
+                return numbers
+            return _FUNCTIONS[name](numbers)
+        raise FormulaError(f"不支持的函数: {name}")
+
+
+def evaluate_workbook(wb):
+    """对工作簿中全部公式求值，返回 {工作表名: {坐标: 值}}"""
+    evaluator = FormulaEvaluator(wb)
+    results = {}
+    for ws in wb.worksheets:
+        values = {}
+        for (row, col), cell in ws._cells.items():
+            if isinstance(cell.value, str) and cell.value.startswith("="):
+                values[cell.coordinate] = evaluator.cell_value(ws.title, row, col)
+        if values:
+            results[ws.title] = values
+    return results
+
+
+# ------------------------------------------------------------
+# 写入缓存值
+# ------------------------------------------------------------
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_FORMULA_CELL = re.compile(
+    r'<c r="(?P<ref>[A-Z]+\d+)"(?P<attrs>[^>]*)>(?P<f><f(?:\s[^>]*)?>.*?</f>|<f(?:\s[^>]*)?/>)'
+    r'(?:<v\s*/>|<v>[^<]*</v>)?</c>', re.S)
+
+
+def _sheet_parts(archive):
+    """{工作表名: 压缩包内的XML部件路径}"""
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_PKG_REL_NS}Relationship")}
+    parts = {}
+    for sheet in workbook.iter(f"{_MAIN_NS}sheet"):
+        target = targets[sheet.get(f"{_REL_NS}id")]
+        parts[sheet.get("name")] = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    return parts
+
+
+def _xml_escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _cached(value):
+    """单元格缓存值 -> (类型属性, <v> 文本)；None 表示不写缓存值"""
+    if value is None:
+        return None
+    if isinstance(value, ExcelError):
+        return "e", str(value)
+    if isinstance(value, bool):
+        return "b", "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return None, repr(float(value)) if isinstance(value, float) else str(value)
+    return "str", _xml_escape(str(value))
+
+
+def _patch_sheet_xml(xml, values):
+    def replace(match):
+        cached = _cached(values.get(match.group("ref")))
+        if cached is None:
+            return match.group(0)
+        kind, text = cached
+        attrs = re.sub(r'\st="[^"]*"', "", match.group("attrs"))
+        if kind:
+            attrs += f' t="{kind}"'
+        return f'<c r="{match.group("ref")}"{attrs}>{match.group("f")}<v>{text}</v></c>'
+    return _FORMULA_CELL.sub(replace, xml)
+
+
+def write_cached_values(path, results):
+    """把 evaluate_workbook() 的结果写入已保存的xlsx文件（原子替换）"""
+    with zipfile.ZipFile(path) as archive:
+        parts = _sheet_parts(archive)
+        patched = {parts[sheet]: values for sheet, values in results.items() if sheet in parts}
+        fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as out:
+                for item in archive.infolist():
+                    data = archive.read(item.filename)
+                    if item.filename in patched:
+                        data = _patch_sheet_xml(data.decode("utf-8"), patched[item.filename]).encode("utf-8")
+                    out.writestr(item, data)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+
+def save_workbook(wb, path, profiler=abc_profile.DISABLED):
+    """保存工作簿并写入全部公式的缓存值（profiler 为 abc_profile.Profiler 时分阶段计时）"""
+    with profiler.stage("保存"):
+        wb.save(path)
+    with profiler.stage("公式求值"):
+        results = evaluate_workbook(wb)
+    with profiler.stage("写入缓存值"):
+        write_cached_values(path, results)
+    return path
+
+
+def fill_cached_values(path):
+    """为已有xlsx文件（任意来源）补写公式缓存值"""
+    import openpyxl
+    wb = openpyxl.load_workbook(path)
+    write_cached_values(path, evaluate_workbook(wb))
+    return path
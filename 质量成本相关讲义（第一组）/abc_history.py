@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 多期历史库
+每次生成后把该核算期间的作业成本、动因总量、分配率、动因消耗和产品单位成本
+以长表形式追加到按列存储的二进制文件中（每列一个文件，读取时内存映射），
+在此基础上查询任一产品/作业的逐期变动、移动平均和单位成本差异分解
+（分配率差异 / 产量差异 / 消耗结构差异）
+
+一个历史库对应一个车间：同一核算期间再次写入时替换该期数据
+"""
+
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+STORE_VERSION = 1
+META_FILE = "meta.json"
+
+# 表 -> 列定义（列名, dtype）；period/product/activity 为登记表中的序号
+TABLES = {
+    "products": (("period", "<i4"), ("product", "<i4"), ("quantity", "<f8"),
+                 ("direct_cost", "<f8"), ("overhead", "<f8"), ("unit_cost", "<f8"),
+                 ("unit_price", "<f8")),
+    "activities": (("period", "<i4"), ("activity", "<i4"), ("activity_cost", "<f8"),
+                   ("driver_total", "<f8"), ("rate", "<f8")),
+    "consumption": (("period", "<i4"), ("product", "<i4"), ("activity", "<i4"),
+                    ("consumption", "<f8")),
+}
+
+
+@dataclass
+class Series:
+    """按期间顺序排列的时间序列"""
+    periods: list
+    values: np.ndarray
+
+    def deltas(self):
+        """逐期变动：返回 (变动额, 变动率)，首期为 nan"""
+        diff = np.full(len(self.values), np.nan)
+        pct = np.full(len(self.values), np.nan)
+        if len(self.values) > 1:
+            prev = self.values[:-1]
+            diff[1:] = self.values[1:] - prev
+            pct[1:] = np.divide(diff[1:], prev, out=np.full(len(prev), np.nan), where=prev != 0)
+        return diff, pct
+
+    def rolling_mean(self, window=4):
+        """移动平均（不足 window 期的按已有期数平均）"""
+        cumsum = np.concatenate(([0.0], np.cumsum(self.values)))
+        idx = np.arange(1, len(self.values) + 1)
+        start = np.maximum(idx - window, 0)
+        return (cumsum[idx] - cumsum[start]) / (idx - start)
+
+
+@dataclass
+class CostVariance:
+    """两期单位成本差异分解：total = direct + rate + volume + mix"""
+    product: str
+    base_period: str
+    period: str
+    base_unit_cost: float
+    unit_cost: float
+    direct: float   # 单位直接成本变动
+    rate: float     # 分配率变动（按基期消耗、基期产量）
+    volume: float   # 产量变动（按本期分配率、基期消耗）
+    mix: float      # 作业消耗结构变动（按本期分配率、本期产量）
+    activity_ids: list = None
+    activity_effects: dict = None   # {"rate"/"volume"/"mix": (A,) 各作业明细}
+
+    @property
+    def total(self):
+        return self.unit_cost - self.base_unit_cost
+
+
+class HistoryStore:
+    """
+    历史库目录：meta.json 记录期间/产品/作业登记表、各表行数和列文件的代号，
+    <表名>.<列名>.bin（代号 n>0 时为 <表名>.<列名>.g<n>.bin）为该列的原始数组；行数以 meta.json 为准
+
+    追加新期间只在列文件尾部写入，写入中断留下的多余尾部会在下次追加时截掉；
+    替换已有期间时先把全部列完整写成新一代文件，再原子替换 meta.json 切换代号，最后删除旧文件，
+    任何时刻中断 meta.json 都指向一套完整的列文件。列文件短于 meta.json 记录的行数时报错
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._meta = None
+        self._columns = {}
+
+    # ---------- 元数据与列文件 ----------
+    def _meta_path(self):
+        return os.path.join(self.path, META_FILE)
+
+    def _column_path(self, table, column, generation=None):
+        if generation is None:
+            generation = self.meta.get("generation", 0)
+        suffix = f".g{generation}" if generation else ""
+        return os.path.join(self.path, f"{table}.{column}{suffix}.bin")
+
+    def _check_size(self, table, column):
+        """列文件至少要有 meta.json 记录的行数（多出的是中断追加的尾部）"""
+        n = self.meta["rows"][table]
+        path = self._column_path(table, column)
+        itemsize = np.dtype(dict(TABLES[table])[column]).itemsize
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < n * itemsize:
+            raise ValueError(f"{path} 只有 {size // itemsize} 行，少于 {META_FILE} 记录的 {n} 行，历史库已损坏")
+        return path
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            try:
+                with open(self._meta_path(), encoding="utf-8") as f:
+                    self._meta = json.load(f)
+            except FileNotFoundError:
+                self._meta = {"version": STORE_VERSION, "periods": [], "products": [],
+                              "activities": [], "rows": {name: 0 for name in TABLES}}
+            if self._meta.get("version") != STORE_VERSION:
+                raise ValueError(f"{self.path} 历史库版本不兼容: {self._meta.get('version')}")
+        return self._meta
+
+    def _save_meta(self):
+        tmp = f"{self._meta_path()}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self._meta_path())
+        self._columns.clear()
+
+    def column(self, table, column):
+        """只读内存映射的列数组（长度为已提交行数）"""
+        key = (table, column)
+        if key not in self._columns:
+            n = self.meta["rows"][table]
+            dtype = dict(TABLES[table])[column]
+            if n == 0:
+                self._columns[key] = np.zeros(0, dtype=dtype)
+            else:
+                self._columns[key] = np.memmap(self._check_size(table, column), dtype=dtype,
+                                               mode="r", shape=(n,))
+        return self._columns[key]
+
+    @property
+    def periods(self):
+        return list(self.meta["periods"])
+
+    def _register(self, kind, codes):
+        """登记编码，返回序号数组"""
+        registry = self.meta[kind]
+        positions = {code: i for i, code in enumerate(registry)}
+        for code in codes:
+            if code not in positions:
+                positions[code] = len(registry)
+                registry.append(code)
+        return np.array([positions[code] for code in codes], dtype="<i4")
+
+    def _lookup(self, kind, code):
+        try:
+            return self.meta[kind].index(code)
+        except ValueError:
+            raise KeyError(f"历史库中没有 {code}") from None
+
+    # ---------- 写入 ----------
+    def _rewrite_replacing(self, period_idx, new_rows):
+        """
+        替换某期的全部行：保留的旧行加上新行写成新一代列文件，保存 meta.json 后再删除旧文件
+
+        新文件在 meta.json 切换代号之前不会被读取，中断时旧数据保持完整
+        """
+        self._columns.clear()
+        old_gen = self.meta.get("generation", 0)
+        gen = old_gen + 1
+        rows = {}
+        for table, columns in TABLES.items():
+            n = self.meta["rows"][table]
+            old = {name: np.fromfile(self._check_size(table, name), dtype=dtype, count=n) if n
+                   else np.zeros(0, dtype=dtype) for name, dtype in columns}
+            keep = old["period"] != period_idx
+            for name, dtype in columns:
+                data = np.concatenate([old[name][keep], np.asarray(new_rows[table][name], dtype=dtype)])
+                data.tofile(self._column_path(table, name, gen))
+            rows[table] = int(keep.sum()) + len(new_rows[table]["period"])
+        self.meta["rows"] = rows
+        self.meta["generation"] = gen
+        self._save_meta()
+        for table, columns in TABLES.items():
+            for name, _ in columns:
+                try:
+                    os.remove(self._column_path(table, name, old_gen))
+                except FileNotFoundError:
+                    pass
+
+    def _append_rows(self, table, data):
+        n = self.meta["rows"][table]
+        for name, dtype in TABLES[table]:
+            path = self._check_size(table, name)
+            with open(path, "ab") as f:
+                f.truncate(n * np.dtype(dtype).itemsize)
+                f.write(np.ascontiguousarray(data[name], dtype=dtype).tobytes())
+        self.meta["rows"][table] = n + len(data["period"])
+
+    def append(self, period, result, quantities):
+        """
+        追加一期：result 为 abc_engine.ABCResult，quantities 为各产品产量
+
+        期间已存在时替换该期数据（期间顺序不变），新期间排在最后
+        """
+        os.makedirs(self.path, exist_ok=True)
+        self._columns.clear()
+        replace = period in self.meta["periods"]
+        period_idx = int(self._register("periods", [period])[0])
+
+        products = self._register("products", [str(p) for p in result.product_ids])
+        activities = self._register("activities", [str(a) for a in result.activity_ids])
+        n_p, n_a = len(products), len(activities)
+        p_idx, a_idx = np.nonzero(result.consumption)
+        new_rows = {
+            "products": {
+                "period": np.full(n_p, period_idx), "product": products,
+                "quantity": np.asarray(quantities, dtype=float), "direct_cost": result.direct_costs,
+                "overhead": result.overhead, "unit_cost": result.unit_costs,
+                "unit_price": result.unit_prices,
+            },
+            "activities": {
+                "period": np.full(n_a, period_idx), "activity": activities,
+                "activity_cost": result.activity_costs, "driver_total": result.driver_totals,
+                "rate": result.rates,
+            },
+            "consumption": {
+                "period": np.full(len(p_idx), period_idx), "product": products[p_idx],
+                "activity": activities[a_idx], "consumption": result.consumption[p_idx, a_idx],
+            },
+        }
+        if replace:
+            self._rewrite_replacing(period_idx, new_rows)
+            return
+        for table, data in new_rows.items():
+            self._append_rows(table, data)
+        self._save_meta()
+
+    def append_model(self, period, model):
+        """追加 compute_model() 的结果"""
+        self.append(period, model["abc_result"], [prod[4] for prod in model["products"]])
+
+    # ---------- 查询 ----------
+    def _series(self, table, key_column, key, metric):
+        mask = np.asarray(self.column(table, key_column)) == key
+        periods = np.asarray(self.column(table, "period"))[mask]
+        values = np.asarray(self.column(table, metric))[mask]
+        order = np.argsort(periods, kind="stable")
+        names = self.meta["periods"]
+        return Series([names[p] for p in periods[order]], values[order])
+
+    def product_series(self, product, metric="unit_cost"):
+        """产品指标序列：metric 为 quantity/direct_cost/overhead/unit_cost/unit_price"""
+        return self._series("products", "product", self._lookup("products", product), metric)
+
+    def activity_series(self, activity, metric="rate"):
+        """作业指标序列：metric 为 activity_cost/driver_total/rate"""
+        return self._series("activities", "activity", self._lookup("activities", activity), metric)
+
+    def _period_slice(self, product_idx, period_idx):
+        """某产品某期的 (产量, 直接成本, 单位成本, {作业: 分配率}, {作业: 消耗量})"""
+        prod_period = np.asarray(self.column("products", "period"))
+        prod_mask = (np.asarray(self.column("products", "product")) == product_idx) & (prod_period == period_idx)
+        if not prod_mask.any():
+            raise KeyError(f"{self.meta['products'][product_idx]} 在 {self.meta['periods'][period_idx]} 没有数据")
+        row = int(np.argmax(prod_mask))
+        act_mask = np.asarray(self.column("activities", "period")) == period_idx
+        n_act = len(self.meta["activities"])
+        rates = np.zeros(n_act)
+        rates[np.asarray(self.column("activities", "activity"))[act_mask]] = \
+            np.asarray(self.column("activities", "rate"))[act_mask]
+        cons_mask = ((np.asarray(self.column("consumption", "period")) == period_idx)
+                     & (np.asarray(self.column("consumption", "product")) == product_idx))
+        consumption = np.zeros(n_act)
+        np.add.at(consumption, np.asarray(self.column("consumption", "activity"))[cons_mask],
+                  np.asarray(self.column("consumption", "consumption"))[cons_mask])
+        return (float(self.column("products", "quantity")[row]),
+                float(self.column("products", "direct_cost")[row]),
+                float(self.column("products", "unit_cost")[row]), rates, consumption)
+
+    def variance(self, product, base_period, period):
+        """
+        两期单位成本差异分解
+
+        单位制造费用 = Σ 分配率 × 消耗量 / 产量，按 分配率 -> 产量 -> 消耗结构 的顺序替换：
+        分配率差异 = Σ (r1 - r0) c0 / q0，产量差异 = Σ r1 c0 (1/q1 - 1/q0)，
+        消耗结构差异 = Σ r1 (c1 - c0) / q1，三者与单位直接成本变动之和等于单位成本变动
+        """
+        p = self._lookup("products", product)
+        q0, d0, u0, r0, c0 = self._period_slice(p, self._lookup("periods", base_period))
+        q1, d1, u1, r1, c1 = self._period_slice(p, self._lookup("periods", period))
+        inv0 = 1 / q0 if q0 else 0.0
+        inv1 = 1 / q1 if q1 else 0.0
+        rate = (r1 - r0) * c0 * inv0
+        volume = r1 * c0 * (inv1 - inv0)
+        mix = r1 * (c1 - c0) * inv1
+        return CostVariance(product, base_period, period, u0, u1,
+                            direct=d1 * inv1 - d0 * inv0, rate=float(rate.sum()),
+                            volume=float(volume.sum()), mix=float(mix.sum()),
+                            activity_ids=list(self.meta["activities"]),
+                            activity_effects={"rate": rate, "volume": volume, "mix": mix})
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 增量更新
+记录每张工作表依赖哪些输入表，按依赖输入的内容为每张工作表计算指纹，
+指纹保存在工作簿的自定义文档属性中；再次生成时只重建指纹变化的工作表，
+其余工作表（含图表）原样保留
+"""
+
+import hashlib
+import os
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import openpyxl
+from openpyxl.packaging.custom import StringProperty
+
+import abc_formula
+import abc_profile
+import abc_sheets
+
+FINGERPRINT_PREFIX = "abc指纹:"
+CUSTOM_PROPS_PART = "docProps/custom.xml"
+_CUSTOM_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/custom-properties}"
+INTRO_SHEET = "说明"
+
+# 工作表 -> 依赖的输入表（ABCDataset 字段名）
+# "说明" 只依赖车间和核算期间；成本动因及其后各表都用到ABC分配结果，
+# 分配结果依赖产品（产量、售价）、直接成本、作业、成本动因和动因消耗
+_ALLOCATION_INPUTS = ("products", "direct_costs", "activities", "cost_drivers", "consumption")
+SHEET_INPUTS = {
+    INTRO_SHEET: (),
+    "基础数据": ("products", "workhours", "direct_costs"),
+    "成本归集": ("overhead",),
+    "作业识别": ("activities",),
+    "成本动因": _ALLOCATION_INPUTS,
+    "产品成本(ABC)": _ALLOCATION_INPUTS,
+    "成本对比": _ALLOCATION_INPUTS + ("overhead",),
+    "可视化图表": _ALLOCATION_INPUTS + ("overhead",),
+    "质量成本": _ALLOCATION_INPUTS + ("overhead", "quality_map", "quality_rates"),
+    "产能利用": _ALLOCATION_INPUTS + ("workhours", "capacity_pools", "time_equations"),
+}
+
+# 决定工作表内容的代码：数据解析、计算（compute_model 及各计算模块）、布局、构建、样式和公式缓存值
+CODE_FILES = (
+    "abc_data.py", "abc_engine.py", "abc_quality.py", "abc_tdabc.py", "abc_layout.py",
+    "abc_sheets.py", "abc_styles.py", "abc_formula.py", "生成ABC成本模型Excel.py",
+)
+_code_version = None
+
+
+def table_fingerprint(table):
+    """输入表内容指纹（列名、类型、数据）；可选输入表缺失时为固定值"""
+    digest = hashlib.sha256()
+    if table is None:
+        return "missing"
+    for name, column in table.columns.items():
+        column = np.ascontiguousarray(column)
+        digest.update(f"{name}|{column.dtype.str}|{column.shape}".encode())
+        digest.update(column.tobytes())
+    return digest.hexdigest()
+
+
+def _builders_version():
+    """
+    计算和构建工作表内容的代码指纹：CODE_FILES 中任一文件修改后全部工作表都需要重建
+
+    每个进程只读取一次（批量生成时各任务共用）
+    """
+    global _code_version
+    if _code_version is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in CODE_FILES:
+            digest.update(name.encode())
+            with open(os.path.join(here, name), "rb") as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def sheet_fingerprints(dataset, workshop, period):
+    """计算每张工作表的指纹，返回 {工作表名: 指纹}"""
+    version = _builders_version()
+    tables = {name: table_fingerprint(getattr(dataset, name))
+              for name in {name for inputs in SHEET_INPUTS.values() for name in inputs}}
+    fingerprints = {}
+    for sheet, inputs in SHEET_INPUTS.items():
+        digest = hashlib.sha256(f"{version}|{sheet}".encode())
+        if sheet == INTRO_SHEET:
+            digest.update(f"|{workshop}|{period}".encode())
+        for name in inputs:
+            digest.update(f"|{name}={tables[name]}".encode())
+        fingerprints[sheet] = digest.hexdigest()[:32]
+    return fingerprints
+
+
+def read_file_fingerprints(path):
+    """不加载工作簿，直接从xlsx压缩包的自定义属性部件读取工作表指纹"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            root = ElementTree.fromstring(archive.read(CUSTOM_PROPS_PART))
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+        return {}
+    fingerprints = {}
+    for prop in root.iter(f"{_CUSTOM_NS}property"):
+        name = prop.get("name", "")
+        if name.startswith(FINGERPRINT_PREFIX) and len(prop):
+            fingerprints[name[len(FINGERPRINT_PREFIX):]] = prop[0].text
+    return fingerprints
+
+
+def write_fingerprints(wb, fingerprints):
+    """把工作表指纹写入工作簿自定义文档属性（覆盖旧值）"""
+    props = wb.custom_doc_props
+    for prop in [p for p in props.props if p.name.startswith(FINGERPRINT_PREFIX)]:
+        props.props.remove(prop)
+    for sheet, value in fingerprints.items():
+        props.append(StringProperty(name=FINGERPRINT_PREFIX + sheet, value=value))
+
+
+def stale_sheets(old, new):
+    """指纹缺失或变化的工作表，按工作簿顺序返回"""
+    return [sheet for sheet in SHEET_INPUTS if old.get(sheet) != new[sheet]]
+
+
+def _rebuild_sheet(wb, sheet, model, workshop, period):
+    """删除旧工作表并在原位置重建"""
+    index = wb.sheetnames.index(sheet)
+    wb.remove(wb[sheet])
+    if sheet == INTRO_SHEET:
+        wb.create_sheet(INTRO_SHEET, index)
+        wb.active = index
+        abc_sheets.build_intro_sheet(wb, workshop, period)
+        return
+    builder = dict(abc_sheets.SHEET_BUILDERS)[sheet]
+    builder(wb, model)
+    wb.move_sheet(sheet, offset=index - wb.sheetnames.index(sheet))
+
+
+def update_workbook(dataset, output_file, workshop, period, model, verbose=True,
+                    profiler=abc_profile.DISABLED):
+    """
+    增量更新已有工作簿：只重建依赖输入发生变化的工作表
+
+    返回重建的工作表名列表；工作簿不存在、没有指纹或工作表结构不符时返回 None，
+    由调用方完整重建
+    """
+    if not os.path.exists(output_file):
+        return None
+    old = read_file_fingerprints(output_file)
+    if not old:
+        return None
+    new = sheet_fingerprints(dataset, workshop, period)
+    stale = stale_sheets(old, new)
+    if not stale:
+        # 输入未变化：不读取也不改写工作簿
+        return stale
+
+    with profiler.stage("读取工作簿"):
+        wb = openpyxl.load_workbook(output_file)
+    if wb.sheetnames != list(SHEET_INPUTS):
+        return None
+    for sheet in stale:
+        with profiler.stage(sheet, wb, sheet):
+            _rebuild_sheet(wb, sheet, model, workshop, period)
+        if verbose:
+            print(f"工作表 '{sheet}' 已重建")
+    wb.active = 0
+    write_fingerprints(wb, new)
+    abc_formula.save_workbook(wb, output_file, profiler)
+    return stale
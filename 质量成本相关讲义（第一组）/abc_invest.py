@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 智能化升级投资决策
+按 数据_投资参数.csv 中的各项参数（基准值和下限/上限）计算升级项目逐年的增量现金流：
+  年效益 = 人工节约 + 材料损耗节约 + 质量成本降低 + 增产边际贡献 + 能源节约
+  年现金流 = (年效益 − 年维护费用 − 折旧) × (1 − 所得税率) + 折旧
+  期末另加 残值 − (残值 − 账面净值) × 所得税率（寿命短于折旧年限时未提完的账面净值核销抵税）
+全部参数组合（蒙特卡洛三角分布抽样或单因素高/低取值）组成 (情景数, 年数) 的现金流矩阵，
+一次算出 NPV、IRR、静态/动态回收期和盈亏平衡点；IRR 用向量化的安全牛顿法
+（牛顿步越出区间时改用二分），所有情景同时迭代，不逐个求根
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from abc_data import Column, DataValidationError, TableSchema, load_table
+
+SCHEMAS = {
+    "parameters": TableSchema("数据_投资参数.csv", key="参数", columns=(
+        Column("参数"), Column("基准值", "float"), Column("下限", "float"), Column("上限", "float"),
+        Column("单位"), Column("说明"),
+    )),
+}
+# 现金流公式用到的参数（按此顺序排列情景矩阵的列）
+PARAMETERS = (
+    "初始投资", "项目寿命", "折现率", "所得税率", "折旧年限", "残值",
+    "升级前人工成本", "减员比例", "材料损耗节约", "升级前不良品率", "升级后不良品率",
+    "每百分点不良率质量成本", "升级前营业收入", "产能提升", "增产边际贡献率", "能源节约", "年维护费用",
+)
+# 取整数的参数
+INTEGER_PARAMETERS = ("项目寿命", "折旧年限")
+BENEFITS = ("人工节约", "材料损耗节约", "质量成本降低", "增产边际贡献", "能源节约")
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+IRR_BRACKET = (-0.99, 10.0)
+
+
+@dataclass
+class InvestmentParameters:
+    """各参数的基准值和取值范围（均为 (K,) 数组，顺序同 PARAMETERS）"""
+    base: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    units: list
+
+    def matrix(self, **overrides):
+        """(1, K) 基准情景，可按参数名覆盖"""
+        values = self.base.copy()
+        for name, value in overrides.items():
+            values[PARAMETERS.index(name)] = value
+        return values[None, :]
+
+
+@dataclass
+class InvestmentResult:
+    """各情景的评价指标：scenarios 为 (N, K) 参数矩阵，cash_flows 为 (N, 最长寿命+1)"""
+    scenarios: np.ndarray
+    cash_flows: np.ndarray
+    benefits: np.ndarray           # (N, 5) 各项年效益，顺序同 BENEFITS
+    npv: np.ndarray
+    irr: np.ndarray                # 无解（现金流不变号）时为 nan
+    payback: np.ndarray            # 静态回收期（年），期内收不回为 nan
+    discounted_payback: np.ndarray
+    margin_of_safety: np.ndarray   # 年效益可下降的比例（NPV 降到0）
+    percentiles: tuple = DEFAULT_PERCENTILES
+
+    @property
+    def n_scenarios(self):
+        return len(self.npv)
+
+    def column(self, name):
+        return self.scenarios[:, PARAMETERS.index(name)]
+
+    @property
+    def breakeven_benefits(self):
+        """(N,) NPV 为0时的年效益（万元/年）"""
+        return self.benefits.sum(axis=1) * (1 - self.margin_of_safety)
+
+    @property
+    def prob_loss(self):
+        """NPV < 0 的情景比例"""
+        return float((self.npv < 0).mean())
+
+    @property
+    def prob_irr_below_rate(self):
+        """IRR 低于折现率（含无解）的情景比例"""
+        return float(np.mean(~(self.irr >= self.column("折现率"))))
+
+    def histogram(self, bins=20):
+        """NPV 分布：(各区间情景数, 区间边界)"""
+        return np.histogram(self.npv, bins=bins)
+
+    def bands(self, values):
+        """按 percentiles 取分位数（忽略 nan）"""
+        return np.nanpercentile(values, self.percentiles)
+
+
+@dataclass
+class InvestmentSensitivity:
+    """单因素敏感性：low/high 为各参数分别取下限/上限、其余取基准值时的 NPV"""
+    factors: list
+    low: np.ndarray
+    high: np.ndarray
+    base_npv: float
+
+    @property
+    def swing(self):
+        return np.abs(self.high - self.low)
+
+    def ranking(self, top=None):
+        """按 NPV 波动幅度从大到小排列的参数序号（范围为0的参数不列出）"""
+        order = [i for i in np.argsort(-self.swing, kind="stable") if self.swing[i] > 0]
+        return order[:top] if top else order
+
+
+def load_parameters(data_dir, cache=True):
+    """读取 数据_投资参数.csv；缺少参数或 下限 ≤ 基准值 ≤ 上限 不成立时报错"""
+    table = load_table("parameters", data_dir, cache, schemas=SCHEMAS)
+    label = SCHEMAS["parameters"].file_name
+    names = table["参数"].tolist()
+    missing = [name for name in PARAMETERS if name not in names]
+    if missing:
+        raise DataValidationError(f"{label} 缺少参数: {missing}")
+    order = [names.index(name) for name in PARAMETERS]
+    base, low, high = (table[col][order].astype(float) for col in ("基准值", "下限", "上限"))
+    bad = [PARAMETERS[i] for i in np.flatnonzero((low > base) | (base > high))]
+    if bad:
+        raise DataValidationError(f"{label} 以下参数不满足 下限 ≤ 基准值 ≤ 上限: {bad}")
+    return InvestmentParameters(base=base, low=low, high=high, units=table["单位"][order].tolist())
+
+
+def sample(params, n_scenarios, seed=0):
+    """(N, K) 情景矩阵：各参数按 (下限, 基准值, 上限) 三角分布独立抽样"""
+    rng = np.random.default_rng(seed)
+    scenarios = np.tile(params.base, (n_scenarios, 1))
+    varying = np.flatnonzero(params.high > params.low)
+    scenarios[:, varying] = rng.triangular(params.low[varying], params.base[varying], params.high[varying],
+                                           (n_scenarios, len(varying)))
+    for name in INTEGER_PARAMETERS:
+        k = PARAMETERS.index(name)
+        scenarios[:, k] = np.round(scenarios[:, k])
+    return scenarios
+
+
+def annual_benefits(scenarios):
+    """(N, 5) 各项年效益（万元/年）"""
+    p = {name: scenarios[:, k] for k, name in enumerate(PARAMETERS)}
+    return np.column_stack([
+        p["升级前人工成本"] * p["减员比例"],
+        p["材料损耗节约"],
+        (p["升级前不良品率"] - p["升级后不良品率"]) * 100 * p["每百分点不良率质量成本"],
+        p["升级前营业收入"] * p["产能提升"] * p["增产边际贡献率"],
+        p["能源节约"],
+    ])
+
+
+def cash_flows(scenarios):
+    """
+    (N, T+1) 增量现金流矩阵（第0列为初始投资），T 为最长项目寿命
+
+    寿命较短的情景在寿命之后的年份为0；折旧按直线法计提到折旧年限或项目结束，
+    项目结束时处置设备：收回残值，残值高于账面净值的部分纳税，低于的部分（含未提完的折旧）抵税
+    """
+    p = {name: scenarios[:, k] for k, name in enumerate(PARAMETERS)}
+    life = p["项目寿命"].astype(int)
+    years = np.arange(1, life.max() + 1)
+    active = years <= life[:, None]
+    depreciation = np.where(years <= p["折旧年限"][:, None],
+                            (p["初始投资"] / np.maximum(p["折旧年限"], 1))[:, None], 0.0) * active
+    profit = (annual_benefits(scenarios).sum(axis=1) - p["年维护费用"])[:, None] * active - depreciation
+    flows = profit * (1 - p["所得税率"])[:, None] + depreciation
+    book_value = p["初始投资"] - depreciation.sum(axis=1)
+    flows[np.arange(len(life)), life - 1] += p["残值"] - (p["残值"] - book_value) * p["所得税率"]
+    return np.column_stack([-p["初始投资"], flows])
+
+
+def _discount(rates, n_periods):
+    """(N, n_periods) 折现系数 1 / (1+r)^t"""
+    return (1.0 + rates)[:, None] ** -np.arange(n_periods)
+
+
+def npv(flows, rates):
+    return (flows * _discount(rates, flows.shape[1])).sum(axis=1)
+
+
+def irr(flows, tol=1e-9, max_iter=100):
+    """
+    向量化 IRR：全部情景同时做安全牛顿迭代
+
+    各情景维护一个 NPV 变号的区间 [lo, hi]，牛顿步越出区间时改取中点，区间和迭代点逐步收敛；
+    区间两端 NPV 同号（无解）的情景返回 nan
+    """
+    n = len(flows)
+    t = np.arange(flows.shape[1])
+    lo, hi = np.full(n, IRR_BRACKET[0]), np.full(n, IRR_BRACKET[1])
+    f_lo = npv(flows, lo)
+    valid = np.sign(f_lo) != np.sign(npv(flows, hi))
+    rate = np.full(n, 0.1)
+    for _ in range(max_iter):
+        disc = _discount(rate, len(t))
+        value = (flows * disc).sum(axis=1)
+        slope = -(t * flows * disc).sum(axis=1) / (1.0 + rate)
+        same = np.sign(value) == np.sign(f_lo)
+        lo, f_lo = np.where(same, rate, lo), np.where(same, value, f_lo)
+        hi = np.where(same, hi, rate)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = rate - value / slope
+        inside = np.isfinite(step) & (step > lo) & (step < hi)
+        new_rate = np.where(inside, step, (lo + hi) / 2)
+        done = np.abs(new_rate - rate) < tol
+        rate = new_rate
+        if done[valid].all():
+            break
+    return np.where(valid, rate, np.nan)
+
+
+def payback(flows, rates=None):
+    """回收期（年）：累计（折现）现金流转正的时点，年内按线性插值；rates 为空时为静态回收期"""
+    if rates is not None:
+        flows = flows * _discount(rates, flows.shape[1])
+    cumulative = np.cumsum(flows, axis=1)
+    recovered = cumulative >= 0
+    year = np.argmax(recovered, axis=1)
+    rows = np.arange(len(flows))
+    ok = recovered.any(axis=1) & (year > 0)
+    prev = np.where(ok, year - 1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = -cumulative[rows, prev] / flows[rows, year]
+    return np.where(ok, prev + fraction, np.nan)
+
+
+def evaluate(scenarios, percentiles=DEFAULT_PERCENTILES):
+    """计算每个情景（(N, K) 参数矩阵的一行）的全部评价指标"""
+    scenarios = np.atleast_2d(np.asarray(scenarios, dtype=float))
+    rates = scenarios[:, PARAMETERS.index("折现率")]
+    tax = scenarios[:, PARAMETERS.index("所得税率")]
+    life = scenarios[:, PARAMETERS.index("项目寿命")].astype(int)
+    flows = cash_flows(scenarios)
+    benefits = annual_benefits(scenarios)
+    values = npv(flows, rates)
+
+    # 年效益每下降1元，各年现金流减少 (1 − 税率) 元：安全边际 = NPV / 税后年效益现值
+    annuity = (_discount(rates, life.max() + 1)[:, 1:] * (np.arange(1, life.max() + 1) <= life[:, None])).sum(1)
+    benefit_pv = benefits.sum(axis=1) * (1 - tax) * annuity
+    margin = np.divide(values, benefit_pv, out=np.zeros_like(values), where=benefit_pv != 0)
+    return InvestmentResult(
+        scenarios=scenarios,
+        cash_flows=flows,
+        benefits=benefits,
+        npv=values,
+        irr=irr(flows),
+        payback=payback(flows),
+        discounted_payback=payback(flows, rates),
+        margin_of_safety=margin,
+        percentiles=tuple(percentiles),
+    )
+
+
+def sensitivity(params):
+    """各参数分别取下限、上限（其余取基准值），2K 个情景一次算出"""
+    n = len(PARAMETERS)
+    low = np.tile(params.base, (n, 1))
+    high = low.copy()
+    low[np.arange(n), np.arange(n)] = params.low
+    high[np.arange(n), np.arange(n)] = params.high
+    values = evaluate(np.vstack([low, high, params.base])).npv
+    return InvestmentSensitivity(factors=list(PARAMETERS), low=values[:n], high=values[n:2 * n],
+                                 base_npv=float(values[-1]))
+
+
+def run(data_dir, n_scenarios=10_000, seed=0, cache=True):
+    """读取参数并计算 (参数, 基准情景结果, 模拟结果, 敏感性结果)"""
+    params = load_parameters(data_dir, cache)
+    return params, evaluate(params.matrix()), evaluate(sample(params, n_scenarios, seed)), sensitivity(params)
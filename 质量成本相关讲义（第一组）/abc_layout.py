@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 工作簿布局
+各工作表中表格区域的行号按产品、费用科目、作业个数动态计算；主要数据列定义为
+工作簿级名称（如 产品_产量 = '基础数据'!$E$3:$E$7），跨表引用和合计公式使用名称
+而不是固定坐标，主要数据区域同时定义为Excel表格
+
+本模块不导入 openpyxl，名称和表格由 abc_sheets 在构建工作表时写入
+"""
+
+from dataclasses import dataclass
+
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_COLS = 16384
+
+# 区域 -> {名称: (列, 范围)}；范围 "data" 为全部数据行，"total" 为合计行单元格
+NAMES = {
+    "products": {"产品_产量": ("E", "data"), "产品_批次数": ("F", "data"),
+                 "产品_单位售价": ("H", "data")},
+    "workhours": {"工时_总人工": ("D", "data"), "工时_总机时": ("E", "data")},
+    "direct_costs": {"直接成本_合计": ("D", "data"), "直接成本_单位": ("E", "data")},
+    "overhead": {"制造费用_发生额": ("C", "data"), "制造费用_合计": ("C", "total")},
+    "activities": {"作业_成本": ("E", "data"), "作业_成本合计": ("E", "total")},
+    "drivers": {"动因_总量": ("D", "data"), "动因_作业成本": ("E", "data"), "动因_分配率": ("F", "data")},
+    "abc_costs": {"ABC_产量": ("C", "data"), "ABC_直接材料": ("D", "data"), "ABC_直接人工": ("E", "data"),
+                  "ABC_制造费用": ("F", "data"), "ABC_完全成本": ("G", "data"),
+                  "ABC_单位成本": ("H", "data"), "ABC_毛利率": ("K", "data")},
+    "quality_summary": {"质量成本_类别金额": ("B", "data"), "质量成本_合计": ("B", "total")},
+    "capacity": {"产能_季度成本": ("C", "data"), "产能_实际产能": ("D", "data"), "产能_已用产能": ("F", "data"),
+                 "产能_闲置成本": ("J", "data"), "产能_闲置成本合计": ("J", "total")},
+    "capacity_products": {"TDABC_制造费用": ("C", "data"), "TDABC_单位成本": ("D", "data")},
+}
+
+# 区域 -> Excel表格名称（表格范围为表头行到最后一个数据行，不含合计行）
+TABLES = {
+    "products": "表_产品信息",
+    "workhours": "表_产品工时",
+    "direct_costs": "表_直接成本",
+    "overhead": "表_制造费用",
+    "activities": "表_作业清单",
+    "drivers": "表_成本动因",
+    "abc_costs": "表_ABC成本",
+    "quality": "表_质量成本",
+    "capacity": "表_资源产能",
+    "capacity_products": "表_TDABC成本",
+}
+
+
+def _column_letter(index):
+    letters = ""
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+@dataclass
+class Block:
+    """工作表中的一个表格区域：表头行、数据行（first_row..last_row）、紧随其后的合计行"""
+    sheet: str
+    header_row: int
+    n_rows: int
+    n_cols: int
+
+    @property
+    def first_row(self):
+        return self.header_row + 1
+
+    @property
+    def last_row(self):
+        return self.header_row + self.n_rows
+
+    @property
+    def total_row(self):
+        return self.last_row + 1
+
+    def row(self, i):
+        """第 i 个数据行（从0开始）的行号"""
+        return self.first_row + i
+
+    @property
+    def rows(self):
+        return range(self.first_row, self.last_row + 1)
+
+    @property
+    def table_ref(self):
+        """表格范围（表头 + 数据行）"""
+        return f"A{self.header_row}:{_column_letter(self.n_cols)}{max(self.last_row, self.first_row)}"
+
+    def name_ref(self, column, scope="data"):
+        """名称指向的绝对引用，如 '基础数据'!$E$3:$E$7"""
+        sheet = "'" + self.sheet.replace("'", "''") + "'"
+        if scope == "total":
+            return f"{sheet}!${column}${self.total_row}"
+        return f"{sheet}!${column}${self.first_row}:${column}${max(self.last_row, self.first_row)}"
+
+
+class WorkbookLayout:
+    """按产品数 P、制造费用科目数 R、作业数 A（及TDABC资源池数）计算各工作表的表格位置"""
+
+    def __init__(self, n_products, n_overhead, n_activities, n_quality_categories=4, n_pools=0):
+        self.n_products = n_products
+        self.n_overhead = n_overhead
+        self.n_activities = n_activities
+        self.n_pools = n_pools
+        P, R, A = n_products, n_overhead, n_activities
+
+        # 基础数据：产品信息、工时统计、直接成本三张表上下排列，表间空一行后是标题行
+        self.products = Block("基础数据", 2, P, 9)
+        self.workhours = Block("基础数据", self.products.total_row + 3, P, 5)
+        self.direct_costs = Block("基础数据", self.workhours.total_row + 3, P, 5)
+        self.overhead = Block("成本归集", 2, R, 6)
+        self.activities = Block("作业识别", 2, A, 7)
+        self.drivers = Block("成本动因", 2, A, 7)
+        # 动因消耗表：行为作业，列为各产品 + 合计
+        self.consumption = Block("成本动因", A + 6, A, P + 3)
+        self.abc_costs = Block("产品成本(ABC)", 2, P, 11)
+        self.comparison = Block("成本对比", 4, P, 6)
+        self.margins = Block("成本对比", self.comparison.last_row + 3, P, 5)
+        self.findings_row = self.margins.last_row + 2
+        # 可视化图表：柱状图数据在上，饼图数据至少从第20行开始（让出柱状图的位置）
+        self.chart_costs = Block("可视化图表", 4, P, 3)
+        self.chart_activities = Block("可视化图表", max(21, self.chart_costs.last_row + 4), 4, 2)
+        self.quality = Block("质量成本", 3, P, 11)
+        self.quality_summary = Block("质量成本", self.quality.last_row + 3, n_quality_categories, 3)
+        # 产能利用：资源池表在上，各产品TDABC成本在下（未提供TDABC输入时资源池数为0）
+        self.capacity = Block("产能利用", 3, n_pools, 11)
+        self.capacity_products = Block("产能利用", self.capacity.total_row + 3, P, 8)
+
+    @classmethod
+    def from_model(cls, model):
+        tdabc = model.get("tdabc")
+        return cls(len(model["products"]), len(model["overhead"]), len(model["activities"]),
+                   len(model.get("quality_categories", ())) or 4,
+                   len(tdabc.pool_ids) if tdabc is not None else 0)
+
+    def block(self, name):
+        return getattr(self, name)
+
+    def names(self, block_name):
+        """{名称: 引用} —— 某个区域要定义的全部名称"""
+        block = self.block(block_name)
+        return {name: block.name_ref(column, scope)
+                for name, (column, scope) in NAMES.get(block_name, {}).items()}
+
+    def check(self):
+        """工作簿超出Excel行列上限时报错"""
+        if max(self.direct_costs.last_row, self.consumption.last_row,
+               self.capacity_products.last_row) > EXCEL_MAX_ROWS:
+            raise ValueError(f"{self.n_products}个产品、{self.n_activities}个作业超出Excel行数上限，"
+                             "请使用流式导出")
+        if self.consumption.n_cols > EXCEL_MAX_COLS:
+            raise ValueError(f"动因消耗表按产品分列，{self.n_products}个产品超出Excel列数上限，"
+                             "请使用流式导出")
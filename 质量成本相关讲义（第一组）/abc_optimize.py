@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 产品组合优化
+按ABC成本层级区分变动成本：单位级作业随产量变化，批次级作业随批次数变化，产品级作业在保留该产品时发生，
+设施级作业为固定成本。在机器小时、设备换型、检验等产能约束和市场需求上下限内，求ABC边际贡献最大的产品组合：
+  线性规划（LP）：批次数 = 产量 / 平均批量，可得各产能约束的影子价格（每增加一单位产能增加的边际贡献）
+  混合整数规划（MILP）：批次数取整数，产品可以停产（停产时省去产品级作业成本），影子价格取线性松弛的结果
+求解器为 scipy.optimize 中的 HiGHS；没有安装 scipy 时无法优化
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    from scipy import sparse
+    from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+except ImportError:  # 没有 scipy 时不能优化，其他功能不受影响
+    sparse = None
+
+# 受产能约束的作业：成本动因名称包含这些关键字（机时、换型、检验）
+CAPACITY_KEYWORDS = ("机时", "换型", "检")
+MACHINE_HOURS = "总机时"
+LEVEL_UNIT, LEVEL_BATCH, LEVEL_PRODUCT = "单位级", "批次级", "产品级"
+DEFAULT_TIME_LIMIT = 30.0
+
+
+@dataclass
+class MixProblem:
+    """优化输入：各产品的单位贡献、每批成本、产品级成本、产能消耗和需求上下限"""
+    product_ids: list
+    current: np.ndarray           # (P,) 当前产量
+    lot_sizes: np.ndarray         # (P,) 平均批量（每批上限）
+    unit_margins: np.ndarray      # (P,) 单位贡献 = 售价 − 单位直接成本 − 单位级作业成本/件
+    batch_costs: np.ndarray       # (P,) 每批的批次级作业成本
+    product_costs: np.ndarray     # (P,) 产品级作业成本（保留该产品时发生）
+    fixed_costs: float            # 设施级作业成本
+    constraint_names: list        # (K,)
+    per_unit: np.ndarray          # (K, P) 每件消耗的产能
+    per_batch: np.ndarray         # (K, P) 每批消耗的产能
+    capacity: np.ndarray          # (K,)
+    lower: np.ndarray             # (P,) 需求下限
+    upper: np.ndarray             # (P,) 需求上限
+
+
+@dataclass
+class MixResult:
+    """优化结果：shadow_prices 为各产能约束的影子价格（元/单位产能）"""
+    method: str
+    status: str
+    seconds: float
+    problem: MixProblem
+    quantities: np.ndarray
+    batches: np.ndarray
+    active: np.ndarray
+    shadow_prices: np.ndarray
+
+    def contribution(self, quantities, batches, active):
+        """边际贡献 = 单位贡献 × 产量 − 每批成本 × 批次数 − 保留产品的产品级成本"""
+        p = self.problem
+        return p.unit_margins * quantities - p.batch_costs * batches - p.product_costs * active
+
+    @property
+    def optimal_contribution(self):
+        return self.contribution(self.quantities, self.batches, self.active)
+
+    @property
+    def current_batches(self):
+        return self.problem.current / self.problem.lot_sizes
+
+    @property
+    def current_contribution(self):
+        p = self.problem
+        return self.contribution(p.current, self.current_batches, (p.current > 0).astype(float))
+
+    def usage(self, quantities, batches):
+        """(K,) 各产能约束的用量"""
+        return self.problem.per_unit @ quantities + self.problem.per_batch @ batches
+
+    @property
+    def optimal_usage(self):
+        return self.usage(self.quantities, self.batches)
+
+    @property
+    def current_usage(self):
+        return self.usage(self.problem.current, self.current_batches)
+
+
+def build_problem(model, dataset, capacity_factor=1.0, capacities=None, max_growth=1.2, min_share=0.0):
+    """
+    由 compute_model() 的结果构造优化问题
+
+    各产能约束的上限 = 当前用量 × capacity_factor，capacities 可按名称覆盖（{名称: 上限}）；
+    需求范围为 [当前产量 × min_share, 当前产量 × max_growth]
+    """
+    abc = model["abc_result"]
+    products = dataset.products
+    current = products["季度产量"].astype(float)
+    batches = products["批次数"].astype(float)
+    lot_sizes = products["平均批量"].astype(float)
+    levels = dataset.activities["作业层级"]
+    drivers = dataset.cost_drivers["成本动因"]
+
+    allocation = abc.consumption * abc.rates
+    unit_level = levels == LEVEL_UNIT
+    batch_level = levels == LEVEL_BATCH
+    safe_q = np.where(current > 0, current, 1.0)
+    safe_b = np.where(batches > 0, batches, 1.0)
+    direct_unit = np.asarray(abc.direct_costs, dtype=float) / safe_q
+    unit_margins = abc.unit_prices - direct_unit - allocation[:, unit_level].sum(axis=1) / safe_q
+
+    # 产能约束：总机时 + 动因名称含关键字的作业（单位级按件、批次级按批消耗）
+    constrained = np.flatnonzero([any(k in str(d) for k in CAPACITY_KEYWORDS) for d in drivers])
+    names = [MACHINE_HOURS] + [f"{dataset.activity_ids[a]} {drivers[a]}" for a in constrained]
+    per_unit = np.zeros((len(names), len(current)))
+    per_batch = np.zeros_like(per_unit)
+    per_unit[0] = dataset.workhours["单件机器小时"]
+    for row, a in enumerate(constrained, 1):
+        if levels[a] == LEVEL_BATCH:
+            per_batch[row] = abc.consumption[:, a] / safe_b
+        else:
+            per_unit[row] = abc.consumption[:, a] / safe_q
+    used = per_unit @ current + per_batch @ batches
+    capacity = used * capacity_factor
+    for name, value in (capacities or {}).items():
+        matches = [i for i, n in enumerate(names) if n == name or n.split(" ")[0] == name]
+        if not matches:
+            raise ValueError(f"没有名为 {name!r} 的产能约束（可选: {', '.join(names)}）")
+        capacity[matches] = value
+
+    return MixProblem(
+        product_ids=dataset.product_ids.tolist(),
+        current=current,
+        lot_sizes=lot_sizes,
+        unit_margins=unit_margins,
+        batch_costs=allocation[:, batch_level].sum(axis=1) / safe_b,
+        product_costs=allocation[:, levels == LEVEL_PRODUCT].sum(axis=1),
+        fixed_costs=float(allocation[:, ~(unit_level | batch_level | (levels == LEVEL_PRODUCT))].sum()),
+        constraint_names=names,
+        per_unit=per_unit,
+        per_batch=per_batch,
+        capacity=capacity,
+        lower=current * min_share,
+        upper=current * max_growth,
+    )
+
+
+def _solve_lp(problem):
+    """批次数 = 产量 / 批量，只以产量为变量；返回 (产量, 影子价格, 状态)"""
+    coeffs = problem.per_unit + problem.per_batch / problem.lot_sizes
+    objective = problem.unit_margins - problem.batch_costs / problem.lot_sizes
+    res = linprog(-objective, A_ub=sparse.csr_matrix(coeffs), b_ub=problem.capacity,
+                  bounds=np.column_stack([problem.lower, problem.upper]), method="highs")
+    if res.x is None:
+        raise ValueError(f"线性规划无解: {res.message}")
+    return res.x, -res.ineqlin.marginals, res.message
+
+
+def _solve_milp(problem, time_limit):
+    """变量 [产量 q, 批次数 b（整数）, 保留 y（0/1）]"""
+    n = len(problem.product_ids)
+    eye = sparse.identity(n, format="csr")
+    zeros = sparse.csr_matrix((len(problem.capacity), n))
+    # q − 批量·b ≤ 0；q − 需求上限·y ≤ 0；下限·y − q ≤ 0；产能
+    rows = sparse.vstack([
+        sparse.hstack([eye, -sparse.diags(problem.lot_sizes), sparse.csr_matrix((n, n))]),
+        sparse.hstack([eye, sparse.csr_matrix((n, n)), -sparse.diags(problem.upper)]),
+        sparse.hstack([-eye, sparse.csr_matrix((n, n)), sparse.diags(problem.lower)]),
+        sparse.hstack([sparse.csr_matrix(problem.per_unit), sparse.csr_matrix(problem.per_batch), zeros]),
+    ], format="csr")
+    upper = np.concatenate([np.zeros(3 * n), problem.capacity])
+    objective = -np.concatenate([problem.unit_margins, -problem.batch_costs, -problem.product_costs])
+    integrality = np.concatenate([np.zeros(n), np.ones(2 * n)])
+    bounds = Bounds(np.zeros(3 * n), np.concatenate([problem.upper, np.ceil(problem.upper / problem.lot_sizes),
+                                                     np.ones(n)]))
+    res = milp(objective, constraints=LinearConstraint(rows, -np.inf, upper), integrality=integrality,
+               bounds=bounds, options={"time_limit": time_limit, "mip_rel_gap": 1e-4})
+    if res.x is None:
+        raise ValueError(f"混合整数规划无解: {res.message}")
+    return res.x[:n], np.round(res.x[n:2 * n]), np.round(res.x[2 * n:]), res.message
+
+
+def optimize(problem, integer=False, time_limit=DEFAULT_TIME_LIMIT):
+    """求解产品组合；integer=True 时用MILP（整数批次、可停产），影子价格取LP的结果"""
+    if sparse is None:
+        raise ValueError("产品组合优化需要安装 scipy（pip install scipy）")
+    start = time.perf_counter()
+    quantities, shadow_prices, status = _solve_lp(problem)
+    batches = quantities / problem.lot_sizes
+    active = (quantities > 0).astype(float)
+    if integer:
+        quantities, batches, active, status = _solve_milp(problem, time_limit)
+    return MixResult(
+        method="MILP" if integer else "LP",
+        status=status,
+        seconds=time.perf_counter() - start,
+        problem=problem,
+        quantities=quantities,
+        batches=batches,
+        active=active,
+        shadow_prices=shadow_prices,
+    )
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 生成过程计时与剖析
+按阶段（读取数据、计算、各工作表构建、保存、公式求值……）记录耗时、单元格数、
+公式/带样式单元格数和内存峰值，汇总为JSON运行报告和一张耗时表；
+可选开启 cProfile（函数级耗时，另按 样式/图表/公式求值/XML写出 归类）和
+tracemalloc（各阶段Python内存分配峰值，开启后整体约慢2~3倍）
+
+本模块不导入 openpyxl，工作表单元格统计只读取工作表对象
+"""
+
+import cProfile
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不记录进程内存峰值
+    resource = None
+
+# cProfile 函数按所在文件归类（按顺序取第一条匹配）
+PROFILE_CATEGORIES = (
+    ("样式", ("openpyxl/styles", "openpyxl/descriptors", "openpyxl\\styles", "openpyxl\\descriptors")),
+    ("图表", ("openpyxl/chart", "openpyxl\\chart")),
+    ("公式求值", ("abc_formula",)),
+    ("XML写出", ("openpyxl/writer", "openpyxl/worksheet/_writer", "openpyxl\\writer",
+                 "openpyxl\\worksheet\\_writer", "xml/etree", "xml\\etree", "zipfile", "lxml")),
+    ("单元格", ("openpyxl/cell", "openpyxl/worksheet", "openpyxl\\cell", "openpyxl\\worksheet")),
+    ("数值计算", ("numpy",)),
+)
+TOP_FUNCTIONS = 30
+
+# 当前生效的剖析器（section() 计时用），未开启剖析时为 None
+_active = None
+
+
+def _rss_peak_mb():
+    """进程内存峰值（MB）；Linux 的 ru_maxrss 单位为KB，macOS 为字节"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def count_cells(ws):
+    """(单元格数, 公式单元格数, 带样式单元格数)"""
+    cells = ws._cells.values()
+    formulas = sum(1 for c in cells if isinstance(c.value, str) and c.value.startswith("="))
+    styled = sum(1 for c in cells if c.has_style)
+    return len(ws._cells), formulas, styled
+
+
+@dataclass
+class StageRecord:
+    """一个阶段的记录；sheet 不为空时附带该工作表的单元格统计"""
+    name: str
+    seconds: float
+    sheet: str = None
+    cells: int = None
+    formulas: int = None
+    styled: int = None
+    charts: int = None
+    rss_peak_mb: float = None
+    traced_peak_mb: float = None
+    sections: dict = field(default_factory=dict)
+
+
+class Profiler:
+    """
+    收集一次生成的各阶段记录
+
+    cprofile=True 时整个运行过程开启 cProfile；trace_memory=True 时用 tracemalloc
+    记录每个阶段内的Python内存分配峰值
+    """
+
+    enabled = True
+
+    def __init__(self, cprofile=False, trace_memory=False):
+        self.stages = []
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self.trace_memory = trace_memory
+        self._start = None
+        self._elapsed = 0.0
+        self._current = None
+        self._started_tracing = False
+
+    def start(self):
+        global _active
+        _active = self
+        # 调用方已开启 tracemalloc 时沿用，结束时也不关闭（保留调用方的跟踪和快照）
+        self._started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        if self.cprofile:
+            self.cprofile.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        global _active
+        self._elapsed += time.perf_counter() - self._start
+        if self.cprofile:
+            self.cprofile.disable()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        _active = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextmanager
+    def stage(self, name, wb=None, sheet=None):
+        """计时一个阶段；给出 wb 和 sheet 时阶段结束后统计该工作表"""
+        record = StageRecord(name, 0.0, sheet)
+        outer, self._current = self._current, record
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = round(time.perf_counter() - start, 4)
+            self._current = outer
+            if self.trace_memory:
+                record.traced_peak_mb = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+            record.rss_peak_mb = _rss_peak_mb()
+            if wb is not None and sheet in wb.sheetnames:
+                ws = wb[sheet]
+                record.cells, record.formulas, record.styled = count_cells(ws)
+                record.charts = len(ws._charts)
+            self.stages.append(record)
+
+    def add_section(self, name, seconds):
+        """把阶段内某类操作（如图表构建）的耗时累加到当前阶段"""
+        if self._current is not None:
+            self._current.sections[name] = round(self._current.sections.get(name, 0.0) + seconds, 4)
+
+    # --------------------------------------------------------
+    # 报告
+    # --------------------------------------------------------
+    def profile_stats(self, top=TOP_FUNCTIONS):
+        """cProfile 结果：按类别汇总的自身耗时，以及累计耗时最多的函数"""
+        if not self.cprofile:
+            return None
+        stats = pstats.Stats(self.cprofile)
+        categories = {}
+        functions = []
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            category = next((name for name, keys in PROFILE_CATEGORIES
+                             if any(key in filename for key in keys)), "其他")
+            categories[category] = categories.get(category, 0.0) + tottime
+            functions.append({"函数": f"{os.path.basename(filename)}:{line}({func})", "调用次数": calls,
+                              "自身耗时": round(tottime, 4), "累计耗时": round(cumtime, 4)})
+        functions.sort(key=lambda f: f["累计耗时"], reverse=True)
+        return {"categories": {k: round(v, 4) for k, v in
+                               sorted(categories.items(), key=lambda kv: kv[1], reverse=True)},
+                "top_functions": functions[:top]}
+
+    def to_dict(self):
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "total_seconds": round(self._elapsed, 4),
+            "rss_peak_mb": _rss_peak_mb(),
+            "stages": [asdict(s) for s in self.stages],
+            "profile": self.profile_stats(),
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+        return path
+
+    def dump_stats(self, path):
+        """保存 cProfile 原始数据（可用 snakeviz / pstats 查看）"""
+        if self.cprofile:
+            self.cprofile.dump_stats(path)
+        return path
+
+    def summary_lines(self):
+        """各阶段耗时表"""
+        total = self._elapsed or sum(s.seconds for s in self.stages) or 1.0
+        lines = [f"{'阶段':<16}{'耗时(s)':>9}{'占比':>7}{'单元格':>9}{'公式':>8}{'带样式':>9}{'内存峰值(MB)':>13}"]
+        for s in self.stages:
+            peak = s.traced_peak_mb if s.traced_peak_mb is not None else s.rss_peak_mb
+            lines.append(f"{s.name:<16}{s.seconds:>10.3f}{s.seconds / total:>8.1%}"
+                         + "".join(f"{v:>10,}" if v is not None else f"{'':>10}"
+                                   for v in (s.cells, s.formulas, s.styled))
+                         + (f"{peak:>12.1f}" if peak is not None else ""))
+            for name, seconds in s.sections.items():
+                lines.append(f"  └ {name:<12}{seconds:>10.3f}")
+        lines.append(f"{'合计':<16}{total:>10.3f}")
+        stats = self.profile_stats()
+        if stats:
+            lines.append("cProfile 自身耗时按类别: " + "，".join(
+                f"{k} {v:.2f}s" for k, v in stats["categories"].items()))
+        return lines
+
+
+class _DisabledProfiler:
+    """未开启剖析时使用：各方法均为空操作"""
+
+    enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def stage(self, name, wb=None, sheet=None):
+        return nullcontext()
+
+    def add_section(self, name, seconds):
+        pass
+
+
+DISABLED = _DisabledProfiler()
+
+
+@contextmanager
+def section(name):
+    """累计阶段内某类操作的耗时（例如 abc_sheets 中的图表构建）；未开启剖析时不计时"""
+    if _active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _active.add_section(name, time.perf_counter() - start)
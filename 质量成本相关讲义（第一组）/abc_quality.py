@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 质量成本(COQ)
+把作业和制造费用科目映射到 预防/检验/内部失败/外部失败 四类质量成本，
+预防和检验成本随ABC分配结果落到产品，失败成本由各产品不良率、返工率、
+外部损失率（向量，可带情景维度）计算；全部产品、全部情景一次批量算出
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from abc_data import SCHEMAS, DataValidationError, index_of
+
+CATEGORIES = ("预防成本", "检验成本", "内部失败成本", "外部失败成本")
+SOURCE_ACTIVITY = "作业"
+SOURCE_ACCOUNT = "科目"
+# 返工一件的成本占该件加工成本（直接人工 + ABC制造费用）的比例
+REWORK_COST_RATIO = 0.5
+
+
+@dataclass
+class QualityCostResult:
+    """
+    质量成本结果：unit_costs 为 (..., P, 4) 单位质量成本，最后一维按 CATEGORIES 排列；
+    无情景维度时为 (P, 4)，情景扫描时为 (S, P, 4)
+    """
+    product_ids: list
+    quantities: np.ndarray
+    unit_costs: np.ndarray
+    product_unit_costs: np.ndarray   # (P,) ABC单位成本（计算占比用）
+    defect_rates: np.ndarray
+    rework_rates: np.ndarray
+    external_rates: np.ndarray
+
+    @property
+    def per_unit(self):
+        """(..., P) 单位质量成本合计"""
+        return self.unit_costs.sum(axis=-1)
+
+    @property
+    def amounts(self):
+        """(..., P, 4) 质量成本金额 = 单位质量成本 × 产量"""
+        return self.unit_costs * self.quantities[:, None]
+
+    @property
+    def category_totals(self):
+        """(..., 4) 各类质量成本合计"""
+        return self.amounts.sum(axis=-2)
+
+    @property
+    def cost_shares(self):
+        """(..., P) 单位质量成本占ABC单位成本的比例"""
+        base = self.product_unit_costs
+        return np.divide(self.per_unit, base, out=np.zeros_like(self.per_unit), where=base != 0)
+
+
+@dataclass
+class QualityBase:
+    """与不良率无关的部分（可重复用于情景扫描）"""
+    product_ids: list
+    quantities: np.ndarray
+    conformance: np.ndarray          # (P, 4) 映射到各类别的作业/科目成本，按件分摊
+    product_unit_costs: np.ndarray   # (P,) ABC单位成本：报废一件损失的成本
+    rework_unit_costs: np.ndarray    # (P,) 返工一件的成本
+    unit_prices: np.ndarray          # (P,) 外部损失按售价计
+    defect_rates: np.ndarray
+    rework_rates: np.ndarray
+    external_rates: np.ndarray
+
+
+def category_matrix(source_ids, mapping, source_type):
+    """来源 × 类别 比例矩阵（只取 来源类型 == source_type 的映射行）"""
+    matrix = np.zeros((len(source_ids), len(CATEGORIES)))
+    if mapping is None:
+        return matrix
+    file_name = SCHEMAS["quality_map"].file_name
+    unknown = sorted(set(mapping["来源类型"].tolist()) - {SOURCE_ACTIVITY, SOURCE_ACCOUNT})
+    if unknown:
+        raise DataValidationError(f"{file_name} 来源类型只能是 作业/科目: {unknown}")
+    bad = sorted(set(mapping["质量成本类别"].tolist()) - set(CATEGORIES))
+    if bad:
+        raise DataValidationError(f"{file_name} 未知的质量成本类别: {bad}")
+    rows = mapping["来源类型"] == source_type
+    if not rows.any():
+        return matrix
+    src = index_of(np.asarray(source_ids), mapping["来源编号"][rows], f"{file_name} 来源编号")
+    cat = np.array([CATEGORIES.index(c) for c in mapping["质量成本类别"][rows].tolist()])
+    np.add.at(matrix, (src, cat), mapping["比例"][rows])
+    over = matrix.sum(axis=1) > 1 + 1e-9
+    if over.any():
+        raise DataValidationError(
+            f"{file_name} 比例合计超过1: {np.asarray(source_ids)[over][:5].tolist()}")
+    return matrix
+
+
+def quality_base(model, dataset, rework_cost_ratio=REWORK_COST_RATIO):
+    """由 compute_model() 的结果和数据集构造质量成本基础数据"""
+    result = model["abc_result"]
+    quantities = np.array([prod[4] for prod in model["products"]], dtype=float)
+    per_unit = np.divide(1.0, quantities, out=np.zeros_like(quantities), where=quantities != 0)
+
+    # 作业类：按ABC分配结果（产品 × 作业金额）汇总到类别
+    act_matrix = category_matrix(result.activity_ids, dataset.quality_map, SOURCE_ACTIVITY)
+    conformance = result.allocation @ act_matrix
+    # 科目类：没有作业动因，按产量比例分摊
+    account_ids = [od[0] for od in model["overhead"]]
+    acc_matrix = category_matrix(account_ids, dataset.quality_map, SOURCE_ACCOUNT)
+    account_pool = np.array([od[2] for od in model["overhead"]], dtype=float) @ acc_matrix
+    if quantities.sum():
+        conformance = conformance + np.outer(quantities / quantities.sum(), account_pool)
+    conformance = conformance * per_unit[:, None]
+
+    labor = np.array([dc[2] for dc in model["direct_costs"]], dtype=float)
+    rework_unit_costs = rework_cost_ratio * (labor + result.overhead) * per_unit
+
+    rates = dataset.quality_rates
+    n = len(quantities)
+    return QualityBase(
+        product_ids=list(result.product_ids),
+        quantities=quantities,
+        conformance=conformance,
+        product_unit_costs=result.unit_costs,
+        rework_unit_costs=rework_unit_costs,
+        unit_prices=result.unit_prices,
+        defect_rates=rates["不良率"] if rates is not None else np.zeros(n),
+        rework_rates=rates["返工率"] if rates is not None else np.zeros(n),
+        external_rates=rates["外部损失率"] if rates is not None else np.zeros(n),
+    )
+
+
+def quality_costs(base, defect_rates=None, rework_rates=None, external_rates=None):
+    """
+    计算单位质量成本
+
+    各比率为 (P,) 或 (S, P)（S 个情景），缺省取基础数据中的值；
+    内部失败 = 不良率 × ABC单位成本 + 返工率 × 单位返工成本，外部失败 = 外部损失率 × 售价
+    """
+    defect = np.asarray(base.defect_rates if defect_rates is None else defect_rates, dtype=float)
+    rework = np.asarray(base.rework_rates if rework_rates is None else rework_rates, dtype=float)
+    external = np.asarray(base.external_rates if external_rates is None else external_rates, dtype=float)
+    defect, rework, external = np.broadcast_arrays(defect, rework, external)
+
+    internal = defect * base.product_unit_costs + rework * base.rework_unit_costs
+    external_cost = external * base.unit_prices
+    unit_costs = np.empty(internal.shape + (len(CATEGORIES),))
+    unit_costs[..., :2] = base.conformance[..., :2]
+    unit_costs[..., 2] = base.conformance[:, 2] + internal
+    unit_costs[..., 3] = base.conformance[:, 3] + external_cost
+    return QualityCostResult(
+        product_ids=base.product_ids,
+        quantities=base.quantities,
+        unit_costs=unit_costs,
+        product_unit_costs=base.product_unit_costs,
+        defect_rates=defect,
+        rework_rates=rework,
+        external_rates=external,
+    )
+
+
+def sweep_defect_rates(base, factors):
+    """不良率和返工率同时乘以 factors 中各系数的情景扫描，返回 (S, P, 4) 结果"""
+    factors = np.asarray(factors, dtype=float)[:, None]
+    return quality_costs(base, factors * base.defect_rates, factors * base.rework_rates)
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 输入核对
+在生成任何工作表之前核对输入数据之间的勾稽关系：作业成本合计 = 制造费用总额、
+成本动因表与作业清单的作业成本一致、工时和批量与产量一致、动因量与产品工时/产量/批次数一致、
+分配出去的制造费用全额吸收制造费用总额、TDABC资源池成本合计 = 制造费用总额；
+提供 数据_成本对比核心数据.csv 时另把按输入算出的传统/ABC单位成本与表中参考值核对（提示级）。
+全部检查为带容差的向量化比较，结果汇总为可写成JSON的核对报告
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+
+from abc_data import SCHEMAS, index_of
+from abc_engine import allocate, driver_rates, traditional_allocate
+
+REL_TOL = 1e-6
+ABS_TOL = 0.01
+MAX_DETAILS = 20
+# 成本对比表中的单位成本保留两位小数
+COMPARISON_ATOL = 0.01
+ERROR = "error"
+WARNING = "warning"
+
+# 动因与产品属性的对应：(动因名称关键字, 作业层级, 表, 列, 允许固定倍数)；
+# 按顺序取第一条匹配的规则，关键字/层级为 None 表示不限；
+# 允许固定倍数时各产品动因量与属性成同一比例即可（如每批搬运2次）
+DRIVER_BASES = (
+    ("机器小时", None, "workhours", "季度总机时", False),
+    ("产量", None, "products", "季度产量", False),
+    ("件数", None, "products", "季度产量", False),
+    (None, "批次级", "products", "批次数", True),
+)
+
+
+@dataclass
+class Check:
+    """一项核对：expected/actual 为合计口径，failures 列出前 MAX_DETAILS 条不符的明细"""
+    name: str
+    description: str
+    severity: str
+    passed: bool
+    expected: float
+    actual: float
+    max_diff: float
+    n_checked: int
+    n_failed: int
+    failures: list = field(default_factory=list)
+
+
+@dataclass
+class ReconciliationReport:
+    """核对报告：passed 表示没有 error 级别的不符"""
+    checks: list
+    rtol: float = REL_TOL
+    atol: float = ABS_TOL
+
+    @property
+    def errors(self):
+        return [c for c in self.checks if not c.passed and c.severity == ERROR]
+
+    @property
+    def warnings(self):
+        return [c for c in self.checks if not c.passed and c.severity == WARNING]
+
+    @property
+    def passed(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {"passed": self.passed, "errors": len(self.errors), "warnings": len(self.warnings),
+                "tolerance": {"rtol": self.rtol, "atol": self.atol},
+                "checks": [asdict(c) for c in self.checks]}
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+        return path
+
+    def summary_lines(self):
+        """不符项的一行说明（error 在前）"""
+        lines = []
+        for check in self.errors + self.warnings:
+            level = "错误" if check.severity == ERROR else "提示"
+            lines.append(f"[{level}] {check.description}: 期望 {check.expected:,.2f}，实际 {check.actual:,.2f}"
+                         f"（{check.n_failed}/{check.n_checked} 项不符）")
+        return lines
+
+
+def compare(name, description, ids, expected, actual, severity=ERROR, rtol=REL_TOL, atol=ABS_TOL):
+    """逐项比较 actual 与 expected（atol 可为与明细等长的数组；ids 可为按位置取编号的函数）"""
+    expected = np.atleast_1d(np.asarray(expected, dtype=float))
+    actual = np.atleast_1d(np.asarray(actual, dtype=float))
+    ok = np.isclose(actual, expected, rtol=rtol, atol=atol)
+    diff = actual - expected
+    bad = np.flatnonzero(~ok)
+    label = ids if callable(ids) else np.asarray(ids).__getitem__
+    return Check(
+        name=name, description=description, severity=severity, passed=not len(bad),
+        expected=float(expected.sum()), actual=float(actual.sum()),
+        max_diff=float(np.abs(diff).max()) if len(diff) else 0.0,
+        n_checked=len(ok), n_failed=len(bad),
+        failures=[{"编号": str(label(i)), "期望": float(expected[i]), "实际": float(actual[i]),
+                   "差异": float(diff[i])} for i in bad[:MAX_DETAILS]],
+    )
+
+
+def _driver_base_checks(dataset, consumption, rtol, atol):
+    """动因量与产品属性（机时/产量/批次数）逐产品核对"""
+    names = dataset.cost_drivers["成本动因"]
+    levels = dataset.activities["作业层级"]
+    assigned = np.zeros(len(names), dtype=bool)
+    checks = []
+    for keyword, level, table, column, scaled in DRIVER_BASES:
+        mask = ~assigned
+        if keyword is not None:
+            mask &= np.char.find(names.astype(str), keyword) >= 0
+        if level is not None:
+            mask &= levels == level
+        assigned |= mask
+        if not mask.any():
+            continue
+        base = getattr(dataset, table)[column].astype(float)
+        used = consumption[:, mask]
+        if scaled:
+            # 每个作业一个倍数：动因量合计 / 属性合计
+            factor = np.divide(used.sum(axis=0), base.sum(), out=np.ones(mask.sum()), where=base.sum() != 0)
+        else:
+            factor = np.ones(mask.sum())
+        expected = base[:, None] * factor
+        activities = dataset.activity_ids[mask]
+
+        def ids(i, activities=activities, n=len(activities)):
+            # 明细按 产品 × 作业 展开，只在列出不符项时拼编号
+            return f"{activities[i % n]}/{dataset.product_ids[i // n]}"
+
+        label = f"{SCHEMAS[table].file_name} {column}" + ("（按固定倍数）" if scaled else "")
+        checks.append(compare(f"driver_base_{keyword or level}", f"动因消耗量与{label}一致",
+                              ids, expected.ravel(), used.ravel(), ERROR, rtol, atol))
+    return checks
+
+
+def _comparison_checks(dataset, consumption, rtol, atol):
+    """按产品型号把算出的传统/ABC单位成本与成本对比表的参考值核对（表中没有的产品不核对）"""
+    table = dataset.comparison
+    products = dataset.products
+    models = table["产品型号"]
+    known = np.isin(models, products["产品型号"])
+    if not known.any():
+        return []
+    rows = index_of(products["产品型号"], models[known], f"{SCHEMAS['comparison'].file_name} 产品型号")
+    quantities = products["季度产量"].astype(float)
+    direct = dataset.direct_costs["直接材料"] + dataset.direct_costs["直接人工"]
+    prices = products["单位售价"]
+    trad, _ = traditional_allocate(dataset.overhead["季度发生额"].sum(), quantities, direct, prices)
+    abc = allocate(dataset.activities["作业成本"], consumption, quantities, direct, prices,
+                   dataset.cost_drivers["动因总量"]).unit_costs
+    label = SCHEMAS["comparison"].file_name
+    atol = max(atol, COMPARISON_ATOL)
+    return [
+        compare("comparison_traditional", f"传统方法单位成本与{label}一致", models[known],
+                table["传统方法单位成本"][known], trad[rows], WARNING, rtol, atol),
+        compare("comparison_abc", f"ABC方法单位成本与{label}一致", models[known],
+                table["ABC方法单位成本"][known], abc[rows], WARNING, rtol, atol),
+    ]
+
+
+def reconcile(dataset, rtol=REL_TOL, atol=ABS_TOL):
+    """核对数据集内部的勾稽关系，返回 ReconciliationReport"""
+    products = dataset.products
+    workhours = dataset.workhours
+    product_ids = dataset.product_ids
+    activity_ids = dataset.activity_ids
+    quantities = products["季度产量"].astype(float)
+    activity_costs = dataset.activities["作业成本"]
+    pool = dataset.overhead["季度发生额"].sum()
+
+    checks = [
+        compare("workhours_labor", "季度总人工 = 单件标准工时 × 季度产量", product_ids,
+                workhours["单件标准工时"] * quantities, workhours["季度总人工"], ERROR, rtol, atol),
+        compare("workhours_machine", "季度总机时 = 单件机器小时 × 季度产量", product_ids,
+                workhours["单件机器小时"] * quantities, workhours["季度总机时"], ERROR, rtol, atol),
+        # 平均批量为取整值，允许 批次数 × 0.5 件的误差
+        compare("product_batches", "平均批量 × 批次数 = 季度产量", product_ids, quantities,
+                products["平均批量"] * products["批次数"].astype(float), WARNING, rtol,
+                np.maximum(products["批次数"] * 0.5, atol)),
+        compare("driver_costs", "成本动因表与作业清单的作业成本一致", activity_ids,
+                activity_costs, dataset.cost_drivers["作业成本"], ERROR, rtol, atol),
+        compare("activity_pool", "作业成本合计 = 制造费用总额", ["合计"],
+                pool, activity_costs.sum(), ERROR, rtol, atol),
+    ]
+
+    # 动因消耗：产品 × 作业 矩阵，列合计为各作业的实际动因量
+    consumption = dataset.consumption_matrix()
+    used = consumption.sum(axis=0)
+    driver_totals = dataset.cost_drivers["动因总量"]
+    checks.append(compare("driver_totals", "动因总量 = 各产品动因消耗量之和", activity_ids,
+                          driver_totals, used, WARNING, rtol, atol))
+    checks += _driver_base_checks(dataset, consumption, rtol, atol)
+
+    # 吸收：分配率 × 实际消耗 = 分配出去的制造费用
+    allocated = driver_rates(activity_costs, driver_totals) * used
+    checks.append(compare("absorption_activities", "各作业成本全额分配到产品", activity_ids,
+                          activity_costs, allocated, WARNING, rtol, atol))
+    checks.append(compare("absorption_pool", "分配到产品的制造费用 = 制造费用总额", ["合计"],
+                          pool, allocated.sum(), ERROR, rtol, atol))
+    if dataset.capacity_pools is not None:
+        checks.append(compare("capacity_pools", "TDABC资源池成本合计 = 制造费用总额", ["合计"],
+                              pool, dataset.capacity_pools["季度成本"].sum(), WARNING, rtol, atol))
+    if dataset.comparison is not None:
+        checks += _comparison_checks(dataset, consumption, rtol, atol)
+    return ReconciliationReport(checks, rtol, atol)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 资源到作业的第一阶段分配
+按资源动因（面积、人数、耗电量、机器小时等）把制造费用科目分配到作业和辅助部门，
+辅助部门之间的相互服务按交互分配法一次解线性方程组得到，
+结果作为作业成本进入第二阶段（作业 -> 产品）
+
+资源动因为长表（来源编号,对象编号,资源动因,动因量），以稀疏矩阵存储；
+安装 scipy 时用 scipy.sparse，否则退回 numpy 稠密矩阵
+"""
+
+import warnings
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from abc_data import SCHEMAS, DataValidationError, Table, index_of
+
+try:
+    from scipy import sparse
+    from scipy.sparse.linalg import spsolve
+except ImportError:  # 没有 scipy 时用稠密矩阵
+    sparse = None
+
+
+@dataclass
+class ResourceAllocation:
+    """第一阶段分配结果：shares 为 (来源数, 对象数) 分配比例矩阵，来源 = 科目 + 辅助部门，对象 = 辅助部门 + 作业"""
+    resource_ids: list
+    service_ids: list
+    activity_ids: list
+    resource_costs: np.ndarray   # (R,) 科目发生额
+    service_direct: np.ndarray   # (S,) 辅助部门直接归集的科目费用
+    service_totals: np.ndarray   # (S,) 交互分配后辅助部门待分配总额
+    activity_direct: np.ndarray  # (A,) 作业直接归集的科目费用
+    activity_costs: np.ndarray   # (A,) 作业成本（含辅助部门转入）
+    shares: object
+
+    @property
+    def unallocated(self):
+        """没有资源动因记录、未分配出去的科目金额 (R,)"""
+        allocated = np.asarray(self.shares[:len(self.resource_ids)].sum(axis=1)).ravel()
+        return self.resource_costs * (1 - allocated)
+
+    @property
+    def service_transfers(self):
+        """各作业从辅助部门转入的金额 (A,)"""
+        return self.activity_costs - self.activity_direct
+
+
+def share_matrix(sources, targets, quantities, n_sources, n_targets):
+    """
+    由长表构造分配比例矩阵：每个来源按动因量占该来源动因量合计的比例分配到对象
+
+    同一 (来源, 对象) 的多条记录累加；没有记录或动因量合计为0的来源整行为0
+    """
+    quantities = np.asarray(quantities, dtype=float)
+    totals = np.bincount(sources, quantities, minlength=n_sources)
+    weights = np.divide(quantities, totals[sources],
+                        out=np.zeros_like(quantities), where=totals[sources] != 0)
+    if sparse is not None:
+        return sparse.csr_matrix((weights, (sources, targets)), shape=(n_sources, n_targets))
+    matrix = np.zeros((n_sources, n_targets))
+    np.add.at(matrix, (sources, targets), weights)
+    return matrix
+
+
+def solve_reciprocal(service_shares, service_direct):
+    """
+    交互分配法：辅助部门待分配总额 T 满足 T = 直接费用 + W_SS^T · T，
+    即解 (I - W_SS^T) T = 直接费用；辅助部门之间全部互相分配、没有流出时方程组奇异
+    """
+    n = len(service_direct)
+    if n == 0:
+        return np.zeros(0)
+    if sparse is not None and sparse.issparse(service_shares):
+        system = (sparse.identity(n, format="csc") - service_shares.T.tocsc())
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # 奇异矩阵时 spsolve 只发警告并返回 nan
+            totals = spsolve(system, service_direct)
+        totals = np.atleast_1d(totals)
+        if not np.all(np.isfinite(totals)):
+            raise DataValidationError("辅助部门之间的分配形成闭环（没有分配到作业），无法求解")
+        return totals
+    try:
+        return np.linalg.solve(np.eye(n) - np.asarray(service_shares).T, service_direct)
+    except np.linalg.LinAlgError:
+        raise DataValidationError("辅助部门之间的分配形成闭环（没有分配到作业），无法求解") from None
+
+
+def allocate_resources(resource_costs, source_idx, target_idx, quantities, n_services, n_activities,
+                       resource_ids=None, service_ids=None, activity_ids=None):
+    """
+    第一阶段分配
+
+    来源序号：0..R-1 为科目，R..R+S-1 为辅助部门；
+    对象序号：0..S-1 为辅助部门，S..S+A-1 为作业
+    """
+    resource_costs = np.asarray(resource_costs, dtype=float)
+    n_res = len(resource_costs)
+    shares = share_matrix(source_idx, target_idx, quantities,
+                          n_res + n_services, n_services + n_activities)
+
+    direct = np.asarray(shares[:n_res].T @ resource_costs).ravel()
+    service_totals = solve_reciprocal(shares[n_res:, :n_services], direct[:n_services])
+    transfers = np.asarray(shares[n_res:, n_services:].T @ service_totals).ravel()
+
+    return ResourceAllocation(
+        resource_ids=list(resource_ids) if resource_ids is not None else list(range(n_res)),
+        service_ids=list(service_ids) if service_ids is not None else list(range(n_services)),
+        activity_ids=list(activity_ids) if activity_ids is not None else list(range(n_activities)),
+        resource_costs=resource_costs,
+        service_direct=direct[:n_services],
+        service_totals=service_totals,
+        activity_direct=direct[n_services:],
+        activity_costs=direct[n_services:] + transfers,
+        shares=shares,
+    )
+
+
+def resource_allocation(dataset):
+    """按数据集中的 数据_资源动因.csv / 数据_辅助部门.csv 做第一阶段分配"""
+    drivers = dataset.resource_drivers
+    if drivers is None:
+        raise DataValidationError(f"找不到输入文件: {SCHEMAS['resource_drivers'].file_name}")
+    file_name = SCHEMAS["resource_drivers"].file_name
+    resource_ids = dataset.overhead["费用编号"]
+    activity_ids = dataset.activity_ids
+    if dataset.service_departments is not None:
+        service_ids = dataset.service_departments["部门编号"]
+    else:
+        service_ids = np.array([], dtype=str)
+    clash = np.intersect1d(service_ids, np.concatenate([resource_ids, activity_ids]))
+    if len(clash):
+        raise DataValidationError(
+            f"{SCHEMAS['service_departments'].file_name} 部门编号与费用编号/作业编号重复: {clash[:5].tolist()}")
+
+    # 来源 = 费用科目 + 辅助部门，对象 = 辅助部门 + 作业
+    source_idx = index_of(np.concatenate([resource_ids, service_ids]), drivers["来源编号"],
+                          f"{file_name} 来源编号")
+    target_idx = index_of(np.concatenate([service_ids, activity_ids]), drivers["对象编号"],
+                          f"{file_name} 对象编号")
+    return allocate_resources(
+        dataset.overhead["季度发生额"], source_idx, target_idx, drivers["动因量"],
+        len(service_ids), len(activity_ids),
+        resource_ids=resource_ids.tolist(), service_ids=service_ids.tolist(),
+        activity_ids=activity_ids.tolist())
+
+
+def with_activity_costs(dataset, activity_costs):
+    """返回作业成本替换为 activity_costs 的数据集副本（作业清单和成本动因表同时替换），供第二阶段使用"""
+    activity_costs = np.asarray(activity_costs, dtype=float)
+
+    def patched(table):
+        return Table(table.name, {**table.columns, "作业成本": activity_costs})
+
+    return replace(dataset, activities=patched(dataset.activities),
+                   cost_drivers=patched(dataset.cost_drivers))
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 回传工作簿重算
+计划员在工作簿的浅黄色输入区修改数据后回传，本模块以只读流式模式打开工作簿，
+只读取输入区（产品信息、工时、直接成本、制造费用、作业清单、成本动因及各产品动因消耗量），
+按工作簿级名称确认各表格的位置后重建 ABCDataset，交给 compute_model() 在 Python 中重算全部派生数值；
+再与基准数据比较，列出输入区的修改和重算后单位成本、毛利率的变化
+
+加入工作簿级名称之前生成的工作簿（如仓库中的演示版）没有名称，按旧的固定版式读取：
+各表从表头下一行起到 "合计" 行为止，成本动因表下方没有动因消耗表，沿用基准数据的消耗量
+
+只读模式按行流式解析工作表XML，每张工作表只扫描一遍，不加载样式、图表和公式单元格，
+单个文件的内存占用与输入区大小成正比
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import openpyxl
+
+from abc_data import (SCHEMAS, ABCDataset, DataValidationError, Table, _align, _convert,
+                      index_of)
+from abc_layout import Block, WorkbookLayout
+
+# 由这些名称指向的数据行数确定产品数、制造费用科目数和作业数
+DIMENSION_NAMES = ("产品_产量", "制造费用_发生额", "作业_成本")
+# 旧版式（无名称）：由这些区域A列的数据行数确定产品数、制造费用科目数和作业数
+LEGACY_DIMENSION_BLOCKS = ("products", "overhead", "activities")
+LEGACY_TOTAL = "合计"
+# 核对名称位置的输入区域（与 abc_layout.NAMES 对应）
+INPUT_BLOCKS = ("products", "workhours", "direct_costs", "overhead", "activities", "drivers")
+
+# 输入表 -> (布局区域, 各列所在的列字母（与 SCHEMAS 列顺序一致）, 显示名称)；
+# 公式列（直接成本合计、占比、分配率等）不读取，重算时由输入推出
+ZONES = {
+    "products": ("products", "ABCDEFGHI", "产品信息"),
+    "workhours": ("workhours", "ABCDE", "产品工时"),
+    "direct_costs": ("direct_costs", "ABC", "直接成本"),
+    "overhead": ("overhead", "ABCE", "制造费用"),
+    "activities": ("activities", "ABCDE", "作业清单"),
+    "cost_drivers": ("drivers", "ABCDEG", "成本动因"),
+}
+CONSUMPTION_LABEL = "动因消耗"
+RESULTS_LABEL = "重算结果"
+
+# "说明" 工作表第7、8行的C列为车间和核算期间
+INTRO_BLOCK = Block("说明", 6, 2, 3)
+
+# 重算结果对比：(字段, compute_model() 结果中的键)
+RESULT_FIELDS = (
+    ("ABC单位成本", "abc_costs"),
+    ("传统单位成本", "traditional_costs"),
+    ("ABC毛利率", "abc_margins"),
+    ("传统毛利率", "trad_margins"),
+)
+
+DIFF_COLUMNS = ["文件", "区域", "编号", "字段", "原值", "新值", "差异"]
+ADDED = "(新增)"
+REMOVED = "(删除)"
+
+_ROWS_PATTERN = re.compile(r"!\$([A-Z]+)\$(\d+)(?::\$([A-Z]+)\$(\d+))?$")
+
+
+@dataclass
+class ReturnedWorkbook:
+    """一个回传工作簿：输入区重建的数据集及 "说明" 中的车间和核算期间"""
+    path: str
+    dataset: ABCDataset
+    workshop: str = None
+    period: str = None
+    notes: list = field(default_factory=list)
+
+    @property
+    def file_name(self):
+        return os.path.basename(self.path)
+
+
+# ============================================================
+# 读取输入区
+# ============================================================
+def _defined_ref(wb, name, file_name):
+    defined = wb.defined_names.get(name)
+    if defined is None:
+        raise DataValidationError(f"{file_name} 缺少名称 {name}，不是本模型生成的工作簿")
+    return defined.attr_text
+
+
+def read_layout(wb, file_name):
+    """
+    按名称确定产品数、费用科目数、作业数，并核对各输入区域的名称位置
+
+    计划员在输入区中间插入或删除行时Excel会同步调整名称，但下方各表不会随之移动，
+    此时名称与按规模推算的布局不一致，报错而不是读错行
+    """
+    counts = []
+    for name in DIMENSION_NAMES:
+        ref = _defined_ref(wb, name, file_name)
+        match = _ROWS_PATTERN.search(ref)
+        if match is None:
+            raise DataValidationError(f"{file_name} 名称 {name} 的引用无法识别: {ref}")
+        first, last = int(match.group(2)), int(match.group(4) or match.group(2))
+        counts.append(last - first + 1)
+    layout = WorkbookLayout(*counts)
+    for block_name in INPUT_BLOCKS:
+        for name, expected in layout.names(block_name).items():
+            actual = _defined_ref(wb, name, file_name)
+            if actual != expected:
+                raise DataValidationError(
+                    f"{file_name} 工作簿结构已变化：名称 {name} 指向 {actual}，按表格规模应为 {expected}"
+                    "（请勿在输入区插入或删除行，增减产品/作业请修改CSV后重新生成）")
+    return layout
+
+
+def _key_column(ws, first_row):
+    """旧版式：从 first_row 起读取A列，直到空单元格或 "合计" 行"""
+    keys = []
+    for (value,) in ws.iter_rows(min_row=first_row, max_col=1, values_only=True):
+        value = _text(value)
+        if not value or value == LEGACY_TOTAL:
+            break
+        keys.append(value)
+    return keys
+
+
+def read_legacy_layout(wb, file_name):
+    """
+    没有工作簿级名称的旧版工作簿：按A列的数据行数推算布局，并核对各输入区域的表头
+
+    旧版式与 WorkbookLayout 推算的位置一致（产品信息表第3行起，工时表、直接成本表依次在下方，
+    制造费用、作业清单、成本动因各自从第3行起），只是没有名称和动因消耗表
+    """
+    base = WorkbookLayout(1, 1, 1)
+    counts = []
+    for block_name in LEGACY_DIMENSION_BLOCKS:
+        block = base.block(block_name)
+        if block.sheet not in wb.sheetnames:
+            raise DataValidationError(f"{file_name} 缺少工作表 {block.sheet}，不是本模型生成的工作簿")
+        counts.append(len(_key_column(wb[block.sheet], block.first_row)))
+    if 0 in counts:
+        raise DataValidationError(f"{file_name} 没有名称且按旧版式读不到数据行，不是本模型生成的工作簿")
+    layout = WorkbookLayout(*counts)
+    for name, (block_name, _, label) in ZONES.items():
+        block = layout.block(block_name)
+        if block.sheet not in wb.sheetnames:
+            raise DataValidationError(f"{file_name} 缺少工作表 {block.sheet}")
+        header = next(wb[block.sheet].iter_rows(min_row=block.header_row, max_row=block.header_row,
+                                                max_col=1, values_only=True), (None,))
+        if _text(header[0]) != SCHEMAS[name].key:
+            raise DataValidationError(
+                f"{file_name} 旧版式{label}表的表头应在 {block.sheet} 第{block.header_row}行，"
+                f"实际为 {header[0]!r}（请勿在输入区插入或删除行）")
+    return layout
+
+
+def _text(value):
+    """单元格值转为 _convert() 接受的文本（整数值的浮点数不带小数点）"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _rows_by_block(ws, blocks, max_col):
+    """
+    一次扫描工作表，按区域收集数据行（值）
+
+    只读工作表每次 iter_rows 都从头解析XML，同一工作表的多个区域合并为一次扫描
+    """
+    collected = {name: [] for name in blocks}
+    first = min(block.first_row for block in blocks.values())
+    last = max(block.last_row for block in blocks.values())
+    for row_idx, row in enumerate(ws.iter_rows(min_row=first, max_row=last, max_col=max_col,
+                                               values_only=True), first):
+        for name, block in blocks.items():
+            if block.first_row <= row_idx <= block.last_row:
+                collected[name].append(row)
+    # 只读模式会省略行尾的空单元格，缺少的行按空行补齐
+    for name, block in blocks.items():
+        rows = collected[name]
+        rows += [()] * (block.n_rows - len(rows))
+    return collected
+
+
+def _table(name, rows, block, source):
+    """按 ZONES 中的列位置把输入区各行转换为 Table，并做主键校验"""
+    _, letters, _ = ZONES[name]
+    schema = SCHEMAS[name]
+    columns = {}
+    for column, letter in zip(schema.columns, letters):
+        pos = ord(letter) - ord("A")
+        values = [_text(row[pos]) if pos < len(row) else "" for row in rows]
+        columns[column.name] = _convert(values, column, f"{source} {block.sheet}", block.first_row)
+    keys = columns[schema.key]
+    if (np.char.str_len(keys) == 0).any():
+        row = block.first_row + int(np.argmax(np.char.str_len(keys) == 0))
+        raise DataValidationError(f"{source} {block.sheet} 第{row}行 {schema.key} 为空")
+    unique, counts = np.unique(keys, return_counts=True)
+    if (counts > 1).any():
+        raise DataValidationError(f"{source} {block.sheet} {schema.key} 重复: {unique[counts > 1][:5].tolist()}")
+    return Table(name, columns)
+
+
+def _consumption(rows, header, block, product_ids, source):
+    """动因消耗矩阵（行为作业、列为产品）展开为 产品编号/作业编号/消耗量 长表"""
+    n_products = len(product_ids)
+    names = np.array([_text(v) for v in header[2:2 + n_products]] + [""] * (n_products - len(header[2:])),
+                     dtype=str)
+    if not np.array_equal(names, product_ids):
+        raise DataValidationError(f"{source} {block.sheet} 第{block.header_row}行 动因消耗表的产品列"
+                                  f"与产品信息表不一致: {names.tolist()[:5]}")
+    column = SCHEMAS["consumption"].columns[2]
+    activity_ids = np.array([_text(row[0]) if row else "" for row in rows], dtype=str)
+    values = [[_text(row[2 + p]) if 2 + p < len(row) else "" for p in range(n_products)] for row in rows]
+    matrix = np.vstack([_convert(v, column, f"{source} {block.sheet}", block.first_row + i)
+                        for i, v in enumerate(values)]) if values else np.zeros((0, n_products))
+    return Table("consumption", {
+        "产品编号": np.tile(product_ids, len(activity_ids)),
+        "作业编号": np.repeat(activity_ids, n_products),
+        "消耗量": matrix.ravel(),
+    })
+
+
+def read_workbook(path, base=None):
+    """
+    以只读模式读取回传工作簿的输入区，返回 ReturnedWorkbook
+
+    工作簿不携带质量成本、TDABC、辅助部门等可选输入，base（基准 ABCDataset）不为空时沿用其中的可选表；
+    回传工作簿增减了产品或作业时这些表无法对应，改为不提供并在 notes 中说明
+    """
+    source = os.path.basename(path)
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        legacy = wb.defined_names.get(DIMENSION_NAMES[0]) is None
+        layout = read_legacy_layout(wb, source) if legacy else read_layout(wb, source)
+        for sheet in (layout.products.sheet, layout.overhead.sheet, layout.activities.sheet,
+                      layout.drivers.sheet):
+            if sheet not in wb.sheetnames:
+                raise DataValidationError(f"{source} 缺少工作表 {sheet}")
+
+        basic = _rows_by_block(wb[layout.products.sheet], {
+            name: layout.block(name) for name in ("products", "workhours", "direct_costs")}, 9)
+        overhead = _rows_by_block(wb[layout.overhead.sheet], {"overhead": layout.overhead}, 5)
+        activities = _rows_by_block(wb[layout.activities.sheet], {"activities": layout.activities}, 5)
+        driver_blocks = {"drivers": layout.drivers}
+        if not legacy:
+            # 动因消耗表的表头行（各产品编号）
+            driver_blocks["header"] = Block(layout.drivers.sheet, layout.consumption.header_row - 1, 1,
+                                            layout.consumption.n_cols)
+            driver_blocks["consumption"] = layout.consumption
+        drivers = _rows_by_block(wb[layout.drivers.sheet], driver_blocks, max(7, layout.n_products + 2))
+
+        intro = [(), ()]
+        if INTRO_BLOCK.sheet in wb.sheetnames:
+            intro = _rows_by_block(wb[INTRO_BLOCK.sheet], {"intro": INTRO_BLOCK}, 3)["intro"]
+        workshop, period = (_text(row[2]) if len(row) > 2 else "" for row in intro)
+    finally:
+        wb.close()
+
+    products = _table("products", basic["products"], layout.products, source)
+    product_ids = products["产品编号"]
+    activities = _table("activities", activities["activities"], layout.activities, source)
+    activity_ids = activities["作业编号"]
+    notes = []
+    if legacy:
+        consumption = _legacy_consumption(base, product_ids, activity_ids, source)
+        notes.append("旧版工作簿（无名称）没有动因消耗表，消耗量沿用基准数据")
+    else:
+        consumption = _consumption(drivers["consumption"], drivers["header"][0],
+                                   layout.consumption, product_ids, source)
+    dataset = ABCDataset(
+        products=products,
+        workhours=_align(_table("workhours", basic["workhours"], layout.workhours, source),
+                         product_ids, "产品编号", f"{source} 产品工时表"),
+        direct_costs=_align(_table("direct_costs", basic["direct_costs"], layout.direct_costs, source),
+                            product_ids, "产品编号", f"{source} 直接成本表"),
+        overhead=_table("overhead", overhead["overhead"], layout.overhead, source),
+        activities=activities,
+        cost_drivers=_align(_table("cost_drivers", drivers["drivers"], layout.drivers, source),
+                            activity_ids, "作业编号", f"{source} 成本动因表"),
+        consumption=consumption,
+    )
+    index_of(activity_ids, dataset.consumption["作业编号"], f"{source} 动因消耗表 作业编号")
+
+    returned = ReturnedWorkbook(path, dataset, workshop or None, period or None, notes)
+    if base is not None:
+        _attach_optional(returned, base)
+    return returned
+
+
+def _legacy_consumption(base, product_ids, activity_ids, source):
+    """旧版工作簿的动因消耗量取自基准数据集，产品和作业须与基准一致"""
+    if base is None:
+        raise DataValidationError(f"{source} 是旧版工作簿（无名称），没有动因消耗表，需要基准数据")
+    if not (np.array_equal(product_ids, base.product_ids) and np.array_equal(activity_ids, base.activity_ids)):
+        raise DataValidationError(f"{source} 是旧版工作簿（无名称），没有动因消耗表，"
+                                  "产品或作业与基准数据不一致时无法重算")
+    return base.consumption
+
+
+def _attach_optional(returned, base):
+    """沿用基准数据集中的可选输入表（产品和作业编号与基准一致时）"""
+    dataset = returned.dataset
+    optional = ("comparison", "service_departments", "resource_drivers", "quality_map", "quality_rates",
+                "capacity_pools", "time_equations")
+    provided = [name for name in optional if getattr(base, name) is not None]
+    if not provided:
+        return
+    if (np.array_equal(dataset.product_ids, base.product_ids)
+            and np.array_equal(dataset.activity_ids, base.activity_ids)):
+        for name in provided:
+            setattr(dataset, name, getattr(base, name))
+    else:
+        returned.notes.append("产品或作业与基准数据不一致，未沿用可选输入: "
+                              + "、".join(SCHEMAS[name].file_name for name in provided))
+
+
+# ============================================================
+# 差异比较
+# ============================================================
+def _number(value):
+    return float(value) if isinstance(value, (int, float, np.number)) else value
+
+
+def _diff_rows(label, base_ids, base_values, new_ids, new_values, fields, atol=1e-9):
+    """
+    按编号比较两组列：{字段: 数组}，返回 [区域, 编号, 字段, 原值, 新值, 差异] 行
+
+    只在一边出现的编号记为新增/删除；数值列在容差内相等的不列出
+    """
+    rows = []
+    common, base_idx, new_idx = np.intersect1d(base_ids, new_ids, assume_unique=True, return_indices=True)
+    for name in fields:
+        old = base_values[name][base_idx]
+        new = new_values[name][new_idx]
+        if old.dtype.kind in "iuf":
+            changed = ~np.isclose(old.astype(float), new.astype(float), rtol=0, atol=atol)
+        else:
+            changed = old != new
+        for k in np.flatnonzero(changed).tolist():
+            a, b = _number(old[k].item()), _number(new[k].item())
+            delta = round(b - a, 6) if isinstance(a, float) and isinstance(b, float) else None
+            rows.append([label, str(common[k]), name, a, b, delta])
+    for key in np.setdiff1d(new_ids, base_ids).tolist():
+        rows.append([label, key, ADDED, None, None, None])
+    for key in np.setdiff1d(base_ids, new_ids).tolist():
+        rows.append([label, key, REMOVED, None, None, None])
+    return rows
+
+
+def diff_inputs(base, edited, atol=1e-9):
+    """输入区相对基准数据集的全部修改（动因消耗按 产品编号/作业编号 逐格比较）"""
+    rows = []
+    for name, (_, _, label) in ZONES.items():
+        schema = SCHEMAS[name]
+        old, new = getattr(base, name), getattr(edited, name)
+        fields = [c.name for c in schema.columns if c.name != schema.key]
+        rows += _diff_rows(label, old[schema.key], old.columns, new[schema.key], new.columns, fields, atol)
+
+    def cells(dataset):
+        matrix = dataset.consumption_matrix()
+        ids = np.char.add(np.char.add(np.repeat(dataset.product_ids, len(dataset.activity_ids)), "/"),
+                          np.tile(dataset.activity_ids, len(dataset.product_ids)))
+        return ids, {"消耗量": matrix.ravel()}
+
+    old_ids, old_values = cells(base)
+    new_ids, new_values = cells(edited)
+    rows += _diff_rows(CONSUMPTION_LABEL, old_ids, old_values, new_ids, new_values, ["消耗量"], atol)
+    return rows
+
+
+def diff_results(base_model, model, atol=0.005):
+    """重算后各产品单位成本、毛利率相对基准模型的变化（compute_model() 的结果）"""
+    def columns(m):
+        ids = np.array([prod[0] for prod in m["products"]], dtype=str)
+        return ids, {name: np.asarray(m[key], dtype=float) for name, key in RESULT_FIELDS}
+
+    old_ids, old_values = columns(base_model)
+    new_ids, new_values = columns(model)
+    return _diff_rows(RESULTS_LABEL, old_ids, old_values, new_ids, new_values,
+                      [name for name, _ in RESULT_FIELDS], atol)
@@ -0,0 +1,1017 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 工作表构建
+每张工作表一个构建函数，输入为 生成ABC成本模型Excel.compute_model() 的计算结果；
+本模块导入 openpyxl 及图表模块，只在需要生成工作簿时才导入；
+单元格样式统一使用 abc_styles 中注册的命名样式，按整块区域一次应用
+"""
+
+import datetime
+
+import openpyxl
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+from openpyxl.chart import BarChart, PieChart, Reference
+from openpyxl.chart._chart import ChartBase
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.table import Table
+
+import abc_profile
+from abc_layout import TABLES
+from abc_styles import (ABC_STYLES, DIRECT_COST_STYLES, PRODUCT_STYLES, WORKHOUR_STYLES,
+                        register_named_styles, style_columns, style_range)
+
+# 说明页等少量单元格的个别字体
+normal_font = Font(name="微软雅黑", size=10)
+
+def new_workbook():
+    """新建空工作簿（第一张工作表由 build_intro_sheet 使用），并注册命名样式"""
+    wb = openpyxl.Workbook()
+    register_named_styles(wb)
+    return wb
+
+def set_column_width(ws, col, width):
+    """设置列宽"""
+    ws.column_dimensions[get_column_letter(col)].width = width
+
+def format_header(ws, row, start_col, end_col):
+    """格式化表头行"""
+    style_range(ws, "表头", row, start_col, row, end_col)
+
+def write_header(ws, row, headers, start_col=1):
+    """写入并格式化表头行"""
+    for i, header in enumerate(headers, start_col):
+        ws.cell(row=row, column=i, value=header)
+    format_header(ws, row, start_col, start_col + len(headers) - 1)
+
+def write_rows(ws, first_row, rows, first_col=1):
+    """从 first_row 行起逐行写入数值（不设置样式）"""
+    for row_idx, values in enumerate(rows, first_row):
+        for col_idx, value in enumerate(values, first_col):
+            ws.cell(row=row_idx, column=col_idx, value=value)
+
+def write_title(ws, ref, text, style="标题"):
+    """写入标题单元格"""
+    ws[ref] = text
+    ws[ref].style = style
+
+def format_total_row(ws, block, n_cols, style="合计"):
+    """合计行：A列写 "合计"，整行应用合计样式"""
+    ws.cell(row=block.total_row, column=1, value="合计")
+    style_range(ws, style, block.total_row, 1, block.total_row, n_cols)
+
+def define_names(wb, layout, block_name):
+    """把布局中某个区域的名称定义为工作簿级名称（已存在时替换，增量更新时随工作表重建）"""
+    for name, ref in layout.names(block_name).items():
+        wb.defined_names[name] = DefinedName(name, attr_text=ref)
+
+def add_table(ws, layout, block_name):
+    """把布局中某个区域（表头 + 数据行）定义为Excel表格"""
+    block = layout.block(block_name)
+    if block.n_rows:
+        ws.add_table(Table(displayName=TABLES[block_name], ref=block.table_ref))
+
+
+# ============================================================
+# 图表模板缓存
+# ============================================================
+# 图表XML中只有标题、样式和数据区域引用（不含数值），同一工作表名和数据区域的图表
+# 在各工作簿中完全相同：每个进程只构建、序列化一次，之后直接复用XML
+_chart_templates = {}
+
+
+class _TemplateChart(ChartBase):
+    """已序列化的图表：保存工作簿时直接写出缓存的XML"""
+
+    def __init__(self, tree, width, height):
+        self._tree = tree
+        self.width = width
+        self.height = height
+
+    def _write(self):
+        return self._tree
+
+
+def cached_chart(factory, ws, *layout):
+    """factory(ws, *layout) 构建图表；同一 (factory, 工作表名, layout) 只构建一次"""
+    key = (factory.__name__, ws.title) + layout
+    template = _chart_templates.get(key)
+    if template is None:
+        with abc_profile.section("图表"):
+            chart = factory(ws, *layout)
+            template = _chart_templates[key] = (chart._write(), chart.width, chart.height)
+    return _TemplateChart(*template)
+
+
+def _cost_compare_chart(ws, header_row, last_row):
+    """传统方法 vs ABC方法 单位成本簇状柱状图（A列产品型号，B/C列单位成本）"""
+    chart = BarChart()
+    chart.type = "col"
+    chart.style = 10
+    chart.title = "传统方法 vs ABC方法 单位成本对比"
+    chart.y_axis.title = '单位成本（元）'
+    chart.x_axis.title = '产品型号'
+    data = Reference(ws, min_col=2, min_row=header_row, max_row=last_row, max_col=3)
+    cats = Reference(ws, min_col=1, min_row=header_row + 1, max_row=last_row)
+    chart.add_data(data, titles_from_data=True)
+    chart.set_categories(cats)
+    chart.shape = 4
+    return chart
+
+
+def _activity_pie_chart(ws, header_row, last_row):
+    """作业成本分布饼图（A列作业类别，B列金额）"""
+    pie = PieChart()
+    pie.title = "作业成本分布"
+    labels = Reference(ws, min_col=1, min_row=header_row + 1, max_row=last_row)
+    data = Reference(ws, min_col=2, min_row=header_row, max_row=last_row)
+    pie.add_data(data, titles_from_data=True)
+    pie.set_categories(labels)
+    pie.height = 10
+    pie.width = 15
+    return pie
+
+
+def _quality_stack_chart(ws, header_row, last_row, first_col, last_col):
+    """各产品单位质量成本构成堆积柱状图（B列产品型号）"""
+    chart = BarChart()
+    chart.type = "col"
+    chart.grouping = "stacked"
+    chart.overlap = 100
+    chart.style = 10
+    chart.title = "单位质量成本构成"
+    chart.y_axis.title = '元/件'
+    chart.x_axis.title = '产品型号'
+    data = Reference(ws, min_col=first_col, min_row=header_row, max_col=last_col, max_row=last_row)
+    cats = Reference(ws, min_col=2, min_row=header_row + 1, max_row=last_row)
+    chart.add_data(data, titles_from_data=True)
+    chart.set_categories(cats)
+    chart.height = 9
+    chart.width = 16
+    return chart
+
+
+def _capacity_stack_chart(ws, header_row, last_row, first_col, last_col):
+    """各资源池已用/闲置产能成本堆积柱状图（B列资源池名称）"""
+    chart = BarChart()
+    chart.type = "col"
+    chart.grouping = "stacked"
+    chart.overlap = 100
+    chart.style = 10
+    chart.title = "资源池产能成本（已用/闲置）"
+    chart.y_axis.title = '元'
+    chart.x_axis.title = '资源池'
+    data = Reference(ws, min_col=first_col, min_row=header_row, max_col=last_col, max_row=last_row)
+    cats = Reference(ws, min_col=2, min_row=header_row + 1, max_row=last_row)
+    chart.add_data(data, titles_from_data=True)
+    chart.set_categories(cats)
+    chart.height = 9
+    chart.width = 16
+    return chart
+
+
+def _npv_histogram_chart(ws, header_row, last_row):
+    """NPV分布直方图（A列区间，D列情景数）"""
+    chart = BarChart()
+    chart.type = "col"
+    chart.style = 10
+    chart.gapWidth = 10
+    chart.title = "NPV分布（风险直方图）"
+    chart.y_axis.title = '情景数'
+    chart.x_axis.title = 'NPV区间（万元）'
+    data = Reference(ws, min_col=4, min_row=header_row, max_row=last_row)
+    cats = Reference(ws, min_col=1, min_row=header_row + 1, max_row=last_row)
+    chart.add_data(data, titles_from_data=True)
+    chart.set_categories(cats)
+    chart.legend = None
+    chart.height = 9
+    chart.width = 18
+    return chart
+
+
+# ============================================================
+# 工作表1: 说明
+# ============================================================
+def build_intro_sheet(wb, workshop, period):
+    """"说明" 工作表：模型说明、适用范围和核算期间"""
+    ws1 = wb.active
+    ws1.title = "说明"
+
+    # 标题
+    ws1['B2'] = "瓦轴集团ABC成本核算模型"
+    ws1['B2'].font = Font(name="微软雅黑", size=18, bold=True, color="4472C4")
+    ws1['B3'] = "Activity-Based Costing Model"
+    ws1['B3'].font = Font(name="微软雅黑", size=12, italic=True, color="7F7F7F")
+
+    # 基本信息
+    ws1['B5'] = "模型版本："
+    ws1['C5'] = "V1.0"
+    ws1['B6'] = "创建日期："
+    ws1['C6'] = datetime.date.today().strftime("%Y年%m月%d日")
+    ws1['B7'] = "适用范围："
+    ws1['C7'] = workshop
+    ws1['B8'] = "核算期间："
+    ws1['C8'] = period
+
+    # 使用说明
+    ws1['B10'] = "使用说明："
+    ws1['B10'].font = Font(name="微软雅黑", size=12, bold=True)
+    instructions = [
+        "1. 首先查看【基础数据】工作表，了解产品和生产信息",
+        "2. 查看【成本归集】工作表，了解制造费用构成",
+        "3. 查看【作业识别】和【成本动因】，了解ABC方法的核心",
+        "4. 系统自动计算【产品成本】，无需手动操作",
+        "5. 查看【成本对比】和【可视化图表】，了解ABC方法的价值",
+        "6. 查看【质量成本】，了解预防/检验/失败成本在各产品上的分布",
+        "7. 查看【产能利用】，了解按时间方程计算的产品成本和各资源池的闲置产能成本"
+    ]
+    for i, text in enumerate(instructions):
+        ws1[f'B{11+i}'] = text
+        ws1[f'B{11+i}'].font = normal_font
+
+    # 注意事项
+    ws1['B18'] = "注意事项："
+    ws1['B18'].font = Font(name="微软雅黑", size=12, bold=True)
+    notes = [
+        "• 浅黄色单元格为输入区（本模型为演示，数据已填充）",
+        "• 浅蓝色单元格为自动计算区，请勿修改",
+        "• 修改输入数据后，按F9刷新计算",
+        "• 定期备份模型文件"
+    ]
+    for i, text in enumerate(notes):
+        ws1[f'B{19+i}'] = text
+        ws1[f'B{19+i}'].font = normal_font
+
+    # 项目组信息
+    ws1['B24'] = "项目组成员："
+    ws1['B24'].font = Font(name="微软雅黑", size=11, bold=True)
+    ws1['B25'] = "负责人: __________"
+    ws1['B26'] = "成员: __________, __________, __________"
+
+    ws1['B28'] = "技术支持："
+    ws1['B28'].font = Font(name="微软雅黑", size=11, bold=True)
+    ws1['B29'] = "顾问: __________  联系方式: __________"
+
+    # 设置列宽
+    set_column_width(ws1, 1, 3)
+    set_column_width(ws1, 2, 25)
+    set_column_width(ws1, 3, 40)
+
+
+# ============================================================
+# 工作表2: 基础数据
+# ============================================================
+def build_basic_data_sheet(wb, model):
+    """"基础数据" 工作表：产品信息、工时统计、直接成本汇总"""
+    layout = model["layout"]
+    ws2 = wb.create_sheet("基础数据")
+
+    # 产品信息表
+    write_title(ws2, 'A1', "产品信息表")
+    ws2.merge_cells('A1:I1')
+
+    headers = ["产品编号", "产品型号", "产品名称", "产品类别", "季度产量(件)",
+               "批次数", "平均批量", "单位售价(元)", "备注"]
+    block = layout.products
+    write_header(ws2, block.header_row, headers)
+
+    # 产品数据
+    write_rows(ws2, block.first_row, model["products"])
+    style_columns(ws2, PRODUCT_STYLES, block.first_row, block.last_row)
+
+    # 合计行
+    format_total_row(ws2, block, 9)
+    ws2[f'E{block.total_row}'] = "=SUM(产品_产量)"
+    ws2[f'F{block.total_row}'] = "=SUM(产品_批次数)"
+
+    # 工时统计表
+    block2 = layout.workhours
+    title_row = block2.header_row - 1
+    write_title(ws2, f'A{title_row}', "产品工时统计表")
+    ws2.merge_cells(f'A{title_row}:E{title_row}')
+
+    headers2 = ["产品编号", "单件标准工时(h)", "单件机器小时(h)", "季度总人工(h)", "季度总机时(h)"]
+    write_header(ws2, block2.header_row, headers2)
+
+    write_rows(ws2, block2.first_row, model["workhours"])
+    style_columns(ws2, WORKHOUR_STYLES, block2.first_row, block2.last_row)
+
+    # 合计行
+    format_total_row(ws2, block2, 5)
+    ws2[f'D{block2.total_row}'] = "=SUM(工时_总人工)"
+    ws2[f'E{block2.total_row}'] = "=SUM(工时_总机时)"
+
+    # 直接成本汇总表
+    block3 = layout.direct_costs
+    title_row = block3.header_row - 1
+    write_title(ws2, f'A{title_row}', "直接成本汇总表")
+    ws2.merge_cells(f'A{title_row}:E{title_row}')
+
+    headers3 = ["产品编号", "直接材料(元)", "直接人工(元)", "直接成本合计(元)", "单位直接成本(元)"]
+    write_header(ws2, block3.header_row, headers3)
+
+    direct_costs = model["direct_costs"]
+
+    for prod_idx, (row_idx, dc) in enumerate(zip(block3.rows, direct_costs), 1):
+        ws2.cell(row=row_idx, column=1, value=dc[0])
+        ws2.cell(row=row_idx, column=2, value=dc[1])
+        ws2.cell(row=row_idx, column=3, value=dc[2])
+        # 直接成本合计
+        ws2.cell(row=row_idx, column=4, value=f"=B{row_idx}+C{row_idx}")
+        # 单位直接成本 = 直接成本合计 / 该产品的季度产量
+        ws2.cell(row=row_idx, column=5, value=f"=D{row_idx}/INDEX(产品_产量,{prod_idx})")
+    style_columns(ws2, DIRECT_COST_STYLES, block3.first_row, block3.last_row)
+
+    for block_name in ("products", "workhours", "direct_costs"):
+        define_names(wb, layout, block_name)
+        add_table(ws2, layout, block_name)
+
+    # 设置列宽
+    for col in range(1, 10):
+        set_column_width(ws2, col, 15)
+
+
+# ============================================================
+# 工作表3: 成本归集
+# ============================================================
+def build_overhead_sheet(wb, model):
+    """"成本归集" 工作表：制造费用明细"""
+    block = model["layout"].overhead
+    ws3 = wb.create_sheet("成本归集")
+
+    write_title(ws3, 'A1', "制造费用汇总表（季度，元）")
+    ws3.merge_cells('A1:F1')
+
+    headers4 = ["费用编号", "费用科目", "季度发生额(元)", "占比", "归属性质", "备注"]
+    write_header(ws3, block.header_row, headers4)
+
+    for row_idx, od in zip(block.rows, model["overhead"]):
+        ws3.cell(row=row_idx, column=1, value=od[0])
+        ws3.cell(row=row_idx, column=2, value=od[1])
+        ws3.cell(row=row_idx, column=3, value=od[2])
+        # 占比公式
+        ws3.cell(row=row_idx, column=4, value=f"=C{row_idx}/制造费用_合计")
+        ws3.cell(row=row_idx, column=5, value=od[3])
+    style_columns(ws3, ["文本", "文本", "整数", "百分比", "文本", "文本"], block.first_row, block.last_row)
+
+    # 合计行
+    format_total_row(ws3, block, 6)
+    ws3[f'C{block.total_row}'] = "=SUM(制造费用_发生额)"
+    ws3[f'D{block.total_row}'] = "100.0%"
+    define_names(wb, model["layout"], "overhead")
+    add_table(ws3, model["layout"], "overhead")
+
+    # 设置列宽
+    set_column_width(ws3, 1, 10)
+    set_column_width(ws3, 2, 20)
+    set_column_width(ws3, 3, 15)
+    set_column_width(ws3, 4, 10)
+    set_column_width(ws3, 5, 20)
+    set_column_width(ws3, 6, 15)
+
+
+# ============================================================
+# 工作表4: 作业识别
+# ============================================================
+def build_activity_sheet(wb, model):
+    """"作业识别" 工作表：作业清单"""
+    block = model["layout"].activities
+    ws4 = wb.create_sheet("作业识别")
+
+    write_title(ws4, 'A1', "作业清单")
+    ws4.merge_cells('A1:G1')
+
+    headers5 = ["作业编号", "作业名称", "作业层级", "作业描述", "作业成本(元)", "占比", "备注"]
+    write_header(ws4, block.header_row, headers5)
+
+    write_rows(ws4, block.first_row, model["activities"])
+
+    # 占比公式
+    for row_idx in block.rows:
+        ws4.cell(row=row_idx, column=6, value=f"=E{row_idx}/作业_成本合计")
+    style_columns(ws4, ["文本", "文本", "文本", "文本", "整数", "百分比", "文本"],
+                  block.first_row, block.last_row)
+
+    # 合计行
+    format_total_row(ws4, block, 7)
+    ws4[f'E{block.total_row}'] = "=SUM(作业_成本)"
+    ws4[f'F{block.total_row}'] = "100.0%"
+    define_names(wb, model["layout"], "activities")
+    add_table(ws4, model["layout"], "activities")
+
+    # 设置列宽
+    set_column_width(ws4, 1, 10)
+    set_column_width(ws4, 2, 18)
+    set_column_width(ws4, 3, 10)
+    set_column_width(ws4, 4, 18)
+    set_column_width(ws4, 5, 15)
+    set_column_width(ws4, 6, 10)
+    set_column_width(ws4, 7, 15)
+
+
+# ============================================================
+# 工作表5: 成本动因
+# ============================================================
+def build_driver_sheet(wb, model):
+    """"成本动因" 工作表：动因、分配率和各产品动因消耗量"""
+    layout = model["layout"]
+    ws5 = wb.create_sheet("成本动因")
+
+    write_title(ws5, 'A1', "成本动因选择与分配率")
+    ws5.merge_cells('A1:G1')
+
+    headers6 = ["作业编号", "作业名称", "成本动因", "动因总量", "作业成本(元)", "分配率", "单位"]
+    write_header(ws5, layout.drivers.header_row, headers6)
+
+    cost_drivers = model["cost_drivers"]
+
+    products = model["products"]
+    abc_result = model["abc_result"]
+
+    for row_idx, cd, total, cost in zip(
+            layout.drivers.rows, cost_drivers, abc_result.driver_totals, abc_result.activity_costs):
+        ws5.cell(row=row_idx, column=1, value=cd[0])
+        ws5.cell(row=row_idx, column=2, value=cd[1])
+        ws5.cell(row=row_idx, column=3, value=cd[2])
+        ws5.cell(row=row_idx, column=4, value=float(total))
+        ws5.cell(row=row_idx, column=5, value=float(cost))
+        # 分配率公式
+        ws5.cell(row=row_idx, column=6, value=f"=E{row_idx}/D{row_idx}")
+        ws5.cell(row=row_idx, column=7, value=cd[5])
+    style_columns(ws5, ["文本", "文本", "文本", "整数", "整数", "数值", "文本"],
+                  layout.drivers.first_row, layout.drivers.last_row)
+
+    define_names(wb, layout, "drivers")
+    add_table(ws5, layout, "drivers")
+
+    # 动因消耗明细表
+    block = layout.consumption
+    write_title(ws5, f'A{block.header_row - 1}', "各产品动因消耗量")
+
+    headers6b = ["作业编号", "作业名称"] + [prod[0] for prod in products] + ["合计"]
+    write_header(ws5, block.header_row, headers6b)
+
+    first_prod_col = 3
+    last_prod_col = first_prod_col + len(products) - 1
+    first_letter = get_column_letter(first_prod_col)
+    last_letter = get_column_letter(last_prod_col)
+    for act_idx, (row_idx, cd) in enumerate(zip(block.rows, cost_drivers)):
+        ws5.cell(row=row_idx, column=1, value=cd[0])
+        ws5.cell(row=row_idx, column=2, value=cd[1])
+        for prod_idx in range(len(products)):
+            ws5.cell(row=row_idx, column=first_prod_col + prod_idx,
+                     value=float(abc_result.consumption[prod_idx, act_idx]))
+        ws5.cell(row=row_idx, column=last_prod_col + 1,
+                 value=f"=SUM({first_letter}{row_idx}:{last_letter}{row_idx})")
+    style_range(ws5, "文本", block.first_row, 1, block.last_row, 2)
+    style_range(ws5, "整数", block.first_row, first_prod_col, block.last_row, last_prod_col)
+    style_range(ws5, "计算整数", block.first_row, last_prod_col + 1, block.last_row, last_prod_col + 1)
+
+    # 设置列宽
+    set_column_width(ws5, 1, 10)
+    set_column_width(ws5, 2, 18)
+    set_column_width(ws5, 3, 18)
+    set_column_width(ws5, 4, 12)
+    set_column_width(ws5, 5, 15)
+    set_column_width(ws5, 6, 15)
+    set_column_width(ws5, 7, 10)
+
+
+# ============================================================
+# 工作表6: 产品成本(ABC)
+# ============================================================
+def build_abc_cost_sheet(wb, model):
+    """"产品成本(ABC)" 工作表：ABC方法完全成本"""
+    products = model["products"]
+    direct_costs = model["direct_costs"]
+    abc_result = model["abc_result"]
+
+    block = model["layout"].abc_costs
+    ws6 = wb.create_sheet("产品成本(ABC)")
+
+    write_title(ws6, 'A1', "产品完全成本汇总表（ABC方法）")
+    ws6.merge_cells('A1:K1')
+
+    headers7 = ["产品编号", "产品型号", "产量(件)", "直接材料", "直接人工",
+                "ABC制造费用", "完全成本", "单位成本", "单位售价", "单位毛利", "毛利率"]
+    write_header(ws6, block.header_row, headers7)
+
+    # ABC制造费用（由分配引擎计算）
+    abc_overhead = [round(float(v), 2) for v in abc_result.overhead]
+
+    for prod_idx, (row_idx, prod, dc) in enumerate(zip(block.rows, products, direct_costs), 1):
+        row = [
+            prod[0],  # 产品编号
+            prod[1],  # 产品型号
+            prod[4],  # 产量
+            dc[1],    # 直接材料
+            dc[2],    # 直接人工
+            abc_overhead[prod_idx - 1],  # ABC制造费用
+            # 完全成本 = 直接材料 + 直接人工 + ABC制造费用
+            f"=D{row_idx}+E{row_idx}+F{row_idx}",
+            # 单位成本 = 完全成本 / 产量
+            f"=G{row_idx}/C{row_idx}",
+            # 单位售价（从基础数据）
+            f"=INDEX(产品_单位售价,{prod_idx})",
+            # 单位毛利 = 单位售价 - 单位成本
+            f"=I{row_idx}-H{row_idx}",
+            # 毛利率 = 单位毛利 / 单位售价
+            f"=J{row_idx}/I{row_idx}",
+        ]
+        for col_idx, value in enumerate(row, 1):
+            ws6.cell(row=row_idx, column=col_idx, value=value)
+    style_columns(ws6, ABC_STYLES, block.first_row, block.last_row)
+
+    # 合计行
+    format_total_row(ws6, block, 7, "合计数值")
+    for col_letter, name in [('C', "ABC_产量"), ('D', "ABC_直接材料"), ('E', "ABC_直接人工"),
+                             ('F', "ABC_制造费用"), ('G', "ABC_完全成本")]:
+        ws6[f'{col_letter}{block.total_row}'] = f"=SUM({name})"
+    define_names(wb, model["layout"], "abc_costs")
+    add_table(ws6, model["layout"], "abc_costs")
+
+    # 设置列宽
+    widths = [10, 12, 12, 12, 12, 15, 15, 12, 12, 12, 10]
+    for i, width in enumerate(widths, 1):
+        set_column_width(ws6, i, width)
+
+
+# ============================================================
+# 工作表7: 成本对比
+# ============================================================
+def build_comparison_sheet(wb, model):
+    """"成本对比" 工作表：传统方法与ABC方法对比及关键发现"""
+    products = model["products"]
+    traditional_costs = model["traditional_costs"]
+    abc_costs = model["abc_costs"]
+
+    layout = model["layout"]
+    ws7 = wb.create_sheet("成本对比")
+
+    write_title(ws7, 'A1', "传统方法 vs ABC方法成本对比分析")
+    ws7.merge_cells('A1:G1')
+
+    # 单位成本对比
+    block = layout.comparison
+    write_title(ws7, f'A{block.header_row - 1}', "单位成本对比", "小标题")
+
+    headers8 = ["产品型号", "传统方法(元)", "ABC方法(元)", "差异(元)", "差异率", "分析"]
+    write_header(ws7, block.header_row, headers8)
+
+    write_rows(ws7, block.first_row, (
+        [prod[1], trad, abc, f"=C{row_idx}-B{row_idx}", f"=D{row_idx}/B{row_idx}", ana]
+        for row_idx, prod, trad, abc, ana in zip(block.rows, products, traditional_costs, abc_costs,
+                                                  model["analysis"])))
+    style_columns(ws7, ["文本", "单价", "单价", "计算单价", "计算百分比", "文本"],
+                  block.first_row, block.last_row)
+
+    # 毛利率对比
+    block = layout.margins
+    write_title(ws7, f'A{block.header_row - 1}', "毛利率对比", "小标题")
+
+    headers9 = ["产品型号", "传统方法", "ABC方法", "差异", "决策影响"]
+    write_header(ws7, block.header_row, headers9)
+
+    write_rows(ws7, block.first_row, (
+        [prod[1], tm, am, f"=C{row_idx}-B{row_idx}", imp]
+        for row_idx, prod, tm, am, imp in zip(block.rows, products, model["trad_margins"],
+                                              model["abc_margins"], model["impact"])))
+    style_columns(ws7, ["文本", "百分比", "百分比", "计算百分比", "文本"], block.first_row, block.last_row)
+
+    # 关键发现
+    findings_row = layout.findings_row
+    ws7[f'A{findings_row}'] = "关键发现："
+    ws7[f'A{findings_row}'].font = Font(name="微软雅黑", size=12, bold=True, color="C00000")
+
+    # 关键发现由计算结果生成
+    findings = model["findings"]
+
+    for row_idx, finding in enumerate(findings, findings_row + 1):
+        ws7[f'A{row_idx}'] = finding
+        ws7[f'A{row_idx}'].font = Font(name="微软雅黑", size=10, color="C00000")
+
+    # 设置列宽
+    for col in range(1, 7):
+        set_column_width(ws7, col, 18)
+
+
+# ============================================================
+# 工作表8: 可视化图表
+# ============================================================
+def build_chart_sheet(wb, model):
+    """"可视化图表" 工作表：单位成本柱状图和作业成本饼图"""
+    products = model["products"]
+    traditional_costs = model["traditional_costs"]
+    abc_costs = model["abc_costs"]
+
+    layout = model["layout"]
+    ws8 = wb.create_sheet("可视化图表")
+
+    write_title(ws8, 'A1', "ABC成本模型可视化分析")
+
+    # 创建成本对比图表数据
+    block = layout.chart_costs
+    write_title(ws8, f'A{block.header_row - 1}', "产品单位成本对比（元）", "小标题")
+
+    # 数据表（整行追加，标题行之后即表头）
+    ws8.append(["产品型号", "传统方法", "ABC方法"])
+    for prod, trad, abc in zip(products, traditional_costs, abc_costs):
+        ws8.append([prod[1], trad, abc])
+    format_header(ws8, block.header_row, 1, 3)
+    ws8.add_chart(cached_chart(_cost_compare_chart, ws8, block.header_row, block.last_row),
+                  f"E{block.header_row - 1}")
+
+    # 作业成本分布数据
+    block = layout.chart_activities
+    write_title(ws8, f'A{block.header_row - 1}', "作业成本分布", "小标题")
+    ws8.append(["作业类别", "成本金额(元)"])
+    for cat in model["activity_categories"]:
+        ws8.append(cat)
+    format_header(ws8, block.header_row, 1, 2)
+    ws8.add_chart(cached_chart(_activity_pie_chart, ws8, block.header_row, block.last_row),
+                  f"E{block.header_row - 1}")
+
+
+# ============================================================
+# 工作表9: 质量成本
+# ============================================================
+def build_quality_sheet(wb, model):
+    """"质量成本" 工作表：各产品单位质量成本（四类）、类别汇总和堆积柱状图"""
+    products = model["products"]
+    quality = model["quality"]
+    categories = model["quality_categories"]
+
+    layout = model["layout"]
+    block = layout.quality
+    ws9 = wb.create_sheet("质量成本")
+
+    write_title(ws9, 'A1', "质量成本分析（预防/检验/内部失败/外部失败）")
+    ws9.merge_cells('A1:K1')
+
+    headers = (["产品编号", "产品型号", "不良率", "返工率", "外部损失率"]
+               + [f"{c}/件" for c in categories] + ["质量成本/件", "占单位成本"])
+    write_header(ws9, block.header_row, headers)
+
+    unit_costs = quality.unit_costs
+    last_cat_col = 5 + len(categories)
+    first, last = get_column_letter(6), get_column_letter(last_cat_col)
+    total_col = last_cat_col + 1
+    for idx, (row_idx, prod) in enumerate(zip(block.rows, products)):
+        values = ([prod[0], prod[1], float(quality.defect_rates[idx]), float(quality.rework_rates[idx]),
+                   float(quality.external_rates[idx])]
+                  + [round(float(v), 2) for v in unit_costs[idx]]
+                  # 质量成本/件 = 四类之和；占比引用 "产品成本(ABC)" 同一产品的单位成本
+                  + [f"=SUM({first}{row_idx}:{last}{row_idx})",
+                     f"={get_column_letter(total_col)}{row_idx}/INDEX(ABC_单位成本,{idx + 1})"])
+        for col_idx, value in enumerate(values, 1):
+            ws9.cell(row=row_idx, column=col_idx, value=value)
+    style_columns(ws9, ["文本", "文本"] + ["输入百分比"] * 3 + ["数值"] * len(categories)
+                  + ["计算区", "计算百分比"], block.first_row, block.last_row)
+
+    add_table(ws9, layout, "quality")
+
+    # 类别汇总（金额 = 单位质量成本 × 产量）
+    summary = layout.quality_summary
+    summary_row = summary.header_row - 1
+    write_title(ws9, f'A{summary_row}', "质量成本类别汇总", "小标题")
+    write_header(ws9, summary.header_row, ["质量成本类别", "金额(元)", "占比"])
+    write_rows(ws9, summary.first_row, (
+        [category, round(float(amount), 2), f"=B{row_idx}/质量成本_合计"]
+        for row_idx, category, amount in zip(summary.rows, categories, quality.category_totals)))
+    style_columns(ws9, ["文本", "整数", "计算百分比"], summary.first_row, summary.last_row)
+    format_total_row(ws9, summary, 3)
+    ws9[f'B{summary.total_row}'] = "=SUM(质量成本_类别金额)"
+    define_names(wb, layout, "quality_summary")
+
+    # 堆积柱状图：各产品单位质量成本构成
+    ws9.add_chart(cached_chart(_quality_stack_chart, ws9, block.header_row, block.last_row, 6, last_cat_col),
+                  f"E{summary_row}")
+
+    widths = [10, 12, 9, 9, 11, 13, 13, 15, 15, 13, 11]
+    for i, width in enumerate(widths, 1):
+        set_column_width(ws9, i, width)
+
+
+# ============================================================
+# 工作表10: 产能利用
+# ============================================================
+def build_capacity_sheet(wb, model):
+    """"产能利用" 工作表：TDABC资源池产能成本率、闲置产能成本和各产品TDABC成本"""
+    tdabc = model["tdabc"]
+    layout = model["layout"]
+    ws10 = wb.create_sheet("产能利用")
+
+    write_title(ws10, 'A1', "时间驱动作业成本（TDABC）与产能利用")
+    ws10.merge_cells('A1:K1')
+    if tdabc is None:
+        ws10['A3'] = "未提供 数据_资源产能.csv 和 数据_时间方程.csv，未计算时间驱动作业成本"
+        ws10['A3'].font = normal_font
+        return
+
+    # 资源池：产能成本率 = 季度成本 / 实际产能；闲置产能成本不分摊到产品
+    block = layout.capacity
+    headers = ["资源池编号", "资源池名称", "季度成本(元)", "实际产能(h)", "产能成本率(元/h)", "已用产能(h)",
+               "利用率", "闲置产能(h)", "已用产能成本(元)", "闲置产能成本(元)", "说明"]
+    write_header(ws10, block.header_row, headers)
+    write_rows(ws10, block.first_row, (
+        [pool_id, name, float(cost), float(capacity), f"=C{row_idx}/D{row_idx}",
+         float(used), f"=F{row_idx}/D{row_idx}", f"=D{row_idx}-F{row_idx}",
+         f"=F{row_idx}*E{row_idx}", f"=H{row_idx}*E{row_idx}", "需求超出实际产能" if used > capacity else ""]
+        for row_idx, pool_id, name, cost, capacity, used in zip(
+            block.rows, tdabc.pool_ids, tdabc.pool_names, tdabc.pool_costs,
+            tdabc.capacity_hours, tdabc.used_hours)))
+    style_columns(ws10, ["文本", "文本", "整数", "整数", "计算区", "计算整数", "计算百分比",
+                         "计算整数", "计算整数", "计算整数", "文本"], block.first_row, block.last_row)
+    format_total_row(ws10, block, 11)
+    ws10[f'C{block.total_row}'] = "=SUM(产能_季度成本)"
+    ws10[f'I{block.total_row}'] = f"=SUM(I{block.first_row}:I{block.last_row})"
+    ws10[f'J{block.total_row}'] = "=SUM(产能_闲置成本)"
+    # 合计利用率按成本加权
+    ws10[f'G{block.total_row}'] = f"=I{block.total_row}/C{block.total_row}"
+    ws10[f'G{block.total_row}'].number_format = '0.0%'
+    define_names(wb, layout, "capacity")
+    add_table(ws10, layout, "capacity")
+
+    # 各产品TDABC成本，与 "产品成本(ABC)" 的单位成本对比
+    products = layout.capacity_products
+    title_row = products.header_row - 1
+    write_title(ws10, f'A{title_row}', "各产品TDABC成本（按已用产能计入）", "小标题")
+    write_header(ws10, products.header_row, ["产品编号", "产品型号", "TDABC制造费用(元)", "TDABC单位成本(元)",
+                                             "ABC单位成本(元)", "差异(元)", "差异率", "TDABC毛利率"])
+    write_rows(ws10, products.first_row, (
+        [prod[0], prod[1], round(float(overhead), 2),
+         f"=(INDEX(直接成本_合计,{idx})+C{row_idx})/INDEX(产品_产量,{idx})",
+         f"=INDEX(ABC_单位成本,{idx})", f"=D{row_idx}-E{row_idx}", f"=F{row_idx}/E{row_idx}",
+         f"=1-D{row_idx}/INDEX(产品_单位售价,{idx})"]
+        for idx, (row_idx, prod, overhead) in enumerate(
+            zip(products.rows, model["products"], tdabc.overhead), 1)))
+    style_columns(ws10, ["文本", "文本", "数值", "计算单价", "计算单价", "计算单价", "计算百分比", "计算百分比"],
+                  products.first_row, products.last_row)
+    format_total_row(ws10, products, 8, "合计数值")
+    ws10[f'C{products.total_row}'] = "=SUM(TDABC_制造费用)"
+    define_names(wb, layout, "capacity_products")
+    add_table(ws10, layout, "capacity_products")
+
+    ws10.add_chart(cached_chart(_capacity_stack_chart, ws10, block.header_row, block.last_row, 9, 10),
+                   "M2")
+
+    widths = [11, 14, 15, 13, 15, 13, 10, 13, 16, 16, 16]
+    for i, width in enumerate(widths, 1):
+        set_column_width(ws10, i, width)
+
+
+# ============================================================
+# 可选工作表: 模拟分析
+# ============================================================
+def build_simulation_sheet(wb, model, simulation, sensitivity, conclusions, top=5):
+    """
+    "模拟分析" 工作表：蒙特卡洛单位成本/毛利率分位数区间和单因素敏感性排名
+
+    simulation/sensitivity 为 abc_simulation 的结果，conclusions 为各产品结论区间文字
+    """
+    products = model["products"]
+    ws = wb.create_sheet("模拟分析")
+
+    write_title(ws, 'A1', "ABC单位成本蒙特卡洛模拟")
+    ws['A2'] = (f"情景数: {simulation.n_scenarios:,}    作业成本波动: ±{simulation.cost_spread:.0%}    "
+                f"动因总量波动: ±{simulation.driver_spread:.0%}（三角分布，各作业独立）")
+    ws['A2'].font = normal_font
+
+    # 分位数区间
+    labels = [f"P{q:g}" for q in simulation.percentiles]
+    headers = (["产品编号", "产品型号", "传统方法(元)", "ABC基准(元)"]
+               + [f"单位成本{label}" for label in labels]
+               + [f"毛利率{label}" for label in labels]
+               + ["传统方法低估概率", "亏损概率", "结论区间"])
+    write_header(ws, 4, headers)
+
+    n_bands = len(labels)
+    cost_bands = simulation.cost_bands
+    margin_bands = simulation.margin_bands
+    prob_under = simulation.prob_above_traditional
+    prob_loss = simulation.prob_loss
+    write_rows(ws, 5, (
+        [prod[0], prod[1], model["traditional_costs"][idx], model["abc_costs"][idx]]
+        + [round(float(v), 2) for v in cost_bands[idx]]
+        + [round(float(v), 4) for v in margin_bands[idx]]
+        + [round(float(prob_under[idx]), 4), round(float(prob_loss[idx]), 4), conclusions[idx]]
+        for idx, prod in enumerate(products)))
+    style_columns(ws, ["文本", "文本", "数值", "数值"] + ["计算区"] * n_bands
+                  + ["计算百分比"] * (n_bands + 2) + ["文本"], 5, 4 + len(products))
+
+    # 敏感性排名（龙卷风图数据）
+    rank_title_row = 5 + len(products) + 1
+    write_title(ws, f'A{rank_title_row}', f"单位成本敏感性排名（各产品前{top}位因素）", "小标题")
+    rank_headers = ["产品编号", "排名", "因素", "低值情景(元)", "高值情景(元)", "波动幅度(元)", "占基准比例"]
+    header_row = rank_title_row + 1
+    write_header(ws, header_row, rank_headers)
+
+    row_idx = header_row + 1
+    swing = sensitivity.swing
+    for idx, prod in enumerate(products):
+        base_cost = float(sensitivity.base_unit_costs[idx])
+        for rank, factor in enumerate(sensitivity.ranking(idx, top), 1):
+            values = [prod[0], rank, sensitivity.factors[factor],
+                      round(float(sensitivity.low[factor, idx]), 2),
+                      round(float(sensitivity.high[factor, idx]), 2),
+                      round(float(swing[factor, idx]), 2),
+                      round(float(swing[factor, idx]) / base_cost, 4) if base_cost else 0]
+            for col_idx, value in enumerate(values, 1):
+                ws.cell(row=row_idx, column=col_idx, value=value)
+            row_idx += 1
+    style_columns(ws, ["文本", "文本", "文本", "数值", "数值", "数值", "百分比"], header_row + 1, row_idx - 1)
+
+    # 设置列宽
+    set_column_width(ws, 1, 10)
+    set_column_width(ws, 2, 12)
+    set_column_width(ws, 3, 20)
+    for col in range(4, len(headers)):
+        set_column_width(ws, col, 13)
+    set_column_width(ws, len(headers), 24)
+    return ws
+
+
+# ============================================================
+# 可选工作表: 产品组合优化
+# ============================================================
+def build_optimization_sheet(wb, model, result):
+    """
+    "产品组合优化" 工作表：当前与最优产品组合的产量、批次数和ABC边际贡献，
+    以及各产能约束的用量和影子价格
+
+    result 为 abc_optimize.optimize() 的结果
+    """
+    problem = result.problem
+    products = model["products"]
+    ws = wb.create_sheet("产品组合优化")
+
+    write_title(ws, 'A1', "基于ABC成本的产品组合优化")
+    ws['A2'] = (f"求解方法: {result.method}（HiGHS）    目标: ABC边际贡献最大    "
+                f"设施级作业成本 {problem.fixed_costs:,.0f} 元视为固定成本")
+    ws['A2'].font = normal_font
+
+    # 产品组合
+    headers = ["产品编号", "产品型号", "单位贡献(元)", "每批成本(元)", "产品级成本(元)",
+               "需求下限", "需求上限", "当前产量", "最优产量", "当前批次", "最优批次",
+               "当前边际贡献", "最优边际贡献", "变化"]
+    write_header(ws, 4, headers)
+    current = result.current_contribution
+    optimal = result.optimal_contribution
+    write_rows(ws, 5, (
+        [prod[0], prod[1], round(float(problem.unit_margins[idx]), 2), round(float(problem.batch_costs[idx]), 2),
+         round(float(problem.product_costs[idx]), 2), round(float(problem.lower[idx])),
+         round(float(problem.upper[idx])), round(float(problem.current[idx])),
+         round(float(result.quantities[idx])), round(float(result.current_batches[idx]), 1),
+         round(float(result.batches[idx]), 1), round(float(current[idx]), 2), round(float(optimal[idx]), 2),
+         round(float(optimal[idx] - current[idx]), 2)]
+        for idx, prod in enumerate(products)))
+    last_row = 4 + len(products)
+    style_columns(ws, ["文本", "文本", "数值", "数值", "数值", "整数", "整数", "整数", "计算区",
+                       "一位小数", "计算区", "数值", "计算区", "计算区"], 5, last_row)
+    total_row = last_row + 1
+    ws.cell(row=total_row, column=1, value="合计")
+    for col, values in ((12, current), (13, optimal), (14, optimal - current)):
+        ws.cell(row=total_row, column=col, value=round(float(values.sum()), 2))
+    style_range(ws, "合计数值", total_row, 1, total_row, len(headers))
+
+    # 产能约束与影子价格
+    title_row = total_row + 2
+    write_title(ws, f'A{title_row}', "产能约束与影子价格（每增加一单位产能可增加的边际贡献）", "小标题")
+    header_row = title_row + 1
+    write_header(ws, header_row, ["产能约束", "产能上限", "当前用量", "最优用量", "利用率", "影子价格(元)"])
+    current_usage = result.current_usage
+    optimal_usage = result.optimal_usage
+    write_rows(ws, header_row + 1, (
+        [name, round(float(problem.capacity[k]), 1), round(float(current_usage[k]), 1),
+         round(float(optimal_usage[k]), 1),
+         round(float(optimal_usage[k] / problem.capacity[k]), 4) if problem.capacity[k] else 0,
+         round(float(result.shadow_prices[k]), 2)]
+        for k, name in enumerate(problem.constraint_names)))
+    style_columns(ws, ["文本", "一位小数", "一位小数", "一位小数", "计算百分比", "计算区"],
+                  header_row + 1, header_row + len(problem.constraint_names))
+    note_row = header_row + len(problem.constraint_names) + 1
+    ws[f'A{note_row}'] = ("注：影子价格为线性规划的对偶值，MILP 时取线性松弛的结果；"
+                          "为0表示该产能在最优组合下尚有富余")
+    ws[f'A{note_row}'].font = normal_font
+
+    set_column_width(ws, 1, 22)
+    for col in range(2, len(headers) + 1):
+        set_column_width(ws, col, 13)
+    return ws
+
+# ============================================================
+# 可选工作表: 投资决策
+# ============================================================
+def build_investment_sheet(wb, params, base, simulation, sensitivity, bins=20):
+    """
+    "投资决策" 工作表：智能化升级基准情景现金流（NPV/IRR 为Excel公式）、
+    各评价指标的模拟分位数、单因素敏感性排名和NPV分布直方图
+
+    参数均为 abc_invest 的结果（base 为基准情景，simulation 为抽样情景）
+    """
+    from abc_invest import BENEFITS, PARAMETERS
+
+    ws = wb.create_sheet("投资决策")
+    write_title(ws, 'A1', "智能化升级投资决策（NPV / IRR / 回收期 / 风险）")
+    ws['A2'] = (f"情景数: {simulation.n_scenarios:,}（各参数按 下限/基准值/上限 三角分布独立抽样）    "
+                f"金额单位: 万元")
+    ws['A2'].font = normal_font
+
+    # 参数
+    write_header(ws, 4, ["参数", "基准值", "下限", "上限", "单位"])
+    write_rows(ws, 5, ([name, float(params.base[k]), float(params.low[k]), float(params.high[k]), params.units[k]]
+                       for k, name in enumerate(PARAMETERS)))
+    params_last = 4 + len(PARAMETERS)
+    style_columns(ws, ["文本", "输入区", "数值", "数值", "文本"], 5, params_last)
+    rate_cell = f"B{5 + PARAMETERS.index('折现率')}"
+
+    # 基准情景年效益和现金流（折现、累计用公式）
+    row = params_last + 2
+    write_title(ws, f'A{row}', "基准情景年效益", "小标题")
+    write_header(ws, row + 1, list(BENEFITS) + ["合计"])
+    benefits = base.benefits[0]
+    write_rows(ws, row + 2, [[round(float(v), 2) for v in benefits] + [f"=SUM(A{row + 2}:E{row + 2})"]])
+    style_columns(ws, ["数值"] * 5 + ["计算区"], row + 2, row + 2)
+
+    row += 4
+    write_title(ws, f'A{row}', "基准情景增量现金流", "小标题")
+    header_row = row + 1
+    write_header(ws, header_row, ["年份", "现金流", "折现现金流", "累计折现现金流"])
+    flows = base.cash_flows[0]
+    first = header_row + 1
+    last = header_row + len(flows)
+    write_rows(ws, first, (
+        [year, round(float(flow), 2), f"=B{r}/(1+{rate_cell})^A{r}",
+         f"=C{r}" if year == 0 else f"=D{r - 1}+C{r}"]
+        for year, (r, flow) in enumerate(zip(range(first, last + 1), flows))))
+    style_columns(ws, ["整数", "数值", "计算区", "计算区"], first, last)
+
+    # 评价指标：基准值（公式）与模拟分位数
+    row = last + 2
+    write_title(ws, f'A{row}', "评价指标", "小标题")
+    labels = [f"P{q:g}" for q in simulation.percentiles]
+    write_header(ws, row + 1, ["指标", "基准情景"] + labels)
+    metrics = [
+        ("NPV(万元)", f"=SUM(C{first}:C{last})", simulation.npv),
+        ("IRR", f"=IRR(B{first}:B{last})", simulation.irr),
+        ("静态回收期(年)", round(float(base.payback[0]), 4), simulation.payback),
+        ("动态回收期(年)", round(float(base.discounted_payback[0]), 4), simulation.discounted_payback),
+        ("效益安全边际", round(float(base.margin_of_safety[0]), 4), simulation.margin_of_safety),
+        ("盈亏平衡年效益(万元)", round(float(base.breakeven_benefits[0]), 4), simulation.breakeven_benefits),
+    ]
+    metric_first = row + 2
+    write_rows(ws, metric_first, (
+        [name, value] + [round(float(v), 4) for v in simulation.bands(samples)]
+        for name, value, samples in metrics))
+    for offset, (name, _, _) in enumerate(metrics):
+        style = "计算百分比" if name in ("IRR", "效益安全边际") else "计算区"
+        style_range(ws, style, metric_first + offset, 2, metric_first + offset, 2 + len(labels))
+    style_range(ws, "文本", metric_first, 1, metric_first + len(metrics) - 1, 1)
+    row = metric_first + len(metrics)
+    ws[f'A{row}'] = (f"NPV < 0 的概率: {simulation.prob_loss:.1%}    "
+                     f"IRR 低于折现率的概率: {simulation.prob_irr_below_rate:.1%}")
+    ws[f'A{row}'].font = normal_font
+
+    # 单因素敏感性
+    row += 2
+    write_title(ws, f'A{row}', "单因素敏感性（参数取下限/上限时的NPV）", "小标题")
+    write_header(ws, row + 1, ["排名", "参数", "下限时NPV", "上限时NPV", "波动幅度", "占基准NPV比例"])
+    ranking = sensitivity.ranking()
+    write_rows(ws, row + 2, (
+        [rank, sensitivity.factors[k], round(float(sensitivity.low[k]), 2), round(float(sensitivity.high[k]), 2),
+         round(float(sensitivity.swing[k]), 2),
+         round(float(sensitivity.swing[k] / sensitivity.base_npv), 4) if sensitivity.base_npv else 0]
+        for rank, k in enumerate(ranking, 1)))
+    style_columns(ws, ["整数", "文本", "数值", "数值", "计算区", "计算百分比"], row + 2, row + 1 + len(ranking))
+
+    # NPV分布直方图
+    row += 3 + len(ranking)
+    write_title(ws, f'A{row}', "NPV分布", "小标题")
+    hist_header = row + 1
+    write_header(ws, hist_header, ["NPV区间", "区间下限", "区间上限", "情景数", "频率"])
+    counts, edges = simulation.histogram(bins)
+    write_rows(ws, hist_header + 1, (
+        [f"{edges[i]:,.0f}~{edges[i + 1]:,.0f}", round(float(edges[i]), 2), round(float(edges[i + 1]), 2),
+         int(counts[i]), round(float(counts[i]) / simulation.n_scenarios, 4)]
+        for i in range(len(counts))))
+    hist_last = hist_header + len(counts)
+    style_columns(ws, ["文本", "数值", "数值", "整数", "百分比"], hist_header + 1, hist_last)
+    ws.add_chart(cached_chart(_npv_histogram_chart, ws, hist_header, hist_last), "I4")
+
+    set_column_width(ws, 1, 22)
+    for col in range(2, 3 + len(labels)):
+        set_column_width(ws, col, 14)
+    return ws
+
+# 说明页之后各工作表的 (名称, 构建函数)，按工作簿中的顺序排列
+SHEET_BUILDERS = [
+    ("基础数据", build_basic_data_sheet),
+    ("成本归集", build_overhead_sheet),
+    ("作业识别", build_activity_sheet),
+    ("成本动因", build_driver_sheet),
+    ("产品成本(ABC)", build_abc_cost_sheet),
+    ("成本对比", build_comparison_sheet),
+    ("可视化图表", build_chart_sheet),
+    ("质量成本", build_quality_sheet),
+    ("产能利用", build_capacity_sheet),
+]
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 蒙特卡洛模拟与敏感性分析
+对作业成本和动因总量按三角分布随机扰动，按块批量生成情景矩阵，
+每个情景重新计算各产品ABC单位成本和毛利率，输出分位数区间；
+另按单因素高/低取值计算各产品单位成本的波动幅度（龙卷风图排名）
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_CHUNK = 20_000
+
+
+@dataclass
+class SimulationResult:
+    """模拟结果：unit_costs 为 (情景数, P) 的单位成本样本"""
+    product_ids: list
+    unit_costs: np.ndarray
+    unit_prices: np.ndarray
+    base_unit_costs: np.ndarray
+    traditional_costs: np.ndarray = None
+    percentiles: tuple = DEFAULT_PERCENTILES
+    cost_spread: float = 0.0
+    driver_spread: float = 0.0
+
+    @property
+    def n_scenarios(self):
+        return self.unit_costs.shape[0]
+
+    @property
+    def cost_bands(self):
+        """(P, K) 单位成本分位数"""
+        return np.percentile(self.unit_costs, self.percentiles, axis=0).T
+
+    @property
+    def margin_bands(self):
+        """(P, K) 毛利率分位数（毛利率随单位成本单调递减，由成本分位数反推）"""
+        bands = np.percentile(self.unit_costs, [100 - q for q in self.percentiles], axis=0).T
+        prices = self.unit_prices[:, None]
+        return np.divide(prices - bands, prices, out=np.zeros_like(bands), where=prices != 0)
+
+    @property
+    def prob_above_traditional(self):
+        """(P,) ABC单位成本高于传统方法单位成本（即传统方法低估）的情景比例"""
+        if self.traditional_costs is None:
+            return None
+        return (self.unit_costs > self.traditional_costs).mean(axis=0)
+
+    @property
+    def prob_loss(self):
+        """(P,) 单位成本高于售价（亏损）的情景比例"""
+        return (self.unit_costs > self.unit_prices).mean(axis=0)
+
+
+@dataclass
+class SensitivityResult:
+    """单因素敏感性：low/high 为 (因素数, P) 的单位成本"""
+    product_ids: list
+    factors: list
+    low: np.ndarray
+    high: np.ndarray
+    base_unit_costs: np.ndarray
+    cost_spread: float = 0.0
+    driver_spread: float = 0.0
+
+    @property
+    def swing(self):
+        """(因素数, P) 单位成本波动幅度"""
+        return np.abs(self.high - self.low)
+
+    def ranking(self, product, top=None):
+        """某产品（序号）按波动幅度从大到小排列的因素序号"""
+        order = np.argsort(-self.swing[:, product], kind="stable")
+        return order[:top] if top else order
+
+
+def scenario_unit_costs(activity_costs, driver_totals, consumption, direct_costs, quantities):
+    """
+    批量计算情景单位成本
+
+    activity_costs/driver_totals 为 (S, A) 情景矩阵，返回 (S, P)
+    """
+    rates = np.divide(activity_costs, driver_totals,
+                      out=np.zeros_like(activity_costs), where=driver_totals != 0)
+    overhead = rates @ consumption.T
+    return np.divide(direct_costs + overhead, quantities,
+                     out=np.zeros_like(overhead), where=quantities != 0)
+
+
+def _triangular(rng, spread, size):
+    if spread <= 0:
+        return np.ones(size)
+    return rng.triangular(1 - spread, 1, 1 + spread, size)
+
+
+def _simulate_chunk(base, quantities, n, cost_spread, driver_spread, seed):
+    """生成 n 个情景并计算单位成本（进程池中执行的单元）"""
+    rng = np.random.default_rng(seed)
+    shape = (n, len(base.activity_costs))
+    costs = base.activity_costs * _triangular(rng, cost_spread, shape)
+    totals = base.driver_totals * _triangular(rng, driver_spread, shape)
+    return scenario_unit_costs(costs, totals, base.consumption, base.direct_costs, quantities)
+
+
+def simulate(base, quantities, n_scenarios=100_000, cost_spread=0.10, driver_spread=0.15,
+             seed=0, chunk_size=DEFAULT_CHUNK, n_workers=1, traditional_costs=None,
+             percentiles=DEFAULT_PERCENTILES):
+    """
+    蒙特卡洛模拟
+
+    base 为 abc_engine.ABCResult（基准情景），作业成本和动因总量分别在
+    ±cost_spread、±driver_spread 范围内按三角分布独立扰动，消耗量不变；
+    情景按 chunk_size 分块生成，每块使用独立的随机种子，
+    因此结果与 n_workers（>1 时用进程池并行）无关
+    """
+    quantities = np.asarray(quantities, dtype=float)
+    sizes = [chunk_size] * (n_scenarios // chunk_size)
+    if n_scenarios % chunk_size:
+        sizes.append(n_scenarios % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(base, quantities, n, cost_spread, driver_spread, s) for n, s in zip(sizes, seeds)]
+
+    if n_workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*a) for a in args]
+
+    return SimulationResult(
+        product_ids=list(base.product_ids),
+        unit_costs=np.concatenate(chunks) if chunks else np.empty((0, len(quantities))),
+        unit_prices=base.unit_prices,
+        base_unit_costs=base.unit_costs,
+        traditional_costs=None if traditional_costs is None else np.asarray(traditional_costs, float),
+        percentiles=tuple(percentiles),
+        cost_spread=cost_spread,
+        driver_spread=driver_spread,
+    )
+
+
+def sensitivity(base, quantities, cost_spread=0.10, driver_spread=0.15, activity_names=None):
+    """
+    单因素敏感性分析（龙卷风图）
+
+    每个作业的作业成本、动因总量各为一个因素，依次取 (1∓spread) 倍、其余保持基准，
+    全部高/低情景组成一个矩阵一次算出
+    """
+    quantities = np.asarray(quantities, dtype=float)
+    n_act = len(base.activity_costs)
+    names = list(activity_names) if activity_names is not None else [str(a) for a in base.activity_ids]
+    factors = [f"作业成本 {n}" for n in names] + [f"动因总量 {n}" for n in names]
+
+    eye = np.eye(n_act)
+    ones = np.ones((n_act, n_act))
+    # 因素顺序：先作业成本，后动因总量；每个因素一行
+    cost_low = np.vstack([ones - cost_spread * eye, ones])
+    cost_high = np.vstack([ones + cost_spread * eye, ones])
+    total_low = np.vstack([ones, ones - driver_spread * eye])
+    total_high = np.vstack([ones, ones + driver_spread * eye])
+
+    def run(cost_factor, total_factor):
+        return scenario_unit_costs(base.activity_costs * cost_factor, base.driver_totals * total_factor,
+                                   base.consumption, base.direct_costs, quantities)
+
+    return SensitivityResult(
+        product_ids=list(base.product_ids),
+        factors=factors,
+        low=run(cost_low, total_low),
+        high=run(cost_high, total_high),
+        base_unit_costs=base.unit_costs,
+        cost_spread=cost_spread,
+        driver_spread=driver_spread,
+    )
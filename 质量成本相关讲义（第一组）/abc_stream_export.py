@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 流式导出（大规模产品目录）
+基于 openpyxl 只写(write-only)工作表，逐行由生成器产出并直接写入磁盘，
+内存占用与产品数量无关；单元格统一引用 abc_styles 中的命名样式，
+表格位置和公式中的工作簿级名称与常规工作簿（abc_layout）一致
+（安装 lxml 后 openpyxl 的XML序列化明显更快）；
+StyledWriter 供其他只写工作表（轴承订单成本、供应商TCO等）复用
+"""
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+
+from abc_layout import WorkbookLayout
+from abc_sheets import define_names
+from abc_styles import (ABC_STYLES, DIRECT_COST_STYLES, PRODUCT_STYLES, WORKHOUR_STYLES,
+                        apply_style, register_named_styles)
+
+PRODUCT_HEADERS = ["产品编号", "产品型号", "产品名称", "产品类别", "季度产量(件)",
+                   "批次数", "平均批量", "单位售价(元)", "备注"]
+WORKHOUR_HEADERS = ["产品编号", "单件标准工时(h)", "单件机器小时(h)", "季度总人工(h)", "季度总机时(h)"]
+DIRECT_COST_HEADERS = ["产品编号", "直接材料(元)", "直接人工(元)", "直接成本合计(元)", "单位直接成本(元)"]
+ABC_HEADERS = ["产品编号", "产品型号", "产量(件)", "直接材料", "直接人工",
+               "ABC制造费用", "完全成本", "单位成本", "单位售价", "单位毛利", "毛利率"]
+
+
+class StyledWriter:
+    """
+    只写工作表的带样式单元格构建器，每张工作表一个
+
+    命名样式按名称查找代价较高，每个样式只解析一次，样式数组缓存在本对象中，
+    随工作表一起释放，不需要按工作表手动清理
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self._styles = {}
+
+    def cell(self, value, style):
+        cell = WriteOnlyCell(self.ws, value=value)
+        apply_style(cell, style, self._styles)
+        return cell
+
+    def row(self, values, styles):
+        return [self.cell(value, style) for value, style in zip(values, styles)]
+
+    def title(self, title):
+        return [self.cell(title, "标题")]
+
+    def header(self, headers):
+        return [self.cell(header, "表头") for header in headers]
+
+    def total(self, n_cols, sums):
+        """合计行：sums 为 {列号(从1开始): 值或公式}"""
+        return [self.cell("合计", "合计")] + [self.cell(sums.get(col), "合计") for col in range(2, n_cols + 1)]
+
+
+def basic_data_rows(ws, products, workhours, direct_costs):
+    """
+    "基础数据" 工作表的行生成器
+
+    依次产出产品信息表、工时统计表、直接成本汇总表，
+    products/workhours/direct_costs 可以是任意可迭代对象（含生成器），
+    三张表的行数必须相同（与常规路径一样按产品对齐）；
+    各表位置与 abc_layout.WorkbookLayout 一致，合计和跨行引用使用工作簿级名称
+    """
+    w = StyledWriter(ws)
+    # 产品信息表：第1行标题，第2行表头，第3行起数据
+    yield w.title("产品信息表")
+    yield w.header(PRODUCT_HEADERS)
+    n = 0
+    for product in products:
+        yield w.row(product, PRODUCT_STYLES)
+        n += 1
+    yield w.total(len(PRODUCT_HEADERS), {5: "=SUM(产品_产量)", 6: "=SUM(产品_批次数)"})
+    layout = WorkbookLayout(n, 0, 0)
+
+    # 工时统计表
+    yield []
+    yield w.title("产品工时统计表")
+    yield w.header(WORKHOUR_HEADERS)
+    for wh in workhours:
+        yield w.row(wh, WORKHOUR_STYLES)
+    yield w.total(len(WORKHOUR_HEADERS), {4: "=SUM(工时_总人工)", 5: "=SUM(工时_总机时)"})
+
+    # 直接成本汇总表
+    yield []
+    yield w.title("直接成本汇总表")
+    yield w.header(DIRECT_COST_HEADERS)
+    for prod_idx, (row, dc) in enumerate(zip(layout.direct_costs.rows, direct_costs), 1):
+        values = [dc[0], dc[1], dc[2], f"=B{row}+C{row}", f"=D{row}/INDEX(产品_产量,{prod_idx})"]
+        yield w.row(values, DIRECT_COST_STYLES)
+
+
+def abc_cost_rows(ws, products, direct_costs, result):
+    """
+    "产品成本(ABC)" 工作表的行生成器
+
+    result 为 abc_engine.ABCResult，ABC制造费用取自 result.overhead，
+    单位售价按名称 产品_单位售价 引用 "基础数据" 中同一产品
+    """
+    w = StyledWriter(ws)
+    yield w.title("产品完全成本汇总表（ABC方法）")
+    yield w.header(ABC_HEADERS)
+    row = 3
+    for prod_idx, (prod, dc, overhead) in enumerate(zip(products, direct_costs, result.overhead), 1):
+        values = [
+            prod[0], prod[1], prod[4], dc[1], dc[2], round(float(overhead), 2),
+            f"=D{row}+E{row}+F{row}",
+            f"=G{row}/C{row}",
+            f"=INDEX(产品_单位售价,{prod_idx})",
+            f"=I{row}-H{row}",
+            f"=J{row}/I{row}",
+        ]
+        yield w.row(values, ABC_STYLES)
+        row += 1
+    yield w.total(7, {col: f"=SUM({name})" for col, name in
+                      [(3, "ABC_产量"), (4, "ABC_直接材料"), (5, "ABC_直接人工"),
+                       (6, "ABC_制造费用"), (7, "ABC_完全成本")]})
+
+
+def write_streaming_workbook(output_file, products, workhours, direct_costs, result):
+    """
+    以只写模式生成 "基础数据" 和 "产品成本(ABC)" 两张工作表
+
+    products/direct_costs 在两张表中各遍历一次，传入生成器时请传可重复迭代的对象
+    （如列表或自定义可迭代类），workhours 只遍历一次
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    register_named_styles(wb)
+
+    ws_basic = wb.create_sheet("基础数据")
+    for width_col in "ABCDEFGHI":
+        ws_basic.column_dimensions[width_col].width = 15
+    for row in basic_data_rows(ws_basic, products, workhours, direct_costs):
+        ws_basic.append(row)
+
+    ws_abc = wb.create_sheet("产品成本(ABC)")
+    for width_col, width in zip("ABCDEFGHIJK", [10, 12, 12, 12, 12, 15, 15, 12, 12, 12, 10]):
+        ws_abc.column_dimensions[width_col].width = width
+    for row in abc_cost_rows(ws_abc, products, direct_costs, result):
+        ws_abc.append(row)
+
+    # 名称与常规工作簿相同（产品数取自分配结果）
+    layout = WorkbookLayout(len(result.overhead), 0, 0)
+    for block_name in ("products", "workhours", "direct_costs", "abc_costs"):
+        define_names(wb, layout, block_name)
+
+    wb.save(output_file)
+    return output_file
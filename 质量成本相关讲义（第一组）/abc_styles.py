@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 共享命名样式
+所有单元格样式以 NamedStyle 注册到工作簿一次，单元格只引用样式名，
+避免逐个单元格创建 Font/Border/Alignment 对象；style_range()/style_columns()
+一次调用把样式应用到整块矩形区域（样式只解析一次，之后各单元格复制同一个样式数组）
+"""
+
+from copy import copy
+
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.styles.styleable import StyleableObject
+
+HEADER_COLOR = "4472C4"
+INPUT_COLOR = "FFF2CC"
+CALC_COLOR = "DDEBF7"
+FONT_NAME = "微软雅黑"
+
+_thin = Side(style='thin')
+_border = Border(left=_thin, right=_thin, top=_thin, bottom=_thin)
+_right = Alignment(horizontal='right')
+_input_fill = PatternFill(start_color=INPUT_COLOR, end_color=INPUT_COLOR, fill_type="solid")
+_calc_fill = PatternFill(start_color=CALC_COLOR, end_color=CALC_COLOR, fill_type="solid")
+_normal_font = Font(name=FONT_NAME, size=10)
+
+# 样式名 -> NamedStyle 参数
+STYLE_SPECS = {
+    "标题": dict(font=Font(name=FONT_NAME, size=14, bold=True)),
+    "小标题": dict(font=Font(name=FONT_NAME, size=12, bold=True)),
+    "表头": dict(
+        font=Font(name=FONT_NAME, size=11, bold=True, color="FFFFFF"),
+        fill=PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type="solid"),
+        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        border=_border,
+    ),
+    "文本": dict(font=_normal_font, border=_border),
+    "输入区": dict(font=_normal_font, border=_border, fill=_input_fill),
+    "输入百分比": dict(font=_normal_font, border=_border, fill=_input_fill, alignment=_right,
+                    number_format='0.0%'),
+    "整数": dict(font=_normal_font, border=_border, alignment=_right, number_format='#,##0'),
+    "一位小数": dict(font=_normal_font, border=_border, alignment=_right, number_format='0.0'),
+    "数值": dict(font=_normal_font, border=_border, alignment=_right, number_format='#,##0.00'),
+    "单价": dict(font=_normal_font, border=_border, alignment=_right, number_format='0.00'),
+    "百分比": dict(font=_normal_font, border=_border, alignment=_right, number_format='0.0%'),
+    "计算整数": dict(font=_normal_font, border=_border, fill=_calc_fill, alignment=_right,
+                   number_format='#,##0'),
+    "计算区": dict(font=_normal_font, border=_border, fill=_calc_fill, alignment=_right,
+                 number_format='#,##0.00'),
+    "计算单价": dict(font=_normal_font, border=_border, fill=_calc_fill, alignment=_right,
+                   number_format='0.00'),
+    "计算百分比": dict(font=_normal_font, border=_border, fill=_calc_fill, alignment=_right,
+                    number_format='0.0%'),
+    "合计": dict(font=Font(name=FONT_NAME, size=10, bold=True), border=_border, fill=_calc_fill,
+               number_format='#,##0'),
+    "合计数值": dict(font=Font(name=FONT_NAME, size=10, bold=True), border=_border, fill=_calc_fill,
+                   number_format='#,##0.00'),
+}
+
+# 各表数据行的列样式（常规工作簿与流式导出共用，数字格式一致）
+PRODUCT_STYLES = ["文本", "文本", "文本", "文本", "整数", "整数", "整数", "数值", "文本"]
+WORKHOUR_STYLES = ["文本", "一位小数", "一位小数", "整数", "整数"]
+DIRECT_COST_STYLES = ["文本", "数值", "数值", "数值", "数值"]
+ABC_STYLES = ["文本", "文本", "数值", "数值", "数值", "数值",
+              "计算区", "计算单价", "单价", "计算单价", "计算百分比"]
+
+
+def register_named_styles(wb):
+    """向工作簿注册全部命名样式（已注册的跳过），返回样式名列表"""
+    existing = set(wb.named_styles)
+    for name, spec in STYLE_SPECS.items():
+        if name not in existing:
+            wb.add_named_style(NamedStyle(name=name, **spec))
+    return list(STYLE_SPECS)
+
+
+# openpyxl 3.0/3.1 的单元格把样式保存在私有属性 _style（各样式表的索引数组），
+# 复制同一个数组即引用同一样式组合，比每个单元格按名称查找命名样式快得多；
+# 升级 openpyxl 后该属性不存在时退回公开的 cell.style = 样式名
+_COPY_STYLE_ARRAY = "_style" in getattr(StyleableObject, "__slots__", ())
+
+
+def apply_style(cell, style, cache):
+    """把命名样式应用到单元格（含只写单元格）；cache 为 {样式名: 样式数组}，同一工作表内共用"""
+    array = cache.get(style)
+    if array is None or not _COPY_STYLE_ARRAY:
+        cell.style = style
+        if _COPY_STYLE_ARRAY:
+            cache[style] = copy(cell._style)
+    else:
+        cell._style = copy(array)
+
+
+def style_range(ws, style, min_row, min_col, max_row=None, max_col=None):
+    """把命名样式应用到矩形区域 min_row..max_row × min_col..max_col（默认单行/单列）"""
+    max_row = min_row if max_row is None else max_row
+    max_col = min_col if max_col is None else max_col
+    if max_row < min_row or max_col < min_col:
+        return
+    if style not in ws.parent.named_styles:
+        register_named_styles(ws.parent)
+    cache = {}
+    for row in range(min_row, max_row + 1):
+        for col in range(min_col, max_col + 1):
+            apply_style(ws.cell(row=row, column=col), style, cache)
+
+
+def style_columns(ws, styles, first_row, last_row, first_col=1):
+    """按列应用命名样式：styles[i] 应用到第 first_col + i 列的 first_row..last_row 行（None 跳过）"""
+    for offset, style in enumerate(styles):
+        if style is not None:
+            style_range(ws, style, first_row, first_col + offset, last_row, first_col + offset)
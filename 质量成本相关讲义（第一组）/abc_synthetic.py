@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 合成数据集
+按给定的产品数、作业数、制造费用科目数和生产订单（批次）数，用固定随机种子生成一套完整的模型输入，
+产品按标准品/定制品两类抽样（标准品大批量、低单价、工时短，定制品小批量、高单价、工时长），
+并保持模型的勾稽关系：
+
+  - 季度总人工/总机时 = 单件工时 × 季度产量，直接人工 = 季度总人工 × 小时工资率
+  - 平均批量 = 季度产量 / 批次数（取整），批次数合计 = 订单数
+  - 作业成本合计 = 制造费用总额（整数元，按最大余数法分配尾差）
+  - 动因消耗与产品属性一致（机器小时/产量类动因等于总机时/产量，批次级动因为批次数的固定倍数），
+    动因总量 = 各产品消耗量之和，成本动因表的作业成本与作业清单一致
+
+生成结果为 ABCDataset，可直接交给 compute_model()，也可用 write_csv() 写成 数据_*.csv 供生成器读取
+"""
+
+import csv
+import os
+
+import numpy as np
+
+from abc_data import SCHEMAS, ABCDataset, Table
+
+LEVELS = ("单位级", "批次级", "产品级", "设施级")
+# 各层级作业数的比例（与演示数据 5:6:4:5 相同）
+LEVEL_WEIGHTS = (5, 6, 4, 5)
+LEVEL_PREFIX = {"单位级": "A", "批次级": "B", "产品级": "C", "设施级": "D"}
+
+# 作业模板：(作业名称, 作业描述, 成本动因, 单位, 动因类型)；作业数多于模板时循环使用并加序号
+# 动因类型：机时 = 季度总机时 × 该作业的工序比例，机器小时 = 季度总机时，产量 = 季度产量，
+# 批次 = 批次数 × 固定倍数，产品 = 每个产品若干（定制品更多）
+ACTIVITY_TEMPLATES = {
+    "单位级": (("车削加工", "内外圈粗精车", "车削机时(h)", "元/h", "机时"),
+              ("磨削加工", "内外圈精密磨", "磨削机时(h)", "元/h", "机时"),
+              ("热处理", "淬火回火", "热处理件数", "元/件", "产量"),
+              ("超精研", "表面超精加工", "超精研机时(h)", "元/h", "机时"),
+              ("清洗去毛刺", "清洗处理", "清洗件数", "元/件", "产量")),
+    "批次级": (("设备换型调整", "工装更换调整", "换型次数", "元/次", "批次"),
+              ("首件检验", "批次首检", "首检次数", "元/次", "批次"),
+              ("生产准备", "领料排产", "生产批次", "元/批", "批次"),
+              ("物料搬运", "工序间搬运", "搬运批次", "元/批", "批次"),
+              ("批次质检", "巡检抽检", "巡检批次", "元/批", "批次"),
+              ("包装入库", "批次包装", "包装批次", "元/批", "批次")),
+    "产品级": (("工艺设计优化", "新品工艺", "工艺规程数", "元/份", "产品"),
+              ("专用工装制作", "专用工装", "专用工装数", "元/套", "产品"),
+              ("程序编制调试", "数控程序", "程序套数", "元/套", "产品"),
+              ("试产验证", "新品试产", "试产次数", "元/次", "产品")),
+    "设施级": (("车间管理", "车间运营管理", "产量(件)", "元/件", "产量"),
+              ("设备日常维护", "预防性维护", "机器小时", "元/h", "机器小时"),
+              ("质量体系维护", "质量管理", "产量(件)", "元/件", "产量"),
+              ("环境安全管理", "5S安全", "产量(件)", "元/件", "产量"),
+              ("能源动力供应", "水电气供应", "机器小时", "元/h", "机器小时")),
+}
+
+OVERHEAD_TEMPLATES = (
+    ("设备折旧费", "与设备使用相关"), ("电费", "与机器运行相关"), ("设备维修保养费", "与设备使用相关"),
+    ("工装模具折旧", "与批次相关"), ("车间管理人员工资", "设施级"), ("间接生产人员工资", "多种作业"),
+    ("质检部门费用", "与检验相关"), ("物料搬运费用", "与搬运相关"), ("车间办公及低耗", "设施级"),
+    ("水费蒸汽费", "与生产相关"), ("其他制造费用", "设施级"),
+)
+
+# 两类产品的抽样范围：(下限, 上限)；季度产量和平均批量按对数均匀分布，
+# 加成为单位售价相对 单位直接成本 × (1 + 制造费用率) 的倍数
+PRODUCT_PROFILES = {
+    "标准品": {"名称": ("圆锥滚子轴承", "深沟球轴承", "圆柱滚子轴承", "调心滚子轴承", "角接触球轴承"),
+            "季度产量": (5000, 80000), "平均批量": (300, 3000), "单件标准工时": (0.2, 0.8),
+            "机时倍数": (1.5, 3.0), "单件材料": (15, 60), "加成": (0.95, 1.3), "产品级动因": (0, 1)},
+    "定制品": {"名称": ("高端定制轴承", "特种工况轴承", "精密主轴轴承", "风电轴承", "铁路轴承"),
+            "季度产量": (100, 3000), "平均批量": (10, 100), "单件标准工时": (2.0, 6.0),
+            "机时倍数": (1.5, 2.0), "单件材料": (100, 1500), "加成": (1.0, 1.6), "产品级动因": (1, 4)},
+}
+WAGE_RATE = 50.0           # 元/小时
+OVERHEAD_RATIO = (0.7, 1.1)  # 制造费用总额 / 直接成本合计
+
+
+def _split_integer(total, weights):
+    """把整数 total 按权重分成非负整数，合计恰好为 total（最大余数法）"""
+    shares = total * np.asarray(weights, dtype=float) / np.sum(weights)
+    parts = np.floor(shares).astype(np.int64)
+    remainder = int(total - parts.sum())
+    if remainder:
+        parts[np.argsort(parts - shares, kind="stable")[:remainder]] += 1
+    return parts
+
+
+def _names(templates, n, start=0):
+    """循环取模板，第二轮起名称加序号"""
+    return [(templates[(start + i) % len(templates)], (start + i) // len(templates)) for i in range(n)]
+
+
+def _suffix(text, round_no):
+    return text if round_no == 0 else f"{text}{round_no + 1}"
+
+
+def _activity_levels(n_activities):
+    """各层级作业数：按 LEVEL_WEIGHTS 分配，作业数不少于4个时每个层级至少1个"""
+    if n_activities < len(LEVELS):
+        return np.bincount(np.arange(n_activities), minlength=len(LEVELS))
+    return _split_integer(n_activities - len(LEVELS), LEVEL_WEIGHTS) + 1
+
+
+def generate(n_products, n_activities=20, n_overhead=11, n_orders=None, custom_share=0.3, seed=0):
+    """
+    生成一套合成输入数据，返回 ABCDataset
+
+    n_orders 为季度生产订单（批次）总数，不小于产品数；为 None 时按各产品的典型批量推算；
+    custom_share 为定制品占产品数的比例；相同参数和 seed 生成的数据完全相同
+    """
+    if n_products < 1 or n_activities < 1 or n_overhead < 1:
+        raise ValueError("产品数、作业数、制造费用科目数都至少为1")
+    if not 0 <= custom_share <= 1:
+        raise ValueError(f"定制品比例应在0~1之间: {custom_share}")
+    if n_orders is not None and n_orders < n_products:
+        raise ValueError(f"订单数({n_orders})不能少于产品数({n_products})：每个产品至少一个批次")
+    rng = np.random.default_rng(seed)
+    P = n_products
+
+    # ---------- 产品 ----------
+    custom = np.zeros(P, dtype=bool)
+    custom[rng.choice(P, int(round(P * custom_share)), replace=False)] = True
+    categories = np.where(custom, "定制品", "标准品")
+
+    def draw(key, log=False):
+        low = np.where(custom, PRODUCT_PROFILES["定制品"][key][0], PRODUCT_PROFILES["标准品"][key][0])
+        high = np.where(custom, PRODUCT_PROFILES["定制品"][key][1], PRODUCT_PROFILES["标准品"][key][1])
+        if log:
+            return np.exp(rng.uniform(np.log(low), np.log(high)))
+        return rng.uniform(low, high)
+
+    quantity = np.round(draw("季度产量", log=True)).astype(np.int64)
+    target_batch = draw("平均批量", log=True)
+    if n_orders is None:
+        batches = np.maximum(np.round(quantity / target_batch), 1).astype(np.int64)
+    else:
+        batches = 1 + _split_integer(n_orders - P, quantity / target_batch)
+    quantity = np.maximum(quantity, batches)
+    avg_batch = np.round(quantity / batches).astype(np.int64)
+
+    labor_h = np.round(draw("单件标准工时"), 1)
+    machine_h = np.round(labor_h * draw("机时倍数"), 1)
+    total_labor = labor_h * quantity
+    total_machine = machine_h * quantity
+    material = np.round(quantity * draw("单件材料"))
+    labor_cost = np.round(total_labor * WAGE_RATE)
+    overhead_ratio = rng.uniform(*OVERHEAD_RATIO)
+    price = np.round((material + labor_cost) / quantity * (1 + overhead_ratio) * draw("加成"), 2)
+
+    product_ids = np.array([f"P{i + 1:0{max(3, len(str(P)))}d}" for i in range(P)])
+    name_idx = rng.integers(0, 5, P)
+    names = np.where(custom, np.array(PRODUCT_PROFILES["定制品"]["名称"])[name_idx],
+                     np.array(PRODUCT_PROFILES["标准品"]["名称"])[name_idx])
+    models = np.char.add(np.where(custom, "定制-", "SY"), np.char.zfill((np.arange(P) + 1).astype(str), 5))
+    products = Table("products", {
+        "产品编号": product_ids, "产品型号": models, "产品名称": names, "产品类别": categories,
+        "季度产量": quantity, "批次数": batches, "平均批量": avg_batch, "单位售价": price,
+        "备注": np.full(P, "合成数据"),
+    })
+    workhours = Table("workhours", {
+        "产品编号": product_ids, "单件标准工时": labor_h, "单件机器小时": machine_h,
+        "季度总人工": total_labor, "季度总机时": total_machine,
+    })
+    direct_costs = Table("direct_costs", {"产品编号": product_ids, "直接材料": material, "直接人工": labor_cost})
+
+    # ---------- 制造费用与作业 ----------
+    pool = int(round((material.sum() + labor_cost.sum()) * overhead_ratio))
+    pool = max(pool, n_overhead, n_activities)
+    overhead_names = _names(OVERHEAD_TEMPLATES, n_overhead)
+    overhead = Table("overhead", {
+        "费用编号": np.array([f"C{i + 1:02d}" for i in range(n_overhead)]),
+        "费用科目": np.array([_suffix(t[0], r) for t, r in overhead_names]),
+        "季度发生额": _split_integer(pool, rng.uniform(0.3, 1.0, n_overhead)).astype(float),
+        "归属性质": np.array([t[1] for t, _ in overhead_names]),
+    })
+
+    rows = []
+    for level, count in zip(LEVELS, _activity_levels(n_activities)):
+        for k, (template, round_no) in enumerate(_names(ACTIVITY_TEMPLATES[level], count)):
+            rows.append((f"{LEVEL_PREFIX[level]}{k + 1:02d}", level, template, round_no))
+    activity_costs = _split_integer(pool, rng.uniform(0.3, 1.0, len(rows))).astype(float)
+
+    # 动因消耗：产品 × 作业
+    consumption = np.zeros((P, len(rows)))
+    for a, (_, level, (_, _, _, _, kind), _) in enumerate(rows):
+        if kind == "机时":
+            consumption[:, a] = np.round(total_machine * rng.uniform(0.2, 0.6) * rng.uniform(0.8, 1.2, P))
+        elif kind == "机器小时":
+            consumption[:, a] = total_machine
+        elif kind == "产量":
+            consumption[:, a] = quantity
+        elif kind == "批次":
+            consumption[:, a] = batches * rng.integers(1, 3)
+        else:
+            low = np.where(custom, PRODUCT_PROFILES["定制品"]["产品级动因"][0],
+                           PRODUCT_PROFILES["标准品"]["产品级动因"][0])
+            high = np.where(custom, PRODUCT_PROFILES["定制品"]["产品级动因"][1],
+                            PRODUCT_PROFILES["标准品"]["产品级动因"][1])
+            consumption[:, a] = rng.integers(low, high + 1)
+        # 动因总量为0的作业无法计算分配率，至少给一个产品记1
+        if consumption[:, a].sum() == 0:
+            consumption[rng.integers(P), a] = 1
+
+    activity_ids = np.array([r[0] for r in rows])
+    activity_names = np.array([_suffix(r[2][0], r[3]) for r in rows])
+    activities = Table("activities", {
+        "作业编号": activity_ids, "作业名称": activity_names, "作业层级": np.array([r[1] for r in rows]),
+        "作业描述": np.array([r[2][1] for r in rows]), "作业成本": activity_costs,
+    })
+    cost_drivers = Table("cost_drivers", {
+        "作业编号": activity_ids, "作业名称": activity_names, "成本动因": np.array([r[2][2] for r in rows]),
+        "动因总量": consumption.sum(axis=0), "作业成本": activity_costs,
+        "单位": np.array([r[2][3] for r in rows]),
+    })
+    consumption_table = Table("consumption", {
+        "产品编号": np.repeat(product_ids, len(rows)),
+        "作业编号": np.tile(activity_ids, P),
+        "消耗量": consumption.ravel(),
+    })
+    return ABCDataset(products, workhours, direct_costs, overhead, activities, cost_drivers, consumption_table)
+
+
+def _format(values, kind):
+    """一列写CSV的文本：浮点数用最短的精确表示，整数值不带小数点"""
+    if kind == "str":
+        return values.astype(str).tolist()
+    if kind == "int":
+        return values.astype(np.int64).astype(str).tolist()
+    return [str(int(v)) if v.is_integer() else repr(v) for v in values.astype(float).tolist()]
+
+
+def write_csv(dataset, data_dir):
+    """把数据集中的各表写成 数据_*.csv（文件名和列顺序与 abc_data.SCHEMAS 相同），返回文件列表"""
+    os.makedirs(data_dir, exist_ok=True)
+    files = []
+    for name, schema in SCHEMAS.items():
+        table = getattr(dataset, name)
+        if table is None:
+            continue
+        path = os.path.join(data_dir, schema.file_name)
+        columns = [_format(table[c.name], c.kind) for c in schema.columns]
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow([c.name for c in schema.columns])
+            writer.writerows(zip(*columns))
+        files.append(path)
+    return files
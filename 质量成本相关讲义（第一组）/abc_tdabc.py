@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 时间驱动作业成本法（TDABC）
+资源池按 季度成本 / 实际产能(小时) 得到产能成本率；各作业的时间方程由若干项组成，
+每项 = 单位时间(分钟) × 计量基础（件、批、批量、产品、机器小时、人工小时），
+可限定只对某一产品类别（如 定制品）生效，作为该类产品的增量时间。
+全部 产品 × 时间方程项 一次按矩阵求值，得到各产品在各作业、各资源池上的耗时，
+按产能成本率计入产品；资源池未用完的产能单独列为闲置产能成本，不分摊到产品
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from abc_data import SCHEMAS, DataValidationError, index_of
+from abc_engine import margins, unit_costs
+
+MINUTES_PER_HOUR = 60.0
+
+# 计量基础 -> 各产品的基础量（按产品信息表顺序）
+BASES = {
+    "产品": lambda ds: np.ones(len(ds.products)),
+    "件": lambda ds: ds.products["季度产量"].astype(float),
+    "批": lambda ds: ds.products["批次数"].astype(float),
+    # 批量项：每批耗时随批量递增，合计 = 批次数 × 平均批量
+    "批量": lambda ds: ds.products["批次数"] * ds.products["平均批量"].astype(float),
+    "机器小时": lambda ds: ds.workhours["季度总机时"].astype(float),
+    "人工小时": lambda ds: ds.workhours["季度总人工"].astype(float),
+}
+# 不随产量变化的计量基础（产品数不变，其余按批量不变、批次数随产量同比例变化）
+FIXED_BASES = ("产品",)
+
+
+@dataclass
+class TDABCResult:
+    """TDABC结果：minutes/costs 为 (P, A)，pool_minutes 为 (P, R)"""
+    product_ids: list
+    activity_ids: list
+    pool_ids: list
+    pool_names: list
+    pool_costs: np.ndarray       # (R,) 资源池季度成本
+    capacity_hours: np.ndarray   # (R,) 实际产能（小时）
+    rates: np.ndarray            # (R,) 产能成本率（元/小时）
+    minutes: np.ndarray          # (P, A) 各产品在各作业上的耗时（分钟）
+    pool_minutes: np.ndarray     # (P, R) 各产品占用各资源池的时间（分钟）
+    costs: np.ndarray            # (P, A) 各产品各作业的成本
+    overhead: np.ndarray         # (P,) TDABC制造费用
+    unit_costs: np.ndarray       # (P,) 单位成本
+    margin_rates: np.ndarray     # (P,) 毛利率
+
+    @property
+    def used_hours(self):
+        return self.pool_minutes.sum(axis=0) / MINUTES_PER_HOUR
+
+    @property
+    def unused_hours(self):
+        """闲置产能（小时），为负表示需求超出实际产能"""
+        return self.capacity_hours - self.used_hours
+
+    @property
+    def unused_costs(self):
+        return self.unused_hours * self.rates
+
+    @property
+    def utilization(self):
+        return np.divide(self.used_hours, self.capacity_hours,
+                         out=np.zeros_like(self.capacity_hours), where=self.capacity_hours != 0)
+
+    @property
+    def activity_costs(self):
+        """各作业计入产品的成本"""
+        return self.costs.sum(axis=0)
+
+
+@dataclass
+class TimeEquations:
+    """时间方程的各项（T 项）：作业、资源池、计量基础、条件均为下标"""
+    activity_idx: np.ndarray   # (T,)
+    pool_idx: np.ndarray       # (T,)
+    basis_idx: np.ndarray      # (T,) BASES 中的序号
+    condition_idx: np.ndarray  # (T,) conditions 中的序号，0 表示不限
+    minutes: np.ndarray        # (T,) 单位时间（分钟）
+    conditions: list           # ["", 产品类别, ...]
+
+
+def parse_equations(dataset):
+    """把 数据_时间方程.csv 转成下标数组，编号或计量基础不存在时报错"""
+    table = dataset.time_equations
+    label = SCHEMAS["time_equations"].file_name
+    basis_names = list(BASES)
+    unknown = sorted(set(table["计量基础"].tolist()) - set(basis_names))
+    if unknown:
+        raise DataValidationError(f"{label} 计量基础不支持: {unknown}（可选 {'/'.join(basis_names)}）")
+    conditions = [""] + sorted(set(table["条件"].tolist()) - {""})
+    unknown = sorted(set(conditions[1:]) - set(dataset.products["产品类别"].tolist()))
+    if unknown:
+        raise DataValidationError(f"{label} 条件中的产品类别不存在: {unknown}")
+    return TimeEquations(
+        activity_idx=index_of(dataset.activity_ids, table["作业编号"], f"{label} 作业编号"),
+        pool_idx=index_of(dataset.capacity_pools["资源池编号"], table["资源池编号"], f"{label} 资源池编号"),
+        basis_idx=np.array([basis_names.index(b) for b in table["计量基础"].tolist()], dtype=int),
+        condition_idx=np.array([conditions.index(c) for c in table["条件"].tolist()], dtype=int),
+        minutes=table["单位时间"].astype(float),
+        conditions=conditions,
+    )
+
+
+def evaluate(equations, bases, categories):
+    """
+    求值全部时间方程项：bases 为 (P, K) 基础量，categories 为 (P,) 产品类别
+
+    返回 (P, T) 各产品在各项上的耗时（分钟）
+    """
+    # 条件矩阵 (P, C)：第0列为不限
+    match = np.column_stack([np.ones(len(categories), dtype=bool)]
+                            + [categories == c for c in equations.conditions[1:]])
+    return bases[:, equations.basis_idx] * match[:, equations.condition_idx] * equations.minutes
+
+
+def _one_hot(index, n):
+    matrix = np.zeros((len(index), n))
+    matrix[np.arange(len(index)), index] = 1.0
+    return matrix
+
+
+def allocate(dataset, capacity_hours=None, direct_costs=None, volume=1.0):
+    """
+    按时间方程计算各产品的TDABC成本
+
+    capacity_hours 可覆盖各资源池的实际产能（(R,) 数组，用于产能规划试算）；
+    direct_costs 为 (P,) 直接成本，缺省取直接材料 + 直接人工；
+    volume 为产量系数（标量或 (P,) 数组），件/批/机时等基础量和直接成本同比例变化
+    """
+    pools = dataset.capacity_pools
+    equations = parse_equations(dataset)
+    n_products, n_activities, n_pools = len(dataset.products), len(dataset.activities), len(pools)
+
+    pool_costs = pools["季度成本"].astype(float)
+    capacity = pools["实际产能"].astype(float) if capacity_hours is None else np.asarray(capacity_hours, float)
+    rates = np.divide(pool_costs, capacity, out=np.zeros_like(pool_costs), where=capacity != 0)
+
+    volume = np.broadcast_to(np.asarray(volume, dtype=float), (n_products,))
+    bases = np.column_stack([fn(dataset) * (1.0 if name in FIXED_BASES else volume)
+                             for name, fn in BASES.items()])
+    term_minutes = evaluate(equations, bases, dataset.products["产品类别"])
+    to_activity = _one_hot(equations.activity_idx, n_activities)
+    minutes = term_minutes @ to_activity
+    pool_minutes = term_minutes @ _one_hot(equations.pool_idx, n_pools)
+    costs = (term_minutes * (rates[equations.pool_idx] / MINUTES_PER_HOUR)) @ to_activity
+
+    overhead = costs.sum(axis=1)
+    if direct_costs is None:
+        direct_costs = dataset.direct_costs["直接材料"] + dataset.direct_costs["直接人工"]
+    quantities = dataset.products["季度产量"] * volume
+    units = unit_costs(np.asarray(direct_costs, dtype=float) * volume + overhead, quantities)
+    _, margin_rates = margins(units, dataset.products["单位售价"].astype(float))
+    return TDABCResult(
+        product_ids=dataset.product_ids.tolist(),
+        activity_ids=dataset.activity_ids.tolist(),
+        pool_ids=pools["资源池编号"].tolist(),
+        pool_names=pools["资源池名称"].tolist(),
+        pool_costs=pool_costs,
+        capacity_hours=capacity,
+        rates=rates,
+        minutes=minutes,
+        pool_minutes=pool_minutes,
+        costs=costs,
+        overhead=overhead,
+        unit_costs=units,
+        margin_rates=margin_rates,
+    )
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+轴承供应链成本核算 - 订单级成本核算
+读取 轴承供应链成本核算模型系统/ 下的订单、材料消耗、工序消耗、原材料、
+作业和分摊费率表（与 abc_data 相同的按块解析、按列存储和磁盘缓存），
+按编号建立索引后用向量化连接计算每张订单的材料成本、工序成本和作业成本，
+消耗明细可达数百万行
+"""
+
+import csv
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from abc_data import Column, TableSchema, index_of, load_table
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "轴承供应链成本核算模型系统")
+EXCEL_MAX_ROWS = 1_048_576
+
+SCHEMAS = {
+    "orders": TableSchema("sample_production_orders.csv", key="order_id", columns=(
+        Column("order_id"), Column("product_id"), Column("quantity", "int", True),
+        Column("batch_number"), Column("start_date"), Column("end_date"),
+        Column("status"), Column("priority"),
+    )),
+    "products": TableSchema("bearing_products.csv", key="product_id", required=False, columns=(
+        Column("product_id"), Column("product_name"), Column("cost_price", "float", True),
+        Column("sales_price", "float", True),
+    )),
+    "materials": TableSchema("raw_materials.csv", key="material_id", columns=(
+        Column("material_id"), Column("material_name"), Column("unit"),
+        Column("unit_cost_yuan", "float", True),
+    )),
+    "material_consumption": TableSchema("material_consumption_details.csv", columns=(
+        Column("order_id"), Column("material_id"), Column("total_consumption", "float", True),
+    )),
+    "processes": TableSchema("production_processes.csv", key="process_id", columns=(
+        Column("process_id"), Column("process_name"), Column("department"),
+        Column("standard_time_min", "float", True), Column("resource_cost_yuan", "float", True),
+    )),
+    "process_consumption": TableSchema("process_consumption_details.csv", columns=(
+        Column("order_id"), Column("process_id"), Column("actual_duration_min", "float", True),
+        Column("resource_cost_yuan", "float", True), Column("energy_consumption_kwh", "float", True),
+    )),
+    "activities": TableSchema("activities.csv", key="activity_id", columns=(
+        Column("activity_id"), Column("activity_name"), Column("related_process"),
+        Column("cost_driver"), Column("measurement_unit"),
+    )),
+    "rates": TableSchema("cost_allocation_rates.csv", key="allocation_id", columns=(
+        Column("allocation_id"), Column("cost_pool"), Column("activity_id"),
+        Column("rate_yuan", "float", True),
+    )),
+}
+
+# 作业动因计量单位 -> (动因量来源, 换算系数)
+# "count" 为每条工序消耗记录计1次，"quantity" 为订单数量，其余为工序消耗明细的列；
+# 吨、万元、公里等无法从工序消耗明细得到的动因不计入，列在结果的 unmeasured 中
+DRIVER_SOURCES = {
+    "次": ("count", 1.0),
+    "批": ("count", 1.0),
+    "套": ("quantity", 1.0),
+    "小时": ("actual_duration_min", 1 / 60),
+    "千瓦时": ("energy_consumption_kwh", 1.0),
+}
+
+ORDER_HEADERS = ["订单编号", "产品编号", "产品名称", "数量", "材料成本", "工序成本", "作业成本",
+                 "总成本", "单位成本", "标准成本价", "单位成本差异"]
+
+
+@dataclass
+class BearingDataset:
+    """订单级核算的全部输入表（products 可缺省）"""
+    orders: object
+    materials: object
+    material_consumption: object
+    processes: object
+    process_consumption: object
+    activities: object
+    rates: object
+    products: object = None
+
+
+@dataclass
+class OrderCostResult:
+    """订单级核算结果：activity_costs/driver_quantities 为 (订单数, 作业数) 矩阵"""
+    order_ids: np.ndarray
+    product_ids: np.ndarray
+    quantities: np.ndarray
+    activity_ids: np.ndarray
+    activity_names: np.ndarray
+    activity_rates: np.ndarray
+    material_costs: np.ndarray
+    process_costs: np.ndarray
+    process_minutes: np.ndarray
+    driver_quantities: np.ndarray
+    activity_costs: np.ndarray
+    product_names: np.ndarray = None
+    standard_costs: np.ndarray = None
+    unmeasured: tuple = ()
+
+    @property
+    def activity_totals(self):
+        """(订单数,) 作业成本合计"""
+        return self.activity_costs.sum(axis=1)
+
+    @property
+    def total_costs(self):
+        return self.material_costs + self.process_costs + self.activity_totals
+
+    @property
+    def unit_costs(self):
+        q = self.quantities.astype(float)
+        return np.divide(self.total_costs, q, out=np.zeros_like(q), where=q != 0)
+
+    def rows(self):
+        """按 ORDER_HEADERS 顺序逐行产出 Python 原生类型（供写CSV/Excel使用）"""
+        names = self.product_names if self.product_names is not None else [""] * len(self.order_ids)
+        standard = self.standard_costs
+        columns = [self.order_ids.tolist(), self.product_ids.tolist(), list(names),
+                   self.quantities.tolist(), np.round(self.material_costs, 2).tolist(),
+                   np.round(self.process_costs, 2).tolist(), np.round(self.activity_totals, 2).tolist(),
+                   np.round(self.total_costs, 2).tolist(), np.round(self.unit_costs, 4).tolist()]
+        if standard is None:
+            columns += [[None] * len(self.order_ids)] * 2
+        else:
+            columns += [standard.tolist(), np.round(self.unit_costs - standard, 4).tolist()]
+        return zip(*columns)
+
+
+def load_bearing_dataset(data_dir=DEFAULT_DATA_DIR, cache=True):
+    """读取订单级核算的全部输入表"""
+    tables = {name: load_table(name, data_dir, cache, schemas=SCHEMAS) for name in SCHEMAS}
+    return BearingDataset(**tables)
+
+
+def _group_sum(index, weights, n):
+    """按整数索引分组求和（长度 n）"""
+    return np.bincount(index, weights=weights, minlength=n).astype(float)
+
+
+def _expand_join(left_keys, right_keys):
+    """
+    一对多连接：left_keys 为左表每行的键序号，right_keys 为右表每行的键序号，
+    返回所有匹配的 (左表行号, 右表行号)，按左表行号排列
+    """
+    n_keys = int(max(left_keys.max(initial=-1), right_keys.max(initial=-1))) + 1
+    right_order = np.argsort(right_keys, kind="stable")
+    counts = np.bincount(right_keys, minlength=n_keys)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    per_left = counts[left_keys]
+    left_rows = np.repeat(np.arange(len(left_keys)), per_left)
+    offsets = np.arange(len(left_rows)) - np.repeat(np.cumsum(per_left) - per_left, per_left)
+    right_rows = right_order[starts[left_keys[left_rows]] + offsets]
+    return left_rows, right_rows
+
+
+def compute_order_costs(dataset):
+    """
+    计算每张订单的材料、工序和作业成本
+
+    材料成本 = Σ 消耗总量 × 原材料单价；工序成本 = Σ 工序消耗记录的资源成本；
+    作业成本 = Σ 作业动因量 × 分摊费率，作业经 related_process 对应到工序，
+    动因量按计量单位从该订单的工序消耗记录取得（见 DRIVER_SOURCES）
+    """
+    orders = dataset.orders
+    order_ids = orders["order_id"]
+    quantities = orders["quantity"]
+    n_orders = len(orders)
+
+    mc = dataset.material_consumption
+    mc_order = index_of(order_ids, mc["order_id"], f"{SCHEMAS['material_consumption'].file_name} order_id")
+    mc_material = index_of(dataset.materials["material_id"], mc["material_id"],
+                           f"{SCHEMAS['material_consumption'].file_name} material_id")
+    unit_costs = dataset.materials["unit_cost_yuan"][mc_material]
+    material_costs = _group_sum(mc_order, mc["total_consumption"] * unit_costs, n_orders)
+
+    pc = dataset.process_consumption
+    process_ids = dataset.processes["process_id"]
+    pc_order = index_of(order_ids, pc["order_id"], f"{SCHEMAS['process_consumption'].file_name} order_id")
+    pc_process = index_of(process_ids, pc["process_id"],
+                          f"{SCHEMAS['process_consumption'].file_name} process_id")
+    process_costs = _group_sum(pc_order, pc["resource_cost_yuan"], n_orders)
+    process_minutes = _group_sum(pc_order, pc["actual_duration_min"], n_orders)
+
+    activities = dataset.activities
+    activity_ids = activities["activity_id"]
+    n_act = len(activities)
+    act_process = index_of(process_ids, activities["related_process"],
+                           f"{SCHEMAS['activities'].file_name} related_process")
+    rate_act = index_of(activity_ids, dataset.rates["activity_id"],
+                        f"{SCHEMAS['rates'].file_name} activity_id")
+    activity_rates = _group_sum(rate_act, dataset.rates["rate_yuan"], n_act)
+
+    # 每个作业的动因量来源：来源序号 0=count, 1=quantity, 2..=明细列；-1 为无法计量
+    units = activities["measurement_unit"]
+    source_names = ["count", "quantity"] + sorted(
+        {src for src, _ in DRIVER_SOURCES.values()} - {"count", "quantity"})
+    act_source = np.full(n_act, -1)
+    act_scale = np.zeros(n_act)
+    for unit, (source, scale) in DRIVER_SOURCES.items():
+        mask = units == unit
+        act_source[mask] = source_names.index(source)
+        act_scale[mask] = scale
+    unmeasured = tuple(activity_ids[act_source < 0].tolist())
+
+    # 工序消耗记录 ⋈ 作业（按工序连接），逐对取动因量后按 (订单, 作业) 汇总
+    rec, act = _expand_join(pc_process, act_process)
+    cell = pc_order[rec] * n_act + act
+    pair_driver = np.zeros(len(rec))
+    for i, name in enumerate(source_names):
+        mask = act_source[act] == i
+        if name == "count":
+            pair_driver[mask] = 1.0
+        elif name != "quantity":
+            pair_driver[mask] = pc[name][rec[mask]]
+    pair_driver *= act_scale[act]
+    driver_quantities = _group_sum(cell, pair_driver, n_orders * n_act).reshape(n_orders, n_act)
+    # 按订单数量计量的作业（如检测套数）：订单执行过对应工序即计订单数量，同一订单只计一次
+    per_order = act_source == source_names.index("quantity")
+    if per_order.any():
+        executed = _group_sum(cell, None, n_orders * n_act).reshape(n_orders, n_act) > 0
+        driver_quantities[:, per_order] = executed[:, per_order] * quantities[:, None].astype(float)
+    activity_costs = driver_quantities * activity_rates
+
+    product_names = standard_costs = None
+    if dataset.products is not None:
+        prod_idx = index_of(dataset.products["product_id"], orders["product_id"],
+                            f"{SCHEMAS['orders'].file_name} product_id")
+        product_names = dataset.products["product_name"][prod_idx]
+        standard_costs = dataset.products["cost_price"][prod_idx]
+
+    return OrderCostResult(
+        order_ids=order_ids,
+        product_ids=orders["product_id"],
+        quantities=quantities,
+        activity_ids=activity_ids,
+        activity_names=activities["activity_name"],
+        activity_rates=activity_rates,
+        material_costs=material_costs,
+        process_costs=process_costs,
+        process_minutes=process_minutes,
+        driver_quantities=driver_quantities,
+        activity_costs=activity_costs,
+        product_names=product_names,
+        standard_costs=standard_costs,
+        unmeasured=unmeasured,
+    )
+
+
+# ========== 输出 ==========
+def write_csv(result, output_file):
+    """订单成本汇总写入CSV（UTF-8 BOM，Excel可直接打开）"""
+    with open(output_file, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(ORDER_HEADERS)
+        writer.writerows(result.rows())
+    return output_file
+
+
+def write_xlsx(result, output_file):
+    """
+    以只写模式生成 "订单成本" 和 "作业成本明细" 两张工作表
+
+    数值全部为计算结果（不含公式），订单数超过Excel行数上限时请改用CSV
+    """
+    if len(result.order_ids) + 3 > EXCEL_MAX_ROWS:
+        raise ValueError(f"订单数 {len(result.order_ids):,} 超过Excel行数上限，请输出CSV")
+
+    import openpyxl  # 只写Excel时才导入
+
+    from abc_stream_export import StyledWriter
+    from abc_styles import register_named_styles
+
+    wb = openpyxl.Workbook(write_only=True)
+    register_named_styles(wb)
+
+    ws = wb.create_sheet("订单成本")
+    w = StyledWriter(ws)
+    for col, width in zip("ABCDEFGHIJK", [14, 10, 26, 10, 14, 14, 14, 14, 12, 12, 12]):
+        ws.column_dimensions[col].width = width
+    ws.append(w.title("订单成本汇总表"))
+    ws.append(w.header(ORDER_HEADERS))
+    styles = ["文本", "文本", "文本", "整数", "数值", "数值", "数值", "计算区", "计算单价", "单价", "计算单价"]
+    for row in result.rows():
+        ws.append(w.row(row, styles))
+    totals = [result.quantities.sum(), result.material_costs.sum(), result.process_costs.sum(),
+              result.activity_totals.sum(), result.total_costs.sum()]
+    ws.append(w.total(8, {col: round(float(v), 2) for col, v in enumerate(totals, 4)}))
+
+    ws_act = wb.create_sheet("作业成本明细")
+    w_act = StyledWriter(ws_act)
+    ws_act.column_dimensions["A"].width = 14
+    ws_act.append(w_act.title("订单作业成本明细（动因量 × 分摊费率）"))
+    ws_act.append(w_act.header(["订单编号"] + [f"{a} {n}" for a, n in
+                                            zip(result.activity_ids, result.activity_names)]))
+    ws_act.append(w_act.row(["分摊费率"] + result.activity_rates.tolist(),
+                            ["文本"] + ["单价"] * len(result.activity_ids)))
+    act_styles = ["文本"] + ["数值"] * len(result.activity_ids)
+    for order_id, costs in zip(result.order_ids.tolist(), np.round(result.activity_costs, 2).tolist()):
+        ws_act.append(w_act.row([order_id] + costs, act_styles))
+
+    wb.save(output_file)
+    return output_file
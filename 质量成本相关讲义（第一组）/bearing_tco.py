@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+轴承供应链成本核算 - 供应商总拥有成本（TCO）
+按培训模块 "总成本与价值采购" 的冰山模型，每单位物料的TCO由若干成本项组成：
+  采购价格 + 取得成本（运输、关税、检验）+ 质量损失 + 交付风险 + 资金占用（平均库存金额 × 资金成本率）
+全部 供应商 × 物料 组合的各成本项按 (成本项, S, M) 矩阵一次算出（不能供货的组合为 nan），
+TCO = 权重 · 成本项矩阵，调整权重后只需重做一次加权和即可重新排名；
+切换供货来源的情景以 (情景数, M) 的供应商下标矩阵表示，一次算出各情景的期间TCO
+"""
+
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from abc_data import CHUNK_ROWS, Column, TableSchema, index_of, iter_csv, load_table
+from bearing_costing import DEFAULT_DATA_DIR, EXCEL_MAX_ROWS, SCHEMAS as COSTING_SCHEMAS, _group_sum
+
+SCHEMAS = {
+    "suppliers": TableSchema("suppliers.csv", key="supplier_id", columns=(
+        Column("supplier_id"), Column("supplier_name"), Column("supplier_type"), Column("rating"),
+        Column("reliability_score", "float", True),
+    )),
+    "materials": TableSchema("raw_materials.csv", key="material_id", columns=(
+        Column("material_id"), Column("material_name"), Column("material_type"), Column("unit"),
+        Column("unit_cost_yuan", "float", True), Column("inventory_quantity", "float", True),
+        Column("supplier_id"),
+    )),
+    # 备选报价：同一物料可由多家供应商报价；未列出的现供货组合按 raw_materials.csv 的单价
+    "quotes": TableSchema("supplier_quotes.csv", required=False, columns=(
+        Column("supplier_id"), Column("material_id"), Column("unit_cost_yuan", "float", True),
+        Column("lead_time_days", "float", True), Column("logistics_rate", "float", True),
+    )),
+}
+CONSUMPTION_SCHEMA = COSTING_SCHEMAS["material_consumption"]
+
+# 供应商评级 -> 交付风险成本率（延误、断供的预期损失占采购价格的比例）
+RATING_RISK = {"一级": 0.01, "二级": 0.03, "三级": 0.06}
+DEFAULT_RATING_RISK = 0.06
+DAYS_PER_YEAR = 365.0
+
+
+@dataclass
+class TCOSettings:
+    """成本项参数"""
+    wacc: float = 0.08                 # 资金成本率
+    safety_days: float = 15.0          # 安全库存天数（平均库存天数 = 交货周期/2 + 安全库存天数）
+    quality_loss: float = 2.0          # 每件不合格品的损失相当于采购价格的倍数
+    default_lead_time: float = 15.0    # 报价表未列出时的交货周期（天）
+    default_logistics: float = 0.02    # 报价表未列出时的取得成本率
+    rating_risk: dict = field(default_factory=lambda: dict(RATING_RISK))
+
+
+@dataclass
+class TCOInputs:
+    """成本项函数的输入：价格等为 (S, M) 矩阵（不能供货处为 nan），其余为 (S,) 或 (M,)"""
+    prices: np.ndarray
+    lead_times: np.ndarray
+    logistics: np.ndarray
+    reliability: np.ndarray      # (S,)
+    ratings: np.ndarray          # (S,)
+    settings: TCOSettings
+
+
+def _delivery_risk(x):
+    risk = np.array([x.settings.rating_risk.get(r, DEFAULT_RATING_RISK) for r in x.ratings.tolist()])
+    return x.prices * risk[:, None]
+
+
+def _carrying(x):
+    days = x.lead_times / 2 + x.settings.safety_days
+    return x.prices * (1 + x.logistics) * x.settings.wacc * days / DAYS_PER_YEAR
+
+
+# 成本项名称 -> 每单位物料的成本 (S, M)；可增加成本项（如使用成本、处置成本）
+COMPONENTS = {
+    "采购价格": lambda x: x.prices,
+    "取得成本": lambda x: x.prices * x.logistics,
+    "质量损失": lambda x: x.prices * (1 - x.reliability)[:, None] * x.settings.quality_loss,
+    "交付风险": _delivery_risk,
+    "资金占用": _carrying,
+}
+
+
+@dataclass
+class TCOResult:
+    """components 为 (C, S, M) 单位成本，demand 为 (M,) 期间用量，current 为 (M,) 现供应商下标"""
+    supplier_ids: np.ndarray
+    supplier_names: np.ndarray
+    material_ids: np.ndarray
+    material_names: np.ndarray
+    component_names: list
+    components: np.ndarray
+    demand: np.ndarray
+    current: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def feasible(self):
+        """(S, M) 可供货的组合"""
+        return ~np.isnan(self.components[0])
+
+    @property
+    def n_pairs(self):
+        return int(self.feasible.sum())
+
+    def unit_tco(self, weights=None):
+        """(S, M) 加权单位TCO；weights 为空时用 self.weights"""
+        weights = self.weights if weights is None else np.asarray(weights, dtype=float)
+        return np.tensordot(weights, self.components, axes=1)
+
+    def reweight(self, **weights):
+        """按成本项名称调整权重（其余不变），返回新的权重数组"""
+        new = self.weights.copy()
+        for name, value in weights.items():
+            new[self.component_names.index(name)] = value
+        return new
+
+    def ranks(self, weights=None):
+        """(S, M) 各物料内供应商的TCO名次（1为最低），不能供货处为0"""
+        tco = self.unit_tco(weights)
+        order = np.argsort(np.where(self.feasible, tco, np.inf), axis=0, kind="stable")
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, len(tco) + 1)[:, None], axis=0)
+        return np.where(self.feasible, ranks, 0)
+
+    def best(self, weights=None):
+        """(M,) 每种物料TCO最低的供应商下标"""
+        return np.argmin(np.where(self.feasible, self.unit_tco(weights), np.inf), axis=0)
+
+    def scenario_totals(self, assignments, weights=None):
+        """
+        (N,) 各供货情景的期间TCO合计
+
+        assignments 为 (N, M) 的供应商下标矩阵（每行一个情景）；选到不能供货的组合时为 nan
+        """
+        assignments = np.atleast_2d(assignments)
+        tco = self.unit_tco(weights)
+        return (tco[assignments, np.arange(tco.shape[1])] * self.demand).sum(axis=1)
+
+    def switch(self, changes, base=None):
+        """在现供货（或 base）基础上把若干物料切换到指定供应商：changes 为 {物料编号: 供应商编号}"""
+        assignment = (self.current if base is None else base).copy()
+        materials = np.array(list(changes), dtype=self.material_ids.dtype)
+        suppliers = np.array(list(changes.values()), dtype=self.supplier_ids.dtype)
+        assignment[index_of(self.material_ids, materials, "切换物料")] = \
+            index_of(self.supplier_ids, suppliers, "切换供应商")
+        return assignment
+
+    def supplier_summary(self, assignment=None, weights=None):
+        """
+        按供应商汇总：(采购金额, TCO合计, 供货物料数, 平均TCO倍数)
+
+        采购金额和TCO合计按 assignment（缺省为现供货）中分给该供应商的物料计算；
+        平均TCO倍数 = 该供应商全部可供物料的 Σ TCO×用量 / Σ 价格×用量，用于比较供应商的隐性成本
+        """
+        assignment = self.current if assignment is None else assignment
+        tco = self.unit_tco(weights)
+        cols = np.arange(len(self.material_ids))
+        n = len(self.supplier_ids)
+        spend = _group_sum(assignment, self.components[0][assignment, cols] * self.demand, n)
+        total = _group_sum(assignment, tco[assignment, cols] * self.demand, n)
+        count = np.bincount(assignment, minlength=n)
+        price_value = np.nansum(self.components[0] * self.demand, axis=1)
+        tco_value = np.nansum(tco * self.demand, axis=1)
+        ratio = np.divide(tco_value, price_value, out=np.full(n, np.nan), where=price_value > 0)
+        return spend, total, count, ratio
+
+
+def material_demand(data_dir, material_ids, fallback, chunk_rows=CHUNK_ROWS):
+    """
+    (M,) 期间用量：流式累加材料消耗明细的 total_consumption
+
+    没有消耗记录的物料按 fallback（库存数量）估计
+    """
+    demand = np.zeros(len(material_ids))
+    path = os.path.join(data_dir, CONSUMPTION_SCHEMA.file_name)
+    if os.path.exists(path):
+        for block in iter_csv(path, CONSUMPTION_SCHEMA, chunk_rows):
+            m = index_of(material_ids, block["material_id"], f"{CONSUMPTION_SCHEMA.file_name} material_id")
+            demand += _group_sum(m, block["total_consumption"], len(material_ids))
+    return np.where(demand > 0, demand, fallback)
+
+
+def build_inputs(suppliers, materials, quotes, settings):
+    """由三张表构造 (S, M) 价格、交货周期和取得成本率矩阵；返回 (TCOInputs, 现供应商下标)"""
+    n_s, n_m = len(suppliers), len(materials)
+    supplier_ids, material_ids = suppliers["supplier_id"], materials["material_id"]
+    prices = np.full((n_s, n_m), np.nan)
+    lead_times = np.full((n_s, n_m), settings.default_lead_time)
+    logistics = np.full((n_s, n_m), settings.default_logistics)
+
+    current = index_of(supplier_ids, materials["supplier_id"], "raw_materials.csv supplier_id")
+    prices[current, np.arange(n_m)] = materials["unit_cost_yuan"]
+    if quotes is not None:
+        label = SCHEMAS["quotes"].file_name
+        s = index_of(supplier_ids, quotes["supplier_id"], f"{label} supplier_id")
+        m = index_of(material_ids, quotes["material_id"], f"{label} material_id")
+        prices[s, m] = quotes["unit_cost_yuan"]
+        lead_times[s, m] = quotes["lead_time_days"]
+        logistics[s, m] = quotes["logistics_rate"]
+
+    inputs = TCOInputs(prices=prices, lead_times=lead_times, logistics=logistics,
+                       reliability=suppliers["reliability_score"].astype(float),
+                       ratings=suppliers["rating"], settings=settings)
+    return inputs, current
+
+
+def compute_tco(data_dir=DEFAULT_DATA_DIR, cache=True, settings=None, weights=None, components=None):
+    """
+    读取供应商、原材料、备选报价和材料消耗明细，计算全部 供应商 × 物料 组合的TCO成本项
+
+    weights 为 {成本项: 权重}（缺省均为1）；components 可替换成本项字典（缺省为 COMPONENTS）
+    """
+    settings = settings or TCOSettings()
+    components = components or COMPONENTS
+    tables = {name: load_table(name, data_dir, cache, schemas=SCHEMAS) for name in SCHEMAS}
+    suppliers, materials = tables["suppliers"], tables["materials"]
+    inputs, current = build_inputs(suppliers, materials, tables["quotes"], settings)
+
+    names = list(components)
+    unknown = sorted(set(weights or {}) - set(names))
+    if unknown:
+        raise ValueError(f"没有这些成本项: {unknown}（可选: {'、'.join(names)}）")
+    return TCOResult(
+        supplier_ids=suppliers["supplier_id"],
+        supplier_names=suppliers["supplier_name"],
+        material_ids=materials["material_id"],
+        material_names=materials["material_name"],
+        component_names=names,
+        components=np.stack([np.asarray(fn(inputs), dtype=float) for fn in components.values()]),
+        demand=material_demand(data_dir, materials["material_id"], materials["inventory_quantity"]),
+        current=current,
+        weights=np.array([(weights or {}).get(name, 1.0) for name in names]),
+    )
+
+
+# ========== 输出 ==========
+PAIR_HEADERS = ["物料编号", "物料名称", "供应商编号", "供应商名称", "现供应商"]
+SUPPLIER_HEADERS = ["供应商编号", "供应商名称", "现供物料数", "采购金额", "TCO合计", "隐性成本",
+                    "隐性成本占比", "平均TCO倍数"]
+
+
+def pair_rows(result, weights=None):
+    """逐个可供货组合的行（按物料、TCO名次排序）"""
+    tco = result.unit_tco(weights)
+    ranks = result.ranks(weights)
+    s_idx, m_idx = np.nonzero(result.feasible)
+    order = np.lexsort((ranks[s_idx, m_idx], m_idx))
+    values = np.round(result.components[:, s_idx, m_idx], 4)
+    tco_pairs = tco[s_idx, m_idx]
+    for i in order.tolist():
+        s, m = s_idx[i], m_idx[i]
+        yield ([result.material_ids[m], result.material_names[m], result.supplier_ids[s],
+                result.supplier_names[s], "是" if result.current[m] == s else ""]
+               + values[:, i].tolist()
+               + [round(float(tco_pairs[i]), 4), round(float(tco_pairs[i] / values[0, i]), 4) if values[0, i] else 0,
+                  int(ranks[s, m]), round(float(result.demand[m]), 2), round(float(tco_pairs[i] * result.demand[m]), 2)])
+
+
+def write_xlsx(result, output_file, switches=(), weights=None):
+    """
+    以只写模式生成 "物料TCO排名"、"供应商TCO汇总" 和 "切换模拟" 三张工作表
+
+    switches 为 [(情景名称, 供应商下标数组)]，与现供货对比期间TCO
+    """
+    if result.n_pairs + 3 > EXCEL_MAX_ROWS:
+        raise ValueError(f"组合数 {result.n_pairs:,} 超过Excel行数上限")
+
+    import openpyxl  # 只写Excel时才导入
+
+    from abc_stream_export import StyledWriter
+    from abc_styles import register_named_styles
+
+    wb = openpyxl.Workbook(write_only=True)
+    register_named_styles(wb)
+    n_comp = len(result.component_names)
+    weights = result.weights if weights is None else weights
+
+    ws = wb.create_sheet("物料TCO排名")
+    w = StyledWriter(ws)
+    for col, width in zip("ABCD", [10, 18, 10, 22]):
+        ws.column_dimensions[col].width = width
+    ws.append(w.title("供应商 × 物料 单位TCO排名（元/单位物料）"))
+    ws.append(w.header(PAIR_HEADERS + result.component_names
+                       + ["单位TCO", "TCO倍数", "物料内排名", "期间用量", "期间TCO"]))
+    styles = ["文本"] * 5 + ["单价"] * n_comp + ["计算单价", "计算单价", "整数", "数值", "计算区"]
+    for row in pair_rows(result, weights):
+        ws.append(w.row(row, styles))
+
+    ws_sup = wb.create_sheet("供应商TCO汇总")
+    w_sup = StyledWriter(ws_sup)
+    for col, width in zip("ABCDEFGH", [10, 22, 10, 14, 14, 14, 12, 12]):
+        ws_sup.column_dimensions[col].width = width
+    ws_sup.append(w_sup.title("供应商TCO汇总（按现供货；平均TCO倍数按全部可供物料）"))
+    ws_sup.append(w_sup.header(SUPPLIER_HEADERS))
+    spend, total, count, ratio = result.supplier_summary(weights=weights)
+    sup_styles = ["文本", "文本", "整数", "数值", "计算区", "计算区", "计算百分比", "计算单价"]
+    for i in np.argsort(np.where(np.isnan(ratio), np.inf, ratio), kind="stable").tolist():
+        ws_sup.append(w_sup.row([
+            result.supplier_ids[i], result.supplier_names[i], int(count[i]), round(float(spend[i]), 2),
+            round(float(total[i]), 2), round(float(total[i] - spend[i]), 2),
+            round(float((total[i] - spend[i]) / total[i]), 4) if total[i] else 0,
+            None if np.isnan(ratio[i]) else round(float(ratio[i]), 4)], sup_styles))
+
+    ws_sw = wb.create_sheet("切换模拟")
+    w_sw = StyledWriter(ws_sw)
+    for col, width in zip("ABCDE", [28, 16, 16, 14, 12]):
+        ws_sw.column_dimensions[col].width = width
+    ws_sw.append(w_sw.title("供货来源切换模拟（期间TCO）"))
+    ws_sw.append(w_sw.header(["情景", "期间TCO", "采购金额", "较现供货节约", "切换物料数"]))
+    scenarios = [("现供货", result.current)] + list(switches)
+    assignments = np.vstack([a for _, a in scenarios])
+    totals = result.scenario_totals(assignments, weights)
+    price_totals = result.scenario_totals(assignments, np.eye(n_comp)[0])
+    for (name, assignment), value, price in zip(scenarios, totals, price_totals):
+        ws_sw.append(w_sw.row([
+            name, round(float(value), 2), round(float(price), 2), round(float(totals[0] - value), 2),
+            int((assignment != result.current).sum())],
+            ["文本", "计算区", "数值", "计算区", "整数"]))
+
+    wb.save(output_file)
+    return output_file
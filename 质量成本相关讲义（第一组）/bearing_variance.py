@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+轴承供应链成本核算 - 标准成本差异分析
+把工序消耗明细与工序标准（标准工时、标准资源成本）、材料消耗明细与原材料标准单价按编号连接，
+逐条计算差异（实际 − 标准，正数为不利差异）：
+  材料：用量差异 = (实际用量 − 单耗 × 订单数量) × 标准单价
+        价格差异 = (实际单价 − 标准单价) × 实际用量（实际单价取 material_actual_prices.csv，缺省等于标准单价）
+  工序：效率差异 = (实际工时 − 标准工时) × 标准费率（标准资源成本 / 标准工时）
+        耗费差异 = 实际资源成本 − 实际工时 × 标准费率
+明细按块流式读取，每块连接、计算后按订单、工序、物料、部门累加，数百万行明细也只占用一块的内存；
+需要逐条差异时可边算边写出CSV
+"""
+
+import csv
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from abc_data import CHUNK_ROWS, Column, Table, TableSchema, index_of, iter_csv, load_table
+from bearing_costing import DEFAULT_DATA_DIR, SCHEMAS as COSTING_SCHEMAS, _group_sum
+
+SCHEMAS = {
+    "orders": COSTING_SCHEMAS["orders"],
+    "materials": COSTING_SCHEMAS["materials"],
+    "processes": COSTING_SCHEMAS["processes"],
+    "actual_prices": TableSchema("material_actual_prices.csv", key="material_id", required=False, columns=(
+        Column("material_id"), Column("actual_unit_cost_yuan", "float", True),
+    )),
+}
+# 消耗明细只流式读取，不整表载入、不缓存
+DETAIL_SCHEMAS = {
+    "material_consumption": TableSchema("material_consumption_details.csv", columns=(
+        Column("detail_id"), Column("order_id"), Column("material_id"),
+        Column("consumption_per_unit", "float", True), Column("total_consumption", "float", True),
+        Column("cost_center"),
+    )),
+    "process_consumption": TableSchema("process_consumption_details.csv", columns=(
+        Column("process_detail_id"), Column("order_id"), Column("process_id"),
+        Column("actual_duration_min", "float", True), Column("resource_cost_yuan", "float", True),
+        Column("energy_consumption_kwh", "float", True),
+    )),
+}
+
+# 各汇总表的数值列
+ORDER_FIELDS = ("材料标准成本", "材料实际成本", "用量差异", "价格差异",
+                "工序标准成本", "工序实际成本", "效率差异", "耗费差异")
+PROCESS_FIELDS = ("记录数", "标准工时(分)", "实际工时(分)", "标准成本", "实际成本", "效率差异", "耗费差异", "耗电量(kWh)")
+MATERIAL_FIELDS = ("记录数", "标准用量", "实际用量", "标准成本", "实际成本", "用量差异", "价格差异")
+DEPARTMENT_FIELDS = ("标准成本", "实际成本", "数量差异", "价格差异")
+DETAIL_HEADERS = ["类型", "明细编号", "订单编号", "工序/物料编号", "部门", "标准数量", "实际数量",
+                  "标准成本", "实际成本", "数量差异", "价格差异"]
+
+
+@dataclass
+class VarianceResult:
+    """各维度差异汇总（abc_data.Table，首列为编号）；差异合计 = 实际成本 − 标准成本"""
+    orders: Table
+    processes: Table
+    materials: Table
+    departments: Table
+    n_material_rows: int
+    n_process_rows: int
+
+    @property
+    def totals(self):
+        """全部订单的各项合计"""
+        return {name: float(self.orders[name].sum()) for name in ORDER_FIELDS}
+
+
+class _Codes:
+    """字符串 -> 连续整数编码（哈希表），用于事先不知道取值的部门/成本中心"""
+
+    def __init__(self, initial=()):
+        self.index = {}
+        self.encode(np.asarray(list(initial), dtype=str))
+
+    def encode(self, values):
+        unique, inverse = np.unique(values, return_inverse=True)
+        codes = np.array([self.index.setdefault(v, len(self.index)) for v in unique.tolist()], dtype=np.int64)
+        return codes[inverse]
+
+    @property
+    def keys(self):
+        return np.array(list(self.index), dtype=str)
+
+
+class _Sums:
+    """按整数编码分组累加若干数值列；组数可随块增长"""
+
+    def __init__(self, fields, n=0):
+        self.fields = fields
+        self.values = np.zeros((len(fields), n))
+
+    def add(self, codes, n, **columns):
+        if n > self.values.shape[1]:
+            self.values = np.pad(self.values, ((0, 0), (0, n - self.values.shape[1])))
+        n = self.values.shape[1]
+        for name, weights in columns.items():
+            self.values[self.fields.index(name)] += _group_sum(codes, weights, n)
+
+    def table(self, name, key_column, keys):
+        columns = {key_column: np.asarray(keys)}
+        for field, values in zip(self.fields, self.values[:, :len(keys)]):
+            columns[field] = values.astype(np.int64) if field == "记录数" else values
+        return Table(name, columns)
+
+
+class _DetailWriter:
+    """逐块写出明细差异CSV"""
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(DETAIL_HEADERS)
+
+    def write(self, kind, *columns):
+        # + 0.0 把舍入后的 -0.0 写成 0.0
+        rounded = [c if c.dtype.kind in "US" else np.round(c, 4) + 0.0 for c in columns]
+        self.writer.writerows(zip([kind] * len(columns[0]), *(c.tolist() for c in rounded)))
+
+    def close(self):
+        self.file.close()
+
+
+def load_masters(data_dir=DEFAULT_DATA_DIR, cache=True):
+    """读取订单、原材料、工序标准和实际单价（可缺省）表"""
+    return {name: load_table(name, data_dir, cache, schemas=SCHEMAS) for name in SCHEMAS}
+
+
+def compute_variances(data_dir=DEFAULT_DATA_DIR, cache=True, chunk_rows=CHUNK_ROWS, details_file=None):
+    """
+    流式读取材料和工序消耗明细，计算各维度的标准成本差异
+
+    details_file 不为空时把每条明细的差异写入该CSV（边算边写）
+    """
+    masters = load_masters(data_dir, cache)
+    orders, materials, processes = masters["orders"], masters["materials"], masters["processes"]
+    order_ids = orders["order_id"]
+    quantities = orders["quantity"].astype(float)
+    n_orders, n_materials, n_processes = len(orders), len(materials), len(processes)
+
+    standard_prices = materials["unit_cost_yuan"]
+    actual_prices = standard_prices.copy()
+    if masters["actual_prices"] is not None:
+        prices = masters["actual_prices"]
+        actual_prices[index_of(materials["material_id"], prices["material_id"],
+                               f"{SCHEMAS['actual_prices'].file_name} material_id")] = prices["actual_unit_cost_yuan"]
+    standard_minutes = processes["standard_time_min"]
+    standard_costs = processes["resource_cost_yuan"]
+    standard_rates = np.divide(standard_costs, standard_minutes, out=np.zeros(n_processes),
+                               where=standard_minutes != 0)
+
+    # 部门：先放工序表中的车间，材料明细中的成本中心遇到新值时追加
+    departments = _Codes(processes["department"])
+    process_dept = departments.encode(processes["department"])
+    by_order = _Sums(ORDER_FIELDS, n_orders)
+    by_process = _Sums(PROCESS_FIELDS, n_processes)
+    by_material = _Sums(MATERIAL_FIELDS, n_materials)
+    by_department = _Sums(DEPARTMENT_FIELDS)
+    writer = _DetailWriter(details_file) if details_file else None
+    n_rows = {}
+
+    try:
+        schema = DETAIL_SCHEMAS["material_consumption"]
+        n_rows["material"] = 0
+        for block in iter_csv(os.path.join(data_dir, schema.file_name), schema, chunk_rows):
+            o = index_of(order_ids, block["order_id"], f"{schema.file_name} order_id")
+            m = index_of(materials["material_id"], block["material_id"], f"{schema.file_name} material_id")
+            std_qty = block["consumption_per_unit"] * quantities[o]
+            act_qty = block["total_consumption"]
+            std_cost = std_qty * standard_prices[m]
+            act_cost = act_qty * actual_prices[m]
+            usage = (act_qty - std_qty) * standard_prices[m]
+            price = act_cost - act_qty * standard_prices[m]
+            dept = departments.encode(block["cost_center"])
+
+            by_order.add(o, n_orders, 材料标准成本=std_cost, 材料实际成本=act_cost, 用量差异=usage, 价格差异=price)
+            by_material.add(m, n_materials, 记录数=None, 标准用量=std_qty, 实际用量=act_qty,
+                            标准成本=std_cost, 实际成本=act_cost, 用量差异=usage, 价格差异=price)
+            by_department.add(dept, len(departments.index), 标准成本=std_cost, 实际成本=act_cost,
+                              数量差异=usage, 价格差异=price)
+            if writer:
+                writer.write("材料", block["detail_id"], block["order_id"], block["material_id"],
+                             block["cost_center"], std_qty, act_qty, std_cost, act_cost, usage, price)
+            n_rows["material"] += len(o)
+
+        schema = DETAIL_SCHEMAS["process_consumption"]
+        n_rows["process"] = 0
+        for block in iter_csv(os.path.join(data_dir, schema.file_name), schema, chunk_rows):
+            o = index_of(order_ids, block["order_id"], f"{schema.file_name} order_id")
+            p = index_of(processes["process_id"], block["process_id"], f"{schema.file_name} process_id")
+            act_min = block["actual_duration_min"]
+            act_cost = block["resource_cost_yuan"]
+            std_min = standard_minutes[p]
+            std_cost = standard_costs[p]
+            efficiency = (act_min - std_min) * standard_rates[p]
+            spending = act_cost - act_min * standard_rates[p]
+
+            by_order.add(o, n_orders, 工序标准成本=std_cost, 工序实际成本=act_cost, 效率差异=efficiency, 耗费差异=spending)
+            by_process.add(p, n_processes, 记录数=None, **{"标准工时(分)": std_min, "实际工时(分)": act_min,
+                                                        "耗电量(kWh)": block["energy_consumption_kwh"]},
+                           标准成本=std_cost, 实际成本=act_cost, 效率差异=efficiency, 耗费差异=spending)
+            by_department.add(process_dept[p], len(departments.index), 标准成本=std_cost, 实际成本=act_cost,
+                              数量差异=efficiency, 价格差异=spending)
+            if writer:
+                writer.write("工序", block["process_detail_id"], block["order_id"], block["process_id"],
+                             processes["department"][p], std_min, act_min, std_cost, act_cost, efficiency, spending)
+            n_rows["process"] += len(o)
+    finally:
+        if writer:
+            writer.close()
+
+    return VarianceResult(
+        orders=by_order.table("orders", "订单编号", order_ids),
+        processes=by_process.table("processes", "工序编号", processes["process_id"]),
+        materials=by_material.table("materials", "物料编号", materials["material_id"]),
+        departments=by_department.table("departments", "部门", departments.keys),
+        n_material_rows=n_rows["material"],
+        n_process_rows=n_rows["process"],
+    )
+
+
+def write_summary_csv(table, output_file, digits=2):
+    """把一张差异汇总表写入CSV（UTF-8 BOM）"""
+    names = list(table.columns)
+    with open(output_file, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        columns = [table[name] if table[name].dtype.kind in "USi" else np.round(table[name], digits) + 0.0
+                   for name in names]
+        writer.writerows(zip(*(c.tolist() for c in columns)))
+    return output_file
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+单产品成本模型 - 多层BOM展开与工序路线成本汇总
+读取 财务讲义-单个成本组（第二组）/model/ 下的物料主数据、工序主数据、产品BOM和工序路线，
+BOM中引用其他产品编码的行视为半成品（子装配），按层级自下而上一次算出全部产品的
+材料、人工和制造费用；修改单个物料价格时只重算用到该物料的产品
+"""
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from abc_data import Column, DataValidationError, TableSchema, index_of, load_table
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "财务讲义-单个成本组（第二组）", "model")
+
+SCHEMAS = {
+    "materials": TableSchema("01-物料主数据.csv", key="物料编码", columns=(
+        Column("物料编码"), Column("物料名称"), Column("计量单位"),
+        Column("移动平均价", "float", True), Column("标准损耗率", "float", True),
+    )),
+    "processes": TableSchema("02-工序主数据.csv", key="工序编码", columns=(
+        Column("工序编码"), Column("工序名称"), Column("工资率(元/小时)", "float", True),
+        Column("费用分配率(元/小时)", "float", True),
+    )),
+    "bom": TableSchema("03-产品BOM.csv", columns=(
+        Column("产品编码"), Column("产品名称"), Column("物料编码"), Column("净用量", "float", True),
+    )),
+    "routing": TableSchema("04-工序路线.csv", columns=(
+        Column("产品编码"), Column("部件"), Column("工序编码"), Column("标准工时(分钟)", "float", True),
+    )),
+}
+
+
+@dataclass
+class ProductCost:
+    """单位产品成本构成"""
+    product: str
+    name: str
+    material: float
+    labor: float
+    overhead: float
+
+    @property
+    def total(self):
+        return self.material + self.labor + self.overhead
+
+
+class BOMRollup:
+    """
+    BOM成本汇总引擎
+
+    产品 = BOM和工序路线中出现的产品编码；BOM行的物料编码是产品编码时为半成品，
+    半成品按其单位完全成本（材料+人工+制造费用）计入上层产品的材料成本，不计损耗
+    """
+
+    def __init__(self, materials, processes, bom, routing):
+        self.materials = materials
+        self.prices = materials["移动平均价"].astype(float).copy()
+        self.loss_rates = materials["标准损耗率"].astype(float)
+        self.material_ids = materials["物料编码"]
+
+        codes = np.concatenate([bom["产品编码"], routing["产品编码"]])
+        _, first = np.unique(codes, return_index=True)
+        self.product_ids = codes[np.sort(first)]
+        names = dict(zip(bom["产品编码"].tolist(), bom["产品名称"].tolist()))
+        self.product_names = [names.get(p, "") for p in self.product_ids.tolist()]
+        overlap = np.intersect1d(self.product_ids, self.material_ids)
+        if len(overlap):
+            raise DataValidationError(
+                f"{SCHEMAS['bom'].file_name} 编码同时是物料和产品: {overlap[:5].tolist()}")
+
+        # BOM行拆成 物料行 和 半成品行
+        n_products = len(self.product_ids)
+        line_product = index_of(self.product_ids, bom["产品编码"], f"{SCHEMAS['bom'].file_name} 产品编码")
+        is_sub = np.isin(bom["物料编码"], self.product_ids)
+        self._mat_product = line_product[~is_sub]
+        self._mat_index = index_of(self.material_ids, bom["物料编码"][~is_sub],
+                                   f"{SCHEMAS['bom'].file_name} 物料编码")
+        self._mat_qty = bom["净用量"][~is_sub]
+        self._sub_parent = line_product[is_sub]
+        self._sub_child = index_of(self.product_ids, bom["物料编码"][is_sub],
+                                   f"{SCHEMAS['bom'].file_name} 物料编码")
+        self._sub_qty = bom["净用量"][is_sub]
+
+        # 工序路线：人工 = 工时 × 工资率，制造费用 = 工时 × 费用分配率
+        step_product = index_of(self.product_ids, routing["产品编码"],
+                                f"{SCHEMAS['routing'].file_name} 产品编码")
+        step_process = index_of(processes["工序编码"], routing["工序编码"],
+                                f"{SCHEMAS['routing'].file_name} 工序编码")
+        hours = routing["标准工时(分钟)"] / 60
+        self._routing_labor = np.bincount(
+            step_product, hours * processes["工资率(元/小时)"][step_process], minlength=n_products)
+        self._routing_overhead = np.bincount(
+            step_product, hours * processes["费用分配率(元/小时)"][step_process], minlength=n_products)
+
+        self.order = self._topological_order()
+        self.material = np.zeros(n_products)
+        self.labor = np.zeros(n_products)
+        self.overhead = np.zeros(n_products)
+        self._roll(np.ones(n_products, dtype=bool))
+
+    def _topological_order(self):
+        """半成品在前、上层产品在后的产品序号；BOM存在循环引用时报错"""
+        n = len(self.product_ids)
+        pending = np.bincount(self._sub_parent, minlength=n)
+        parents = {}
+        for parent, child in zip(self._sub_parent.tolist(), self._sub_child.tolist()):
+            parents.setdefault(child, []).append(parent)
+        ready = [p for p in range(n) if pending[p] == 0]
+        order = []
+        while ready:
+            p = ready.pop()
+            order.append(p)
+            for parent in parents.get(p, ()):
+                pending[parent] -= 1
+                if pending[parent] == 0:
+                    ready.append(parent)
+        if len(order) < n:
+            cyclic = sorted(set(range(n)) - set(order))
+            raise DataValidationError(
+                f"{SCHEMAS['bom'].file_name} 存在循环引用: {self.product_ids[cyclic][:5].tolist()}")
+        return np.array(order, dtype=int)
+
+    def _roll(self, mask):
+        """重算 mask 选中的产品：直接材料一次向量化求和，半成品按层级自下而上累加"""
+        n = len(self.product_ids)
+        lines = mask[self._mat_product]
+        line_cost = (self._mat_qty[lines] * (1 + self.loss_rates[self._mat_index[lines]])
+                     * self.prices[self._mat_index[lines]])
+        material = np.bincount(self._mat_product[lines], line_cost, minlength=n)
+        self.material[mask] = material[mask]
+        self.labor[mask] = self._routing_labor[mask]
+        self.overhead[mask] = self._routing_overhead[mask]
+
+        sub_order = np.argsort(self.order.argsort()[self._sub_parent], kind="stable")
+        for k in sub_order[mask[self._sub_parent[sub_order]]]:
+            parent, child, qty = self._sub_parent[k], self._sub_child[k], self._sub_qty[k]
+            self.material[parent] += qty * (self.material[child] + self.labor[child] + self.overhead[child])
+
+    def where_used(self, material_id):
+        """直接或经半成品间接用到某物料的全部产品（布尔掩码）"""
+        m = index_of(self.material_ids, np.array([material_id]), "物料编码")[0]
+        affected = np.zeros(len(self.product_ids), dtype=bool)
+        affected[self._mat_product[self._mat_index == m]] = True
+        # 沿 半成品 -> 上层产品 传播直到不再扩大
+        while True:
+            grown = affected.copy()
+            grown[self._sub_parent[affected[self._sub_child]]] = True
+            if (grown == affected).all():
+                return affected
+            affected = grown
+
+    def set_material_price(self, material_id, price):
+        """修改物料单价，只重算受影响的产品，返回受影响的产品编码"""
+        m = index_of(self.material_ids, np.array([material_id]), "物料编码")[0]
+        self.prices[m] = price
+        affected = self.where_used(material_id)
+        self._roll(affected)
+        return self.product_ids[affected].tolist()
+
+    @property
+    def totals(self):
+        return self.material + self.labor + self.overhead
+
+    def cost(self, product_id):
+        """单个产品的单位成本构成"""
+        p = index_of(self.product_ids, np.array([product_id]), "产品编码")[0]
+        return ProductCost(str(self.product_ids[p]), self.product_names[p],
+                           float(self.material[p]), float(self.labor[p]), float(self.overhead[p]))
+
+    def costs(self):
+        """全部产品的单位成本构成（按产品首次出现顺序）"""
+        return [ProductCost(*row) for row in zip(
+            self.product_ids.tolist(), self.product_names,
+            self.material.tolist(), self.labor.tolist(), self.overhead.tolist())]
+
+
+def load_rollup(data_dir=DEFAULT_DATA_DIR, cache=True):
+    """读取四张主数据表并构建成本汇总引擎"""
+    tables = {name: load_table(name, data_dir, cache, schemas=SCHEMAS) for name in SCHEMAS}
+    return BOMRollup(tables["materials"], tables["processes"], tables["bom"], tables["routing"])
@@ -51,11 +51,11 @@ exit /b 0
 :INSTALL_OPENPYXL
 echo.
 echo ========================================
-echo 步骤2：安装openpyxl库
+echo 步骤2：安装openpyxl和numpy库
 echo ========================================
 echo.
 python -m pip install --upgrade pip
-python -m pip install openpyxl
+python -m pip install openpyxl numpy
 
 if %errorLevel% neq 0 (
     echo.
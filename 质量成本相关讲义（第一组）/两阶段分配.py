@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 两阶段分配
+第一阶段按 数据_资源动因.csv 把制造费用科目分配到辅助部门和作业（辅助部门交互分配），
+第二阶段用得到的作业成本重新做 作业 -> 产品 分配，并与作业清单中填写的作业成本对比
+
+用法：
+    python 两阶段分配.py
+    python 两阶段分配.py --data-dir 数据目录
+"""
+
+import argparse
+import importlib
+import os
+
+import abc_data
+import abc_resource
+
+generator = importlib.import_module("生成ABC成本模型Excel")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="资源 -> 作业 -> 产品 两阶段分配")
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="数据_*.csv 所在目录（默认为脚本所在目录）")
+    parser.add_argument("--no-cache", action="store_true", help="忽略解析缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    try:
+        dataset = abc_data.load_dataset(args.data_dir, cache=not args.no_cache)
+        allocation = abc_resource.resource_allocation(dataset)
+    except abc_data.DataValidationError as e:
+        parser.error(str(e))
+
+    print("第一阶段：辅助部门交互分配")
+    print(f"{'部门':<8}{'直接归集':>14}{'交互分配后':>14}")
+    for dept, direct, total in zip(allocation.service_ids, allocation.service_direct,
+                                   allocation.service_totals):
+        print(f"{dept:<10}{direct:>16,.2f}{total:>16,.2f}")
+
+    listed = dataset.activities["作业成本"]
+    print(f"\n{'作业':<6}{'作业名称':<10}{'科目直接':>12}{'辅助部门转入':>12}{'作业成本':>12}{'作业清单':>12}")
+    for act_id, name, direct, transfer, cost, old in zip(
+            allocation.activity_ids, dataset.activities["作业名称"].tolist(), allocation.activity_direct,
+            allocation.service_transfers, allocation.activity_costs, listed):
+        print(f"{act_id:<8}{name:<10}{direct:>14,.0f}{transfer:>14,.0f}{cost:>14,.0f}{old:>14,.0f}")
+    print(f"{'合计':<16}{allocation.activity_direct.sum():>16,.0f}{allocation.service_transfers.sum():>14,.0f}"
+          f"{allocation.activity_costs.sum():>14,.0f}{listed.sum():>14,.0f}")
+    unallocated = allocation.unallocated
+    if abs(unallocated.sum()) > 0.005:
+        missing = [rid for rid, v in zip(allocation.resource_ids, unallocated) if abs(v) > 0.005]
+        print(f"提示: 以下费用科目没有资源动因，未分配 {unallocated.sum():,.2f} 元: {', '.join(missing)}")
+
+    listed_model = generator.compute_model(dataset)
+    model = generator.compute_model(abc_resource.with_activity_costs(dataset, allocation.activity_costs))
+    print("\n第二阶段：产品单位成本")
+    print(f"{'产品':<6}{'传统方法':>10}{'作业清单':>10}{'两阶段':>10}")
+    for prod, trad, old, new in zip(model["products"], model["traditional_costs"],
+                                    listed_model["abc_costs"], model["abc_costs"]):
+        print(f"{prod[0]:<8}{trad:>12.2f}{old:>12.2f}{new:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 产品组合优化
+以ABC成本计算各产品的单位贡献、每批成本和产品级成本，在机器小时、设备换型、检验等产能约束
+和需求上下限内求ABC边际贡献最大的产品组合，输出最优产量和各产能约束的影子价格，
+并写入 "产品组合优化" 工作表（用数据而不是经验判断哪些产品该增产、哪种产能最紧张）
+
+用法：
+    python 产品组合优化.py                                 # 线性规划，产能 = 当前用量
+    python 产品组合优化.py --integer --capacity-factor 1.1 --max-growth 1.5
+    python 产品组合优化.py --capacity A04=15000 --capacity 总机时=150000
+"""
+
+import argparse
+import os
+
+import abc_data
+import abc_optimize
+from 生成ABC成本模型Excel import compute_model
+
+DEFAULT_OUTPUT = "瓦轴集团ABC成本模型_产品组合优化.xlsx"
+
+
+def parse_capacities(items):
+    """--capacity 名称=上限（名称为作业编号或 总机时）"""
+    capacities = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--capacity 格式应为 名称=上限: {item!r}")
+        capacities[name.strip()] = float(value)
+    return capacities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基于ABC成本的产品组合优化（LP/MILP）")
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="数据_*.csv 所在目录")
+    parser.add_argument("--integer", action="store_true",
+                        help="混合整数规划：批次数取整数，允许停产以省去产品级成本")
+    parser.add_argument("--capacity-factor", type=float, default=1.0, help="产能上限 = 当前用量 × 该系数")
+    parser.add_argument("--capacity", action="append", default=[], metavar="名称=上限",
+                        help="单独设定某产能约束的上限（作业编号或 总机时，可重复）")
+    parser.add_argument("--max-growth", type=float, default=1.2, help="需求上限 = 当前产量 × 该系数")
+    parser.add_argument("--min-share", type=float, default=0.0, help="需求下限 = 当前产量 × 该系数")
+    parser.add_argument("--time-limit", type=float, default=abc_optimize.DEFAULT_TIME_LIMIT,
+                        help="MILP 求解时间上限（秒）")
+    parser.add_argument("--top", type=int, default=10, help="屏幕上列出的产品数（按边际贡献变化）")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="输出文件（为空时不写工作簿）")
+    parser.add_argument("--no-cache", action="store_true", help="忽略缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    try:
+        dataset = abc_data.load_dataset(args.data_dir, cache=not args.no_cache)
+        model = compute_model(dataset)
+        problem = abc_optimize.build_problem(model, dataset, args.capacity_factor,
+                                             parse_capacities(args.capacity), args.max_growth, args.min_share)
+        result = abc_optimize.optimize(problem, integer=args.integer, time_limit=args.time_limit)
+    except (abc_data.DataValidationError, ValueError) as e:
+        parser.error(str(e))
+
+    current, optimal = result.current_contribution, result.optimal_contribution
+    print(f"产品数: {len(problem.product_ids):,}  方法: {result.method}  求解耗时: {result.seconds:.3f}s  "
+          f"状态: {result.status}")
+    print(f"ABC边际贡献: 当前 {current.sum():,.0f} 元 -> 最优 {optimal.sum():,.0f} 元"
+          f"（{optimal.sum() - current.sum():+,.0f}）；设施级固定成本 {problem.fixed_costs:,.0f} 元\n")
+
+    print(f"{'产能约束':<18}{'产能上限':>12}{'最优用量':>12}{'利用率':>8}{'影子价格':>12}")
+    usage = result.optimal_usage
+    for k, name in enumerate(problem.constraint_names):
+        rate = usage[k] / problem.capacity[k] if problem.capacity[k] else 0.0
+        print(f"{name:<18}{problem.capacity[k]:>14,.1f}{usage[k]:>14,.1f}{rate:>10.1%}"
+              f"{result.shadow_prices[k]:>14,.2f}")
+
+    change = optimal - current
+    print(f"\n{'产品':<10}{'单位贡献':>10}{'当前产量':>10}{'最优产量':>10}{'贡献变化':>14}")
+    for i in abs(change).argsort()[::-1][:args.top]:
+        print(f"{problem.product_ids[i]:<10}{problem.unit_margins[i]:>12,.2f}{problem.current[i]:>12,.0f}"
+              f"{result.quantities[i]:>12,.0f}{change[i]:>+16,.0f}")
+
+    if args.output:
+        import abc_sheets  # 延迟导入 openpyxl
+        wb = abc_sheets.new_workbook()
+        wb.remove(wb.active)
+        abc_sheets.build_optimization_sheet(wb, model, result)
+        wb.save(args.output)
+        print(f"\n✓ 文件保存为: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
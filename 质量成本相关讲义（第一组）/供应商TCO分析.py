@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+轴承供应链成本核算 - 供应商总拥有成本（TCO）分析
+读取 轴承供应链成本核算模型系统/ 下的供应商、原材料、备选报价（supplier_quotes.csv，可缺省）
+和材料消耗明细，计算全部 供应商 × 物料 组合的单位TCO（采购价格、取得成本、质量损失、交付风险、资金占用），
+按物料排名、按供应商汇总，并对比 现供货 / 价格最低 / TCO最低 / 指定切换 等供货情景的期间TCO
+
+用法：
+    python 供应商TCO分析.py
+    python 供应商TCO分析.py --weight 资金占用=1.5 --wacc 0.06 --switch RM001=SUP002 --output 供应商TCO.xlsx
+"""
+
+import argparse
+import time
+
+import abc_data
+import bearing_costing
+import bearing_tco
+
+DEFAULT_OUTPUT = "供应商TCO分析.xlsx"
+
+
+def parse_pairs(items, option, value_type=str):
+    """--option 键=值（可重复）"""
+    pairs = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"{option} 格式应为 键=值: {item!r}")
+        pairs[key.strip()] = value_type(value)
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="供应商总拥有成本（TCO）排名与供货切换模拟")
+    parser.add_argument("--data-dir", default=bearing_costing.DEFAULT_DATA_DIR,
+                        help="CSV所在目录（默认为 轴承供应链成本核算模型系统）")
+    parser.add_argument("--weight", action="append", default=[], metavar="成本项=权重",
+                        help=f"成本项权重（默认均为1，可重复）：{'、'.join(bearing_tco.COMPONENTS)}")
+    parser.add_argument("--wacc", type=float, default=bearing_tco.TCOSettings.wacc, help="资金成本率")
+    parser.add_argument("--safety-days", type=float, default=bearing_tco.TCOSettings.safety_days,
+                        help="安全库存天数")
+    parser.add_argument("--quality-loss", type=float, default=bearing_tco.TCOSettings.quality_loss,
+                        help="不合格品损失相当于采购价格的倍数")
+    parser.add_argument("--switch", action="append", default=[], metavar="物料编号=供应商编号",
+                        help="模拟把某物料切换到指定供应商（可重复，合为一个情景）")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="输出xlsx（为空时不写）")
+    parser.add_argument("--no-cache", action="store_true", help="忽略解析缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    settings = bearing_tco.TCOSettings(wacc=args.wacc, safety_days=args.safety_days,
+                                       quality_loss=args.quality_loss)
+    start = time.perf_counter()
+    try:
+        result = bearing_tco.compute_tco(args.data_dir, cache=not args.no_cache, settings=settings,
+                                         weights=parse_pairs(args.weight, "--weight", float))
+        switches = [("价格最低", result.best(result.reweight(**{n: 0.0 for n in result.component_names[1:]}))),
+                    ("TCO最低", result.best())]
+        if args.switch:
+            switches.append(("指定切换 " + "、".join(args.switch), result.switch(parse_pairs(args.switch, "--switch"))))
+    except (abc_data.DataValidationError, ValueError) as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    print(f"供应商 {len(result.supplier_ids)} 家 × 物料 {len(result.material_ids)} 种，"
+          f"可供货组合 {result.n_pairs:,} 个，耗时 {elapsed:.3f}s")
+    print("权重: " + "  ".join(f"{n}={w:g}" for n, w in zip(result.component_names, result.weights)))
+
+    tco = result.unit_tco()
+    best = result.best()
+    print(f"\n{'物料':<8}{'现供应商':<10}{'现单位TCO':>12}  {'最优供应商':<12}{'最优单位TCO':>12}{'期间用量':>12}")
+    for m, material_id in enumerate(result.material_ids.tolist()):
+        cur, opt = result.current[m], best[m]
+        flag = "" if cur == opt else "  建议切换"
+        print(f"{material_id:<8}{result.supplier_ids[cur]:<12}{tco[cur, m]:>12,.2f}  "
+              f"{result.supplier_ids[opt]:<12}{tco[opt, m]:>12,.2f}{result.demand[m]:>12,.0f}{flag}")
+
+    spend, total, count, ratio = result.supplier_summary()
+    print(f"\n{'供应商':<8}{'名称':<16}{'现供物料':>8}{'采购金额':>14}{'TCO合计':>14}{'平均TCO倍数':>12}")
+    for i, supplier_id in enumerate(result.supplier_ids.tolist()):
+        print(f"{supplier_id:<8}{result.supplier_names[i]:<16}{count[i]:>8}{spend[i]:>14,.2f}"
+              f"{total[i]:>14,.2f}{ratio[i]:>12.3f}")
+
+    scenarios = [("现供货", result.current)] + switches
+    totals = result.scenario_totals([a for _, a in scenarios])
+    print(f"\n{'供货情景':<24}{'期间TCO':>14}{'较现供货节约':>14}")
+    for (name, _), value in zip(scenarios, totals):
+        print(f"{name:<24}{value:>14,.2f}{totals[0] - value:>14,.2f}")
+
+    if args.output:
+        bearing_tco.write_xlsx(result, args.output, switches)
+        print(f"\n✓ 文件保存为: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
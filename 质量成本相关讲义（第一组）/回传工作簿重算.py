@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 回传工作簿批量重算
+计划员修改输入区后回传的工作簿（可一次给出数百个文件或目录），在多个进程中并行处理：
+只读流式读取输入区、核对勾稽关系、在Python中重算全部派生数值，
+把输入修改和重算后单位成本/毛利率的变化汇总到一个差异CSV，
+指定 --output-dir 时另为每个文件重新生成数值正确（公式连同计算结果）的工作簿
+
+用法：
+    python 回传工作簿重算.py 回传/*.xlsx
+    python 回传工作簿重算.py 回传 --workers 8 --output-dir 重算 --report 回传差异.csv
+"""
+
+import argparse
+import csv
+import glob
+import importlib
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+GENERATOR_MODULE = "生成ABC成本模型Excel"
+DEFAULT_REPORT = "回传工作簿重算差异.csv"
+OUTPUT_SUFFIX = "_重算"
+
+# 每个工作进程只读取一次基准数据并计算一次基准模型
+_generator = None
+_base = None
+
+
+@dataclass
+class FileResult:
+    """一个回传文件的处理结果：rows 为差异行（不含文件列），ok=False 时 error 为异常说明"""
+    path: str
+    ok: bool
+    seconds: float
+    rows: list = field(default_factory=list)
+    n_inputs: int = 0
+    n_results: int = 0
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+    notes: list = field(default_factory=list)
+    output_file: str = None
+    error: str = None
+    detail: str = None
+
+
+def expand_paths(items):
+    """命令行中的文件和目录（目录取其中的 *.xlsx，跳过 Excel 的 ~$ 临时文件）"""
+    paths = []
+    for item in items:
+        if os.path.isdir(item):
+            paths += sorted(glob.glob(os.path.join(item, "*.xlsx")))
+        else:
+            paths.append(item)
+    return [p for p in paths if not os.path.basename(p).startswith("~$")]
+
+
+def _init_worker(base_dir, cache):
+    """工作进程初始化：导入生成器并读取基准数据"""
+    global _generator, _base
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    _generator = importlib.import_module(GENERATOR_MODULE)
+    dataset = _generator.abc_data.load_dataset(base_dir, cache=cache)
+    _base = (dataset, _generator.compute_model(dataset))
+
+
+def _run_file(path, base_dir, output_dir=None, strict=False, cache=True):
+    """在工作进程中处理一个回传文件，异常转为失败结果返回"""
+    start = time.perf_counter()
+    try:
+        if _generator is None:
+            _init_worker(base_dir, cache)
+        import abc_reconcile
+        import abc_roundtrip
+        base_dataset, base_model = _base
+        returned = abc_roundtrip.read_workbook(path, base_dataset)
+        report = abc_reconcile.reconcile(returned.dataset)
+        model = _generator.compute_model(returned.dataset)
+        inputs = abc_roundtrip.diff_inputs(base_dataset, returned.dataset)
+        results = abc_roundtrip.diff_results(base_model, model)
+        lines = report.summary_lines()  # error 在前
+        result = FileResult(path, True, 0.0, inputs + results, len(inputs), len(results),
+                            lines[:len(report.errors)], lines[len(report.errors):], returned.notes)
+        if output_dir and (report.passed or not strict):
+            import abc_formula
+            os.makedirs(output_dir, exist_ok=True)
+            stem = os.path.splitext(returned.file_name)[0]
+            result.output_file = os.path.join(output_dir, f"{stem}{OUTPUT_SUFFIX}.xlsx")
+            wb, _ = _generator.build_workbook(
+                returned.dataset, returned.workshop or _generator.DEFAULT_WORKSHOP,
+                returned.period or _generator.DEFAULT_PERIOD, verbose=False)
+            abc_formula.save_workbook(wb, result.output_file)
+    except Exception as e:
+        return FileResult(path, False, round(time.perf_counter() - start, 3),
+                          error=f"{type(e).__name__}: {e}", detail=traceback.format_exc())
+    result.seconds = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(paths, base_dir, output_dir=None, max_workers=None, strict=False, cache=True, on_result=None):
+    """并行处理全部回传文件，返回与 paths 顺序一致的 FileResult 列表"""
+    results = [None] * len(paths)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(base_dir, cache)) as pool:
+        futures = {pool.submit(_run_file, path, base_dir, output_dir, strict, cache): i
+                   for i, path in enumerate(paths)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = FileResult(paths[i], False, 0.0, error=f"{type(e).__name__}: {e}",
+                                    detail=traceback.format_exc())
+            results[i] = result
+            if on_result:
+                on_result(result)
+    return results
+
+
+def write_report(results, path):
+    """全部文件的差异行写入一个CSV（失败的文件记一行错误）"""
+    import abc_roundtrip
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(abc_roundtrip.DIFF_COLUMNS)
+        for r in results:
+            name = os.path.basename(r.path)
+            if not r.ok:
+                writer.writerow([name, "读取失败", "", r.error, "", "", ""])
+                continue
+            for line in r.errors + r.warnings + r.notes:
+                writer.writerow([name, "核对", "", line, "", "", ""])
+            for row in r.rows:
+                writer.writerow([name] + ["" if v is None else v for v in row])
+
+
+def print_summary(results, elapsed):
+    """打印各文件的修改数、核对结果和耗时"""
+    print(f"\n{'状态':<4}{'耗时(s)':>9}{'输入修改':>8}{'结果变化':>8}{'核对错误':>8}  文件 / 错误")
+    for r in results:
+        name = os.path.basename(r.path)
+        if r.ok:
+            print(f"{'成功':<4}{r.seconds:>9.2f}{r.n_inputs:>10}{r.n_results:>10}{len(r.errors):>10}  {name}")
+        else:
+            print(f"{'失败':<4}{r.seconds:>9.2f}{'':>28}  {name}: {r.error}")
+    failed = [r for r in results if not r.ok]
+    print(f"\n共 {len(results)} 个文件，成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个，"
+          f"总耗时 {elapsed:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回传工作簿输入区读取、重算与差异报告")
+    parser.add_argument("files", nargs="+", help="回传的工作簿或所在目录")
+    parser.add_argument("--base-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="基准数据_*.csv 所在目录（比较基准及可选输入，默认为脚本所在目录）")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="差异CSV")
+    parser.add_argument("--output-dir", help="为每个文件重新生成工作簿到该目录（默认只写差异报告）")
+    parser.add_argument("--strict", action="store_true", help="输入核对存在错误的文件不重新生成工作簿")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数（默认为CPU核数）")
+    parser.add_argument("--no-cache", action="store_true", help="忽略基准数据的解析缓存")
+    args = parser.parse_args()
+
+    paths = expand_paths(args.files)
+    missing = [p for p in paths if not os.path.isfile(p)]
+    if missing:
+        parser.error(f"找不到文件: {missing[:5]}")
+    if not paths:
+        parser.error("没有待处理的 .xlsx 文件")
+
+    print(f"开始处理: {len(paths)} 个回传文件")
+    start = time.perf_counter()
+    results = run_batch(
+        paths, args.base_dir, args.output_dir, args.workers, args.strict, cache=not args.no_cache,
+        on_result=lambda r: print(f"  {'✓' if r.ok else '✗'} {os.path.basename(r.path)} ({r.seconds:.2f}s)"))
+    elapsed = time.perf_counter() - start
+    print_summary(results, elapsed)
+
+    write_report(results, args.report)
+    print(f"✓ 差异报告: {args.report}")
+    if any(not r.ok for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
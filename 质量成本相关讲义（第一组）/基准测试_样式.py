@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 单元格样式基准测试
+对比常规工作簿的两种样式写法在大产品目录下的生成耗时和xlsx大小：
+  命名样式：abc_styles 中注册的 NamedStyle，按整块区域一次应用（当前写法）
+  逐单元格：每个单元格分别设置 font/border/fill/number_format，并各自新建 Alignment（原写法）
+产品目录由演示数据按产品复制放大，两种写法使用同一组工作表构建函数
+
+用法：
+    python 基准测试_样式.py                  # 默认 2,000 个产品
+    python 基准测试_样式.py --products 10000 --json 样式基准.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from openpyxl.styles import Alignment
+
+import abc_data
+import abc_sheets
+import abc_styles
+from abc_data import Table
+from 生成ABC成本模型Excel import build_workbook
+
+# 以产品编号为键的输入表
+PRODUCT_TABLES = ("products", "workhours", "direct_costs", "consumption", "quality_rates")
+
+
+def scaled_dataset(dataset, n_products):
+    """把演示数据的产品复制放大到 n_products 个（编号加序号后缀），作业和费用科目不变"""
+    copies = -(-n_products // len(dataset.products))
+    for name in PRODUCT_TABLES:
+        table = getattr(dataset, name)
+        if table is None:
+            continue
+        suffix = np.repeat(np.arange(copies).astype(str), len(table))
+        columns = {}
+        for column, values in table.columns.items():
+            values = np.tile(values, copies)
+            if column in ("产品编号", "产品型号"):
+                values = np.char.add(np.char.add(values.astype(str), "-"), suffix)
+            columns[column] = values
+        table = Table(table.name, columns)
+        if name == "products":
+            table = table.reorder(np.arange(n_products))
+        else:
+            table = table.reorder(np.flatnonzero(np.isin(table["产品编号"], dataset.products["产品编号"])))
+        setattr(dataset, name, table)
+    return dataset
+
+
+def _per_cell_style_range(ws, style, min_row, min_col, max_row=None, max_col=None):
+    """原写法：逐个单元格设置各项样式属性"""
+    spec = abc_styles.STYLE_SPECS[style]
+    max_row = min_row if max_row is None else max_row
+    max_col = min_col if max_col is None else max_col
+    for row in range(min_row, max_row + 1):
+        for col in range(min_col, max_col + 1):
+            cell = ws.cell(row=row, column=col)
+            if "font" in spec:
+                cell.font = spec["font"]
+            if "border" in spec:
+                cell.border = spec["border"]
+            if "fill" in spec:
+                cell.fill = spec["fill"]
+            if "alignment" in spec:
+                cell.alignment = Alignment(horizontal=spec["alignment"].horizontal,
+                                           vertical=spec["alignment"].vertical,
+                                           wrap_text=spec["alignment"].wrap_text)
+            if "number_format" in spec:
+                cell.number_format = spec["number_format"]
+
+
+def _per_cell_write_title(ws, ref, text, style="标题"):
+    """原写法：标题单元格直接设置字体"""
+    ws[ref] = text
+    ws[ref].font = abc_styles.STYLE_SPECS[style]["font"]
+
+
+def run(dataset, mode, path):
+    """按 mode（named/per_cell）生成并保存工作簿，返回计时和文件统计
+
+    per_cell 模式不注册命名样式，工作簿与原写法一致，文件大小和格式数的对比才有意义
+    """
+    patches = {}
+    if mode == "per_cell":
+        patches = {
+            (abc_styles, "style_range"): _per_cell_style_range,
+            (abc_sheets, "style_range"): _per_cell_style_range,
+            (abc_sheets, "write_title"): _per_cell_write_title,
+            (abc_sheets, "register_named_styles"): lambda wb: [],
+        }
+    originals = {key: getattr(*key) for key in patches}
+    for (module, name), func in patches.items():
+        setattr(module, name, func)
+    try:
+        start = time.perf_counter()
+        wb, _ = build_workbook(dataset, verbose=False)
+        built = time.perf_counter()
+        wb.save(path)
+        saved = time.perf_counter()
+    finally:
+        for (module, name), func in originals.items():
+            setattr(module, name, func)
+    return {
+        "写法": mode,
+        "构建(s)": round(built - start, 3),
+        "保存(s)": round(saved - built, 3),
+        "合计(s)": round(saved - start, 3),
+        "文件(KB)": round(os.path.getsize(path) / 1024, 1),
+        "单元格格式数": len(wb._cell_styles),
+        "命名样式数": len(wb.named_styles),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="命名样式批量应用 vs 逐单元格设置样式 基准测试")
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="演示数据 数据_*.csv 所在目录")
+    parser.add_argument("--products", type=int, default=2000, help="产品数（动因消耗表按产品分列，上限约16,000）")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    # 先用演示数据构建一次，模块导入和图表模板缓存不计入任何一种写法
+    build_workbook(abc_data.load_dataset(args.data_dir), verbose=False)
+    dataset = scaled_dataset(abc_data.load_dataset(args.data_dir), args.products)
+    print(f"产品数: {len(dataset.products):,}  作业数: {len(dataset.activities)}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("per_cell", "named"):
+            results.append(run(dataset, mode, os.path.join(tmp, f"{mode}.xlsx")))
+
+    keys = list(results[0])
+    print("".join(f"{k:>12}" for k in keys))
+    for r in results:
+        print("".join(f"{v:>14}" if isinstance(v, str) else f"{v:>14,}" for v in r.values()))
+    old, new = results
+    print(f"\n构建提速 {old['构建(s)'] / new['构建(s)']:.2f} 倍，"
+          f"合计提速 {old['合计(s)'] / new['合计(s)']:.2f} 倍，"
+          f"文件大小 {new['文件(KB)'] / old['文件(KB)']:.1%}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"products": args.products, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 流式导出基准测试
+对比常规路径（普通工作簿 + 逐个单元格设置样式）与流式路径（只写工作表 + 命名样式）
+在大规模产品目录下的耗时和峰值内存(RSS)
+
+用法：
+    python 基准测试_流式导出.py              # 默认 100,000 个产品
+    python 基准测试_流式导出.py --rows 20000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import abc_engine
+
+N_ACTIVITIES = 20
+
+
+def peak_rss_mb():
+    """当前进程峰值常驻内存(MB)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return float('nan')
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 返回字节，Linux 返回KB
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+class SyntheticCatalog:
+    """合成产品目录：各表按需逐行生成，可重复迭代"""
+
+    def __init__(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        self.n = n
+        self.quantity = rng.integers(100, 60000, n)
+        self.batches = rng.integers(5, 50, n)
+        self.price = rng.uniform(80, 6000, n).round(2)
+        self.labor_h = rng.uniform(0.2, 5.0, n).round(1)
+        self.machine_h = (self.labor_h * rng.uniform(1.5, 3.0, n)).round(1)
+        self.material = (self.quantity * rng.uniform(20, 300, n)).round(0)
+        self.labor = (self.quantity * self.labor_h * 50).round(0)
+        consumption = rng.uniform(0, 1, (n, N_ACTIVITIES)) * self.quantity[:, None]
+        self.result = abc_engine.allocate(
+            activity_costs=rng.uniform(1e5, 2e6, N_ACTIVITIES) * n / 5,
+            consumption=consumption,
+            quantities=self.quantity,
+            direct_costs=self.material + self.labor,
+            unit_prices=self.price,
+        )
+
+    def _pid(self, i):
+        return f"P{i + 1:06d}"
+
+    @property
+    def products(self):
+        return _Rows(lambda: (
+            [self._pid(i), f"M{i + 1:06d}", "合成轴承", "标准品" if i % 4 else "定制品",
+             int(self.quantity[i]), int(self.batches[i]),
+             int(self.quantity[i] // self.batches[i]), float(self.price[i]), ""]
+            for i in range(self.n)))
+
+    @property
+    def workhours(self):
+        return _Rows(lambda: (
+            [self._pid(i), float(self.labor_h[i]), float(self.machine_h[i]),
+             float(self.labor_h[i] * self.quantity[i]), float(self.machine_h[i] * self.quantity[i])]
+            for i in range(self.n)))
+
+    @property
+    def direct_costs(self):
+        return _Rows(lambda: (
+            [self._pid(i), float(self.material[i]), float(self.labor[i])]
+            for i in range(self.n)))
+
+
+class _Rows:
+    """每次迭代重新调用生成器工厂，避免物化整张表"""
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __iter__(self):
+        return iter(self._factory())
+
+
+def build_regular(output_file, catalog):
+    """常规路径：与 生成ABC成本模型Excel.py 相同的逐单元格样式写法（两张表）"""
+    import openpyxl
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(name="微软雅黑", size=11, bold=True, color="FFFFFF")
+    calc_fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
+    normal_font = Font(name="微软雅黑", size=10)
+    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                         top=Side(style='thin'), bottom=Side(style='thin'))
+
+    wb = openpyxl.Workbook()
+    ws2 = wb.active
+    ws2.title = "基础数据"
+    for row_idx, product in enumerate(catalog.products, 3):
+        for col_idx, value in enumerate(product, 1):
+            cell = ws2.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+            cell.font = normal_font
+            if 5 <= col_idx <= 8:
+                cell.alignment = Alignment(horizontal='right')
+                cell.number_format = '#,##0' if col_idx < 8 else '#,##0.00'
+    wh_first = catalog.n + 7
+    for row_idx, wh in enumerate(catalog.workhours, wh_first):
+        for col_idx, value in enumerate(wh, 1):
+            cell = ws2.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+            cell.font = normal_font
+            if col_idx >= 2:
+                cell.alignment = Alignment(horizontal='right')
+                cell.number_format = '#,##0' if col_idx >= 4 else '0.0'
+    dc_first = wh_first + catalog.n + 4
+    for offset, dc in enumerate(catalog.direct_costs):
+        row_idx = dc_first + offset
+        ws2.cell(row=row_idx, column=1, value=dc[0]).border = thin_border
+        ws2.cell(row=row_idx, column=2, value=dc[1]).border = thin_border
+        ws2.cell(row=row_idx, column=3, value=dc[2]).border = thin_border
+        ws2.cell(row=row_idx, column=4, value=f"=B{row_idx}+C{row_idx}").border = thin_border
+        ws2.cell(row=row_idx, column=5, value=f"=D{row_idx}/E{offset + 3}").border = thin_border
+        for col in range(2, 6):
+            ws2.cell(row=row_idx, column=col).font = normal_font
+            ws2.cell(row=row_idx, column=col).number_format = '#,##0.00'
+            ws2.cell(row=row_idx, column=col).alignment = Alignment(horizontal='right')
+
+    ws6 = wb.create_sheet("产品成本(ABC)")
+    for i, header in enumerate(["产品编号", "产品型号", "产量(件)", "直接材料", "直接人工", "ABC制造费用",
+                                "完全成本", "单位成本", "单位售价", "单位毛利", "毛利率"], 1):
+        cell = ws6.cell(row=2, column=i, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.border = thin_border
+    for row_idx, (prod, dc, overhead) in enumerate(
+            zip(catalog.products, catalog.direct_costs, catalog.result.overhead), 3):
+        for col_idx, value in enumerate([prod[0], prod[1], prod[4], dc[1], dc[2], float(overhead)], 1):
+            ws6.cell(row=row_idx, column=col_idx, value=value).border = thin_border
+            ws6.cell(row=row_idx, column=col_idx).font = normal_font
+            if col_idx >= 3:
+                ws6.cell(row=row_idx, column=col_idx).number_format = '#,##0.00'
+                ws6.cell(row=row_idx, column=col_idx).alignment = Alignment(horizontal='right')
+        for col, formula, fmt in [(7, f"=D{row_idx}+E{row_idx}+F{row_idx}", '#,##0.00'),
+                                  (8, f"=G{row_idx}/C{row_idx}", '0.00'),
+                                  (9, f"=基础数据!H{row_idx}", '0.00'),
+                                  (10, f"=I{row_idx}-H{row_idx}", '0.00'),
+                                  (11, f"=J{row_idx}/I{row_idx}", '0.0%')]:
+            cell = ws6.cell(row=row_idx, column=col, value=formula)
+            cell.number_format = fmt
+            cell.border = thin_border
+            if col != 9:
+                cell.fill = calc_fill
+    wb.save(output_file)
+
+
+def build_streaming(output_file, catalog):
+    """流式路径"""
+    import abc_stream_export
+    abc_stream_export.write_streaming_workbook(
+        output_file, catalog.products, catalog.workhours, catalog.direct_costs, catalog.result)
+
+
+MODES = {"常规": build_regular, "流式": build_streaming}
+
+
+def run_one(mode, rows, output_file):
+    """在当前进程中执行一种模式，输出JSON结果"""
+    catalog = SyntheticCatalog(rows)
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    MODES[mode](output_file, catalog)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "data_rss_mb": round(baseline_rss, 1),
+        "file_mb": round(os.path.getsize(output_file) / 1024 / 1024, 2),
+    }, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式导出基准测试")
+    parser.add_argument("--rows", type=int, default=100_000, help="产品数量")
+    parser.add_argument("--mode", choices=list(MODES), help="只运行一种模式（内部使用）")
+    parser.add_argument("--output", help="输出文件（内部使用）")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_one(args.mode, args.rows, args.output)
+        return
+
+    # 每种模式在独立子进程中运行，保证峰值内存互不干扰
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in MODES:
+            output_file = os.path.join(tmp, f"bench_{mode}.xlsx")
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode,
+                 "--rows", str(args.rows), "--output", output_file],
+                capture_output=True, text=True, encoding="utf-8",
+                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"产品数量: {args.rows:,}")
+    print(f"{'模式':<6}{'耗时(s)':>10}{'峰值RSS(MB)':>14}{'数据RSS(MB)':>14}{'文件(MB)':>10}")
+    for r in results:
+        print(f"{r['mode']:<6}{r['seconds']:>10.2f}{r['peak_rss_mb']:>14.1f}"
+              f"{r['data_rss_mb']:>14.1f}{r['file_mb']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 规模基准测试
+用 abc_synthetic 生成 10 ~ 100,000 个产品的合成数据集，逐个规模测量：
+数据生成、输入核对、成本计算（compute_model，取多次中最快的一次）的耗时和计算吞吐量，
+工作簿生成耗时（常规工作簿含公式缓存值；超出Excel行列上限时改用流式导出）、xlsx大小和峰值内存(RSS)
+
+每个规模在独立子进程中运行，峰值内存互不干扰；结果追加到历史文件（JSON Lines，每次运行一行），
+并与历史中参数相同的上一次运行比较，耗时/内存/文件大小增加超过容差的记为退化
+
+用法：
+    python 基准测试_规模.py                                  # 10,100,1000,10000,100000 个产品
+    python 基准测试_规模.py --sizes 100,1000 --no-workbook   # 只测计算
+    python 基准测试_规模.py --history 规模基准历史.jsonl --tolerance 0.2 --fail-on-regression
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import abc_profile
+import abc_reconcile
+import abc_synthetic
+
+generator = importlib.import_module("生成ABC成本模型Excel")
+
+DEFAULT_SIZES = "10,100,1000,10000,100000"
+DEFAULT_HISTORY = "规模基准历史.jsonl"
+# 参与退化比较的指标：(键, 显示名称)；耗时指标变化小于 MIN_SECONDS 时不计退化（计时噪声）
+METRICS = (
+    ("compute_seconds", "计算(s)"),
+    ("workbook_seconds", "工作簿(s)"),
+    ("peak_rss_mb", "峰值RSS(MB)"),
+    ("file_mb", "文件(MB)"),
+)
+MIN_SECONDS = 0.05
+# 同一组参数的运行才相互比较
+PARAMETER_KEYS = ("activities", "overhead", "orders_per_product", "custom_share", "seed", "workbook")
+
+
+def run_size(n_products, args, output_file):
+    """在当前进程中测量一个规模，返回结果字典"""
+    orders = None
+    if args.orders_per_product is not None:
+        orders = max(n_products, round(n_products * args.orders_per_product))
+    profiler = abc_profile.Profiler()
+    with profiler:
+        with profiler.stage("生成数据"):
+            dataset = abc_synthetic.generate(n_products, args.activities, args.overhead, orders,
+                                             args.custom_share, args.seed)
+        with profiler.stage("输入核对"):
+            report = abc_reconcile.reconcile(dataset)
+        compute_seconds = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            with profiler.stage("计算"):
+                model = generator.compute_model(dataset)
+            compute_seconds.append(time.perf_counter() - start)
+
+        mode = None
+        if args.workbook:
+            try:
+                generator.check_layout(dataset)
+                mode = "常规"
+            except ValueError:
+                mode = "流式"
+            with profiler.stage("工作簿"):
+                if mode == "常规":
+                    import abc_formula
+                    wb, _ = generator.build_workbook(dataset, verbose=False)
+                    abc_formula.save_workbook(wb, output_file)
+                else:
+                    import abc_stream_export
+                    abc_stream_export.write_streaming_workbook(
+                        output_file, model["products"], model["workhours"], model["direct_costs"],
+                        model["abc_result"])
+
+    stages = {s.name: s.seconds for s in profiler.stages}
+    best = min(compute_seconds)
+    return {
+        "products": n_products,
+        "orders": int(dataset.products["批次数"].sum()),
+        "consumption_rows": len(dataset.consumption),
+        "generate_seconds": round(stages["生成数据"], 4),
+        "reconcile_seconds": round(stages["输入核对"], 4),
+        "reconcile_errors": len(report.errors),
+        "compute_seconds": round(best, 4),
+        "products_per_second": round(n_products / best) if best > 0 else None,
+        "workbook_mode": mode,
+        "workbook_seconds": round(stages["工作簿"], 3) if mode else None,
+        "file_mb": round(os.path.getsize(output_file) / 1024 / 1024, 2) if mode else None,
+        "peak_rss_mb": profiler.to_dict()["rss_peak_mb"],
+    }
+
+
+def parameters(args):
+    """决定结果可比性的运行参数"""
+    return {key: getattr(args, key) for key in PARAMETER_KEYS}
+
+
+def load_history(path):
+    """读取历史文件中的全部运行记录（文件不存在时为空）"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_run(history, params):
+    """历史中参数相同的最近一次运行"""
+    for record in reversed(history):
+        if all(record.get("parameters", {}).get(k) == params[k] for k in PARAMETER_KEYS):
+            return record
+    return None
+
+
+def regressions(results, previous, tolerance):
+    """
+    与上一次运行逐规模、逐指标比较，返回 [(产品数, 指标名称, 上次, 本次, 变化率)]
+
+    本次值超过 上次 × (1 + tolerance) 记为退化；耗时指标另要求增加量不小于 MIN_SECONDS
+    """
+    old = {r["products"]: r for r in previous["results"]} if previous else {}
+    found = []
+    for r in results:
+        before = old.get(r["products"])
+        if before is None:
+            continue
+        for key, label in METRICS:
+            a, b = before.get(key), r.get(key)
+            if a is None or b is None or a <= 0:
+                continue
+            if key.endswith("seconds") and b - a < MIN_SECONDS:
+                continue
+            if b > a * (1 + tolerance):
+                found.append((r["products"], label, a, b, b / a - 1))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ABC成本模型规模基准测试（合成数据）")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="产品数，逗号分隔")
+    parser.add_argument("--activities", type=int, default=20, help="作业数")
+    parser.add_argument("--overhead", type=int, default=11, help="制造费用科目数")
+    parser.add_argument("--orders-per-product", type=float, default=None,
+                        help="平均每个产品的季度订单（批次）数（默认按典型批量推算）")
+    parser.add_argument("--custom-share", type=float, default=0.3, help="定制品比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=3, help="成本计算重复次数（取最快一次）")
+    parser.add_argument("--no-workbook", dest="workbook", action="store_false", help="不测工作簿生成")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="历史结果文件（JSON Lines，为空时不保存）")
+    parser.add_argument("--label", default="", help="本次运行的说明（如版本号），写入历史")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="退化判定的相对容差")
+    parser.add_argument("--fail-on-regression", action="store_true", help="存在退化时以非零状态退出")
+    parser.add_argument("--run-size", type=int, help="只测一个规模并输出JSON（内部使用）")
+    parser.add_argument("--output", help="工作簿输出文件（内部使用）")
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        parser.error(f"--sizes 应为逗号分隔的整数: {args.sizes!r}")
+
+    if args.run_size:
+        print(json.dumps(run_size(args.run_size, args, args.output), ensure_ascii=False))
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    passthrough = ["--activities", str(args.activities), "--overhead", str(args.overhead),
+                   "--custom-share", str(args.custom_share), "--seed", str(args.seed),
+                   "--repeat", str(args.repeat)]
+    if args.orders_per_product is not None:
+        passthrough += ["--orders-per-product", str(args.orders_per_product)]
+    if not args.workbook:
+        passthrough.append("--no-workbook")
+
+    results = []
+    print(f"{'产品数':>9}{'生成(s)':>9}{'核对(s)':>9}{'计算(s)':>9}{'产品/秒':>11}"
+          f"{'工作簿':>6}{'耗时(s)':>9}{'文件(MB)':>10}{'峰值RSS(MB)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            output_file = os.path.join(tmp, f"bench_{n}.xlsx")
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-size", str(n), "--output", output_file]
+                + passthrough, capture_output=True, text=True, encoding="utf-8", cwd=here)
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                sys.exit(f"产品数 {n:,} 的测试失败")
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(r)
+            print(f"{n:>9,}{r['generate_seconds']:>9.3f}{r['reconcile_seconds']:>9.3f}"
+                  f"{r['compute_seconds']:>9.3f}{r['products_per_second'] or 0:>11,}"
+                  f"{r['workbook_mode'] or '-':>6}{r['workbook_seconds'] or 0:>10.2f}"
+                  f"{r['file_mb'] or 0:>10.2f}{r['peak_rss_mb'] or 0:>13.1f}"
+                  + (f"  ⚠ 核对错误 {r['reconcile_errors']} 项" if r["reconcile_errors"] else ""))
+
+    params = parameters(args)
+    record = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "label": args.label,
+              "python": platform.python_version(), "platform": platform.platform(),
+              "parameters": params, "results": results}
+
+    found = []
+    if args.history:
+        previous = previous_run(load_history(args.history), params)
+        found = regressions(results, previous, args.tolerance)
+        if previous is None:
+            print("\n历史中没有参数相同的运行，本次作为基线")
+        elif found:
+            print(f"\n与 {previous['time']} {previous.get('label', '')} 相比的退化（容差 {args.tolerance:.0%}）:")
+            for n, label, a, b, change in found:
+                print(f"  {n:>9,} 个产品 {label:<12}{a:>10.3f} -> {b:>10.3f}  (+{change:.0%})")
+        else:
+            print(f"\n与 {previous['time']} {previous.get('label', '')} 相比没有退化（容差 {args.tolerance:.0%}）")
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"✓ 结果已追加到: {args.history}")
+    if found and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
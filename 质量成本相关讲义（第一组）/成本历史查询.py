@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 成本历史查询
+从历史库（生成时用 --history 追加）读取某产品各期单位成本，输出逐期变动、
+移动平均，以及两期之间的单位成本差异分解
+
+用法：
+    python 成本历史查询.py 历史库 --product P005
+    python 成本历史查询.py 历史库 --product P005 --base 2024年第四季度 --period 2025年第一季度 --window 4
+"""
+
+import argparse
+
+import abc_history
+
+METRICS = ["unit_cost", "overhead", "direct_cost", "quantity", "unit_price"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询ABC成本历史库")
+    parser.add_argument("store", help="历史库目录")
+    parser.add_argument("--product", required=True, help="产品编号")
+    parser.add_argument("--metric", default="unit_cost", choices=METRICS, help="查询指标")
+    parser.add_argument("--window", type=int, default=4, help="移动平均期数")
+    parser.add_argument("--base", help="差异分解的基期（默认为倒数第二期）")
+    parser.add_argument("--period", help="差异分解的本期（默认为最后一期）")
+    parser.add_argument("--top", type=int, default=5, help="列出差异最大的作业个数")
+    args = parser.parse_args()
+
+    store = abc_history.HistoryStore(args.store)
+    try:
+        series = store.product_series(args.product, args.metric)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+    diff, pct = series.deltas()
+    rolling = series.rolling_mean(args.window)
+
+    print(f"{args.product} {args.metric}")
+    print(f"{'期间':<20}{'数值':>14}{'环比变动':>14}{'环比':>10}{f'{args.window}期移动平均':>16}")
+    for period, value, d, p, r in zip(series.periods, series.values, diff, pct, rolling):
+        change = "" if d != d else f"{d:,.2f}"
+        rate = "" if p != p else f"{p:.1%}"
+        print(f"{period:<20}{value:>16,.2f}{change:>16}{rate:>10}{r:>18,.2f}")
+
+    periods = series.periods
+    if len(periods) < 2 and not (args.base and args.period):
+        return
+    base = args.base or periods[-2]
+    period = args.period or periods[-1]
+    try:
+        v = store.variance(args.product, base, period)
+    except KeyError as e:
+        parser.error(str(e))
+    print(f"\n单位成本差异分解: {base} {v.base_unit_cost:,.2f} -> {period} {v.unit_cost:,.2f}")
+    for label, value in [("直接成本", v.direct), ("分配率差异", v.rate), ("产量差异", v.volume),
+                         ("消耗结构差异", v.mix), ("合计", v.total)]:
+        print(f"  {label:<8}{value:>14,.2f}")
+    effects = v.activity_effects
+    total = effects["rate"] + effects["volume"] + effects["mix"]
+    order = [i for i in abs(total).argsort()[::-1][:args.top] if total[i]]
+    if order:
+        print("  差异最大的作业: " + "，".join(f"{v.activity_ids[i]} {total[i]:+,.2f}" for i in order))
+
+
+if __name__ == "__main__":
+    main()
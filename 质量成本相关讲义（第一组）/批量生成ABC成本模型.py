@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 批量生成
+按任务清单（车间 × 核算期间 × 数据目录）在多个进程中并行生成工作簿，
+逐个任务报告耗时，单个任务失败不影响其余任务
+
+任务清单为CSV，列：车间,核算期间,数据目录,输出文件（输出文件可留空）
+数据目录、输出文件为相对路径时相对任务清单所在目录
+
+用法：
+    python 批量生成ABC成本模型.py 批量任务示例.csv
+    python 批量生成ABC成本模型.py 任务.csv --workers 8 --output-dir 输出 --report 批量报告.json
+    python 批量生成ABC成本模型.py 任务.csv --profile --report 批量报告.json   # 报告中含各任务分阶段耗时
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+
+GENERATOR_MODULE = "生成ABC成本模型Excel"
+SHEETS_MODULE = "abc_sheets"
+JOB_COLUMNS = ["车间", "核算期间", "数据目录", "输出文件"]
+
+# 每个工作进程只导入一次生成器和工作表构建模块（openpyxl、图表模块和全部样式对象随之构建一次）
+_generator = None
+
+
+@dataclass
+class Job:
+    """一个生成任务"""
+    workshop: str
+    period: str
+    data_dir: str
+    output_file: str
+
+
+@dataclass
+class JobResult:
+    """任务结果：ok=False 时 error 为异常说明，detail 为完整堆栈；开启剖析时 profile 为运行报告"""
+    workshop: str
+    period: str
+    output_file: str
+    ok: bool
+    seconds: float
+    error: str = None
+    detail: str = None
+    profile: dict = None
+
+
+def default_output_name(workshop, period):
+    """按车间和期间生成输出文件名（去掉文件名中不允许的字符）"""
+    name = f"瓦轴集团ABC成本模型_{workshop}_{period}"
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name) + ".xlsx"
+
+
+def read_jobs(jobs_file, output_dir=None):
+    """读取任务清单CSV，返回 Job 列表"""
+    base_dir = os.path.dirname(os.path.abspath(jobs_file))
+    output_dir = os.path.join(base_dir, output_dir or "")
+    jobs = []
+    with open(jobs_file, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in JOB_COLUMNS[:3] if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{os.path.basename(jobs_file)} 缺少列: {missing}")
+        for line_no, row in enumerate(reader, 2):
+            workshop = (row["车间"] or "").strip()
+            period = (row["核算期间"] or "").strip()
+            if not workshop and not period:
+                continue
+            if not workshop or not period:
+                raise ValueError(f"{os.path.basename(jobs_file)} 第{line_no}行 车间和核算期间不能为空")
+            data_dir = os.path.join(base_dir, (row["数据目录"] or "").strip())
+            output_file = (row.get("输出文件") or "").strip()
+            if output_file:
+                output_file = os.path.join(base_dir, output_file)
+            else:
+                output_file = os.path.join(output_dir, default_output_name(workshop, period))
+            jobs.append(Job(workshop, period, os.path.normpath(data_dir), os.path.normpath(output_file)))
+    return jobs
+
+
+def _init_worker():
+    """工作进程初始化：导入生成器模块"""
+    global _generator
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    _generator = importlib.import_module(GENERATOR_MODULE)
+    importlib.import_module(SHEETS_MODULE)
+
+
+def _run_job(job, cache=True, incremental=False, profile=False):
+    """在工作进程中执行一个任务，异常转为失败结果返回"""
+    start = time.perf_counter()
+    profiler = None
+    try:
+        if _generator is None:
+            _init_worker()
+        out_dir = os.path.dirname(job.output_file)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        profiler = _generator.abc_profile.Profiler() if profile else None
+        _generator.generate(job.data_dir, job.output_file, job.workshop, job.period,
+                            cache=cache, verbose=False, incremental=incremental, profiler=profiler)
+    except Exception as e:
+        return JobResult(job.workshop, job.period, job.output_file, False,
+                         round(time.perf_counter() - start, 3),
+                         error=f"{type(e).__name__}: {e}", detail=traceback.format_exc(),
+                         profile=profiler.to_dict() if profiler else None)
+    return JobResult(job.workshop, job.period, job.output_file, True,
+                     round(time.perf_counter() - start, 3),
+                     profile=profiler.to_dict() if profiler else None)
+
+
+def run_batch(jobs, max_workers=None, cache=True, on_result=None, incremental=False, profile=False):
+    """
+    并行执行全部任务，返回与 jobs 顺序一致的 JobResult 列表
+
+    on_result(result) 在每个任务完成时调用（用于打印进度）；
+    工作进程异常退出等进程级错误也记为对应任务失败；
+    profile=True 时各任务记录分阶段耗时（JobResult.profile）
+    """
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_run_job, job, cache, incremental, profile): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            job = jobs[i]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = JobResult(job.workshop, job.period, job.output_file, False, 0.0,
+                                   error=f"{type(e).__name__}: {e}", detail=traceback.format_exc())
+            results[i] = result
+            if on_result:
+                on_result(result)
+    return results
+
+
+def print_summary(results, elapsed):
+    """打印各任务耗时与失败汇总"""
+    print(f"\n{'状态':<4}{'耗时(s)':>9}  {'车间':<14}{'核算期间':<20}输出文件 / 错误")
+    for r in results:
+        status = "成功" if r.ok else "失败"
+        tail = os.path.basename(r.output_file) if r.ok else r.error
+        print(f"{status:<4}{r.seconds:>9.2f}  {r.workshop:<14}{r.period:<20}{tail}")
+    failed = [r for r in results if not r.ok]
+    print(f"\n共 {len(results)} 个任务，成功 {len(results) - len(failed)} 个，"
+          f"失败 {len(failed)} 个，总耗时 {elapsed:.2f}s")
+
+
+def print_stage_totals(results, top=10):
+    """开启剖析时打印全部任务各阶段的累计耗时（耗时最多的在前）"""
+    totals = {}
+    for r in results:
+        for stage in (r.profile or {}).get("stages", []):
+            totals[stage["name"]] = totals.get(stage["name"], 0.0) + stage["seconds"]
+    if not totals:
+        return
+    print(f"\n{'阶段':<16}{'累计耗时(s)':>12}")
+    for name, seconds in sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{name:<16}{seconds:>14.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量生成瓦轴集团ABC成本模型Excel")
+    parser.add_argument("jobs", help="任务清单CSV（列：车间,核算期间,数据目录,输出文件）")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数（默认为CPU核数）")
+    parser.add_argument("--output-dir", default=None, help="未指定输出文件的任务保存到该目录")
+    parser.add_argument("--no-cache", action="store_true", help="忽略解析缓存，重新解析CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="输出文件已存在时只重建输入有变化的工作表")
+    parser.add_argument("--report", help="把各任务结果（含失败堆栈）写入JSON文件")
+    parser.add_argument("--profile", action="store_true",
+                        help="记录各任务分阶段耗时、单元格数和内存峰值（写入报告）")
+    args = parser.parse_args()
+
+    try:
+        jobs = read_jobs(args.jobs, args.output_dir)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not jobs:
+        parser.error("任务清单为空")
+
+    print(f"开始批量生成: {len(jobs)} 个任务")
+    start = time.perf_counter()
+    results = run_batch(
+        jobs, args.workers, cache=not args.no_cache, incremental=args.incremental, profile=args.profile,
+        on_result=lambda r: print(f"  {'✓' if r.ok else '✗'} {r.workshop} {r.period} ({r.seconds:.2f}s)"))
+    elapsed = time.perf_counter() - start
+    print_summary(results, elapsed)
+    print_stage_totals(results)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"seconds": round(elapsed, 3), "jobs": [asdict(r) for r in results]},
+                      f, ensure_ascii=False, indent=2)
+        print(f"✓ 报告保存为: {args.report}")
+    if any(not r.ok for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
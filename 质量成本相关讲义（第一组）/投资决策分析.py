@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 智能化升级投资决策分析
+按 数据_投资参数.csv（投资预算、减员比例、不良品率、产能提升、折旧等参数的基准值和范围）
+计算基准情景和数千个抽样情景的 NPV、IRR、静态/动态回收期和效益安全边际，
+以及单因素敏感性排名，并写入 "投资决策" 工作表（含NPV分布直方图）
+
+用法：
+    python 投资决策分析.py                          # 10,000 个情景
+    python 投资决策分析.py --scenarios 100000 --rate 0.10 --output 投资决策.xlsx
+"""
+
+import argparse
+import os
+import time
+
+import abc_data
+import abc_invest
+
+DEFAULT_OUTPUT = "瓦轴集团ABC成本模型_投资决策.xlsx"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="智能化升级投资决策（NPV/IRR/回收期/风险分析）")
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="数据_投资参数.csv 所在目录（默认为脚本所在目录）")
+    parser.add_argument("--scenarios", type=int, default=10_000, help="抽样情景数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--rate", type=float, help="覆盖基准折现率（抽样范围不变）")
+    parser.add_argument("--bins", type=int, default=20, help="NPV直方图区间数")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="输出文件（为空时不写工作簿）")
+    parser.add_argument("--no-cache", action="store_true", help="忽略解析缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    try:
+        params = abc_invest.load_parameters(args.data_dir, cache=not args.no_cache)
+    except abc_data.DataValidationError as e:
+        parser.error(str(e))
+    if args.rate is not None:
+        params.base[abc_invest.PARAMETERS.index("折现率")] = args.rate
+
+    start = time.perf_counter()
+    base = abc_invest.evaluate(params.matrix())
+    simulation = abc_invest.evaluate(abc_invest.sample(params, args.scenarios, args.seed))
+    sens = abc_invest.sensitivity(params)
+    elapsed = time.perf_counter() - start
+
+    print(f"基准情景: NPV {base.npv[0]:,.0f} 万元  IRR {base.irr[0]:.1%}  静态回收期 {base.payback[0]:.2f} 年  "
+          f"动态回收期 {base.discounted_payback[0]:.2f} 年  效益安全边际 {base.margin_of_safety[0]:.1%}")
+    print(f"\n情景数: {simulation.n_scenarios:,}，耗时 {elapsed:.2f}s")
+    labels = "".join(f"{f'P{q:g}':>12}" for q in simulation.percentiles)
+    print(f"{'指标':<14}{labels}")
+    for name, values, fmt in (("NPV(万元)", simulation.npv, ",.0f"), ("IRR", simulation.irr, ".1%"),
+                              ("动态回收期(年)", simulation.discounted_payback, ".2f")):
+        print(f"{name:<14}" + "".join(f"{v:>12{fmt}}" for v in simulation.bands(values)))
+    print(f"NPV < 0 的概率: {simulation.prob_loss:.1%}    IRR 低于折现率的概率: {simulation.prob_irr_below_rate:.1%}")
+
+    print(f"\n{'敏感参数':<16}{'下限时NPV':>12}{'上限时NPV':>12}{'波动幅度':>12}")
+    for k in sens.ranking(8):
+        print(f"{sens.factors[k]:<16}{sens.low[k]:>12,.0f}{sens.high[k]:>12,.0f}{sens.swing[k]:>12,.0f}")
+
+    if args.output:
+        import abc_sheets  # 延迟导入 openpyxl
+        wb = abc_sheets.new_workbook()
+        wb.remove(wb.active)
+        abc_sheets.build_investment_sheet(wb, params, base, simulation, sens, bins=args.bins)
+        wb.save(args.output)
+        print(f"\n✓ 文件保存为: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 时间驱动作业成本（TDABC）产能试算
+按 数据_资源产能.csv 和 数据_时间方程.csv 计算各资源池的产能成本率、利用率和闲置产能成本，
+以及各产品的TDABC单位成本（与ABC单位成本对比）；可临时调整资源池实际产能和产量，
+用于产能规划（例如产量增加20%时哪个资源池先饱和）
+
+用法：
+    python 时间驱动作业成本.py
+    python 时间驱动作业成本.py --volume 1.2 --capacity R02=4500 --capacity R03=1600
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import abc_data
+import abc_tdabc
+from 生成ABC成本模型Excel import compute_model
+
+
+def parse_capacity(items, pool_ids, base):
+    """--capacity 资源池编号=小时 覆盖实际产能"""
+    capacity = np.array(base, dtype=float)
+    for item in items:
+        pool_id, sep, hours = item.partition("=")
+        if not sep or pool_id not in pool_ids:
+            raise ValueError(f"--capacity 格式应为 资源池编号=小时，且编号须为 {'/'.join(pool_ids)}: {item!r}")
+        capacity[pool_ids.index(pool_id)] = float(hours)
+    return capacity
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时间驱动作业成本（TDABC）产能试算")
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="数据_*.csv 所在目录")
+    parser.add_argument("--capacity", action="append", default=[], metavar="编号=小时",
+                        help="调整某资源池的实际产能（可重复）")
+    parser.add_argument("--volume", type=float, default=1.0, help="产量系数（批量不变，批次数同比例变化）")
+    parser.add_argument("--top", type=int, default=10, help="列出TDABC与ABC单位成本差异最大的产品数")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    parser.add_argument("--no-cache", action="store_true", help="忽略缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    try:
+        dataset = abc_data.load_dataset(args.data_dir, cache=not args.no_cache)
+        if dataset.capacity_pools is None or dataset.time_equations is None:
+            raise abc_data.DataValidationError(
+                f"缺少 {abc_data.SCHEMAS['capacity_pools'].file_name} 或 "
+                f"{abc_data.SCHEMAS['time_equations'].file_name}")
+        model = compute_model(dataset)
+        pool_ids = dataset.capacity_pools["资源池编号"].tolist()
+        capacity = parse_capacity(args.capacity, pool_ids, dataset.capacity_pools["实际产能"])
+    except (abc_data.DataValidationError, ValueError) as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    result = abc_tdabc.allocate(dataset, capacity_hours=capacity, volume=args.volume)
+    elapsed = time.perf_counter() - start
+
+    print(f"产品数: {len(result.product_ids):,}  作业数: {len(result.activity_ids)}  "
+          f"时间方程: {len(dataset.time_equations)} 项  产量系数: {args.volume:g}  计算耗时: {elapsed:.3f}s\n")
+    print(f"{'资源池':<12}{'实际产能(h)':>12}{'成本率(元/h)':>13}{'已用产能(h)':>13}{'利用率':>8}{'闲置产能成本':>14}")
+    for i, pool_id in enumerate(result.pool_ids):
+        flag = "  需求超出实际产能" if result.unused_hours[i] < 0 else ""
+        print(f"{pool_id} {result.pool_names[i]:<8}{result.capacity_hours[i]:>14,.0f}{result.rates[i]:>15,.2f}"
+              f"{result.used_hours[i]:>15,.1f}{result.utilization[i]:>10.1%}{result.unused_costs[i]:>18,.0f}{flag}")
+    print(f"{'合计':<10}{'':>14}{'':>15}{'':>15}{'':>10}{result.unused_costs.sum():>18,.0f}")
+    print(f"\n资源池成本 {result.pool_costs.sum():,.0f} 元 = 计入产品 {result.overhead.sum():,.0f} 元"
+          f" + 闲置产能 {result.unused_costs.sum():,.0f} 元")
+
+    abc_units = model["abc_result"].unit_costs
+    diff = result.unit_costs - abc_units
+    order = np.argsort(-np.abs(diff))[:args.top]
+    print(f"\nTDABC与ABC单位成本差异最大的{len(order)}个产品（元/件）")
+    print(f"{'产品':<10}{'ABC(基准产量)':>12}{'TDABC':>12}{'差异':>12}{'TDABC毛利率':>12}")
+    for i in order:
+        print(f"{result.product_ids[i]:<10}{abc_units[i]:>12,.2f}{result.unit_costs[i]:>12,.2f}"
+              f"{diff[i]:>12,.2f}{result.margin_rates[i]:>14.1%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "volume": args.volume,
+                "pools": [{"资源池编号": pool_id, "资源池名称": result.pool_names[i],
+                           "季度成本": float(result.pool_costs[i]), "实际产能": float(result.capacity_hours[i]),
+                           "产能成本率": float(result.rates[i]), "已用产能": float(result.used_hours[i]),
+                           "利用率": float(result.utilization[i]), "闲置产能成本": float(result.unused_costs[i])}
+                          for i, pool_id in enumerate(result.pool_ids)],
+                "products": [{"产品编号": product_id, "ABC单位成本": float(abc_units[i]),
+                              "TDABC单位成本": float(result.unit_costs[i]),
+                              "TDABC毛利率": float(result.margin_rates[i])}
+                             for i, product_id in enumerate(result.product_ids)],
+            }, f, ensure_ascii=False, indent=1)
+        print(f"\n✓ 结果已写入: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
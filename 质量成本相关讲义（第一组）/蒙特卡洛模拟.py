@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 蒙特卡洛模拟
+检验 "成本对比" 工作表中的结论（如P005被传统方法极度低估）在作业成本、
+动因总量不确定时是否稳定：输出各产品单位成本/毛利率分位数区间、
+传统方法低估概率和单因素敏感性排名，并写入 "模拟分析" 工作表
+
+用法：
+    python 蒙特卡洛模拟.py                      # 100,000 个情景
+    python 蒙特卡洛模拟.py --scenarios 1000000 --workers 4 --cost-spread 0.2
+"""
+
+import argparse
+import importlib
+import os
+import time
+
+import abc_data
+import abc_simulation
+
+generator = importlib.import_module("生成ABC成本模型Excel")
+
+DEFAULT_OUTPUT = "瓦轴集团ABC成本模型_模拟分析.xlsx"
+
+
+def conclusion_range(trad, low, high):
+    """按P5/P95单位成本给出结论区间（与 "成本对比" 工作表的判断标准一致）"""
+    low_label = generator.cost_analysis(trad, low)
+    high_label = generator.cost_analysis(trad, high)
+    return low_label if low_label == high_label else f"{low_label} ~ {high_label}"
+
+
+def run(data_dir, n_scenarios=100_000, cost_spread=0.10, driver_spread=0.15, seed=0,
+        n_workers=1, cache=True):
+    """读取输入并执行模拟和敏感性分析，返回 (模型, 模拟结果, 敏感性结果, 结论区间)"""
+    model = generator.compute(data_dir, cache=cache)
+    base = model["abc_result"]
+    quantities = [prod[4] for prod in model["products"]]
+    simulation = abc_simulation.simulate(
+        base, quantities, n_scenarios, cost_spread, driver_spread, seed=seed, n_workers=n_workers,
+        traditional_costs=model["traditional_costs"])
+    sens = abc_simulation.sensitivity(
+        base, quantities, cost_spread, driver_spread,
+        activity_names=[f"{act[0]} {act[1]}" for act in model["activities"]])
+
+    bands = simulation.cost_bands
+    conclusions = [conclusion_range(trad, band[0], band[-1])
+                   for trad, band in zip(model["traditional_costs"], bands)]
+    return model, simulation, sens, conclusions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ABC成本模型蒙特卡洛模拟与敏感性分析")
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="数据_*.csv 所在目录（默认为脚本所在目录）")
+    parser.add_argument("--scenarios", type=int, default=100_000, help="情景数")
+    parser.add_argument("--cost-spread", type=float, default=0.10, help="作业成本波动幅度（±比例）")
+    parser.add_argument("--driver-spread", type=float, default=0.15, help="动因总量波动幅度（±比例）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--top", type=int, default=5, help="每个产品列出的敏感因素个数")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="输出文件")
+    parser.add_argument("--no-cache", action="store_true", help="忽略解析缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        model, simulation, sens, conclusions = run(
+            args.data_dir, args.scenarios, args.cost_spread, args.driver_spread, args.seed,
+            args.workers, cache=not args.no_cache)
+    except (abc_data.DataValidationError, ValueError) as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    print(f"情景数: {simulation.n_scenarios:,}，耗时 {elapsed:.2f}s")
+    bands = simulation.cost_bands
+    print(f"{'产品':<6}{'传统方法':>10}{'ABC基准':>10}{'P5':>10}{'P50':>10}{'P95':>10}{'低估概率':>10}  结论区间")
+    for idx, prod in enumerate(model["products"]):
+        print(f"{prod[0]:<6}{model['traditional_costs'][idx]:>10.2f}{model['abc_costs'][idx]:>10.2f}"
+              f"{bands[idx][0]:>10.2f}{bands[idx][len(bands[idx]) // 2]:>10.2f}{bands[idx][-1]:>10.2f}"
+              f"{simulation.prob_above_traditional[idx]:>10.1%}  {conclusions[idx]}")
+
+    import abc_sheets  # 延迟导入 openpyxl
+    wb = abc_sheets.new_workbook()
+    wb.remove(wb.active)
+    abc_sheets.build_simulation_sheet(wb, model, simulation, sens, conclusions, top=args.top)
+    wb.save(args.output)
+    print(f"✓ 文件保存为: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
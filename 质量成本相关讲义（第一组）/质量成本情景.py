@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+瓦轴集团ABC成本模型 - 质量成本情景扫描
+把各产品的不良率和返工率同时乘以一组系数（例如 0.5 表示不良率减半），
+批量计算每个情景下的四类质量成本合计和各产品单位质量成本
+
+用法：
+    python 质量成本情景.py
+    python 质量成本情景.py --min 0.5 --max 2 --steps 7 --rework-ratio 0.6
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+import abc_data
+import abc_quality
+from 生成ABC成本模型Excel import compute_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="质量成本不良率情景扫描")
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="数据_*.csv 所在目录")
+    parser.add_argument("--min", type=float, default=0.0, help="最小系数")
+    parser.add_argument("--max", type=float, default=2.0, help="最大系数")
+    parser.add_argument("--steps", type=int, default=9, help="情景个数")
+    parser.add_argument("--rework-ratio", type=float, default=abc_quality.REWORK_COST_RATIO,
+                        help="返工一件的成本占加工成本的比例")
+    parser.add_argument("--no-cache", action="store_true", help="忽略缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    try:
+        dataset = abc_data.load_dataset(args.data_dir, cache=not args.no_cache)
+        model = compute_model(dataset)
+        base = abc_quality.quality_base(model, dataset, args.rework_ratio)
+    except abc_data.DataValidationError as e:
+        parser.error(str(e))
+    if dataset.quality_rates is None:
+        print(f"提示: 没有 {abc_data.SCHEMAS['quality_rates'].file_name}，失败成本只含映射的作业/科目")
+
+    factors = np.linspace(args.min, args.max, args.steps)
+    result = abc_quality.sweep_defect_rates(base, factors)
+
+    print(f"{'系数':>6}" + "".join(f"{c:>12}" for c in abc_quality.CATEGORIES) + f"{'合计':>14}")
+    for factor, totals in zip(factors, result.category_totals):
+        print(f"{factor:>8.2f}" + "".join(f"{v:>16,.0f}" for v in totals) + f"{totals.sum():>16,.0f}")
+
+    print("\n单位质量成本（元/件）")
+    print(f"{'系数':>6}" + "".join(f"{p:>12}" for p in base.product_ids))
+    for factor, per_unit in zip(factors, result.per_unit):
+        print(f"{factor:>8.2f}" + "".join(f"{v:>14,.2f}" for v in per_unit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+轴承供应链成本核算 - 标准成本差异分析
+流式读取 轴承供应链成本核算模型系统/ 下的材料消耗和工序消耗明细，计算材料用量/价格差异和
+工序效率/耗费差异，按订单、工序、物料、部门汇总输出CSV（正数为不利差异）
+
+用法：
+    python 轴承成本差异分析.py
+    python 轴承成本差异分析.py --output-dir 差异分析 --details 差异明细.csv --chunk-rows 200000
+"""
+
+import argparse
+import os
+import time
+
+import abc_data
+import bearing_costing
+import bearing_variance
+
+SUMMARY_FILES = {
+    "orders": "差异_订单.csv",
+    "processes": "差异_工序.csv",
+    "materials": "差异_物料.csv",
+    "departments": "差异_部门.csv",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="轴承订单标准成本差异分析（材料用量/价格、工序效率/耗费）")
+    parser.add_argument("--data-dir", default=bearing_costing.DEFAULT_DATA_DIR,
+                        help="CSV所在目录（默认为 轴承供应链成本核算模型系统）")
+    parser.add_argument("--output-dir", default=".", help="汇总CSV输出目录")
+    parser.add_argument("--details", help="另把每条消耗明细的差异写入该CSV")
+    parser.add_argument("--chunk-rows", type=int, default=abc_data.CHUNK_ROWS, help="每块读取的明细行数")
+    parser.add_argument("--top", type=int, default=10, help="屏幕上列出的订单数（按差异绝对值）")
+    parser.add_argument("--no-cache", action="store_true", help="忽略解析缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    try:
+        result = bearing_variance.compute_variances(args.data_dir, cache=not args.no_cache,
+                                                    chunk_rows=args.chunk_rows, details_file=args.details)
+    except abc_data.DataValidationError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    print(f"材料消耗明细 {result.n_material_rows:,} 行，工序消耗明细 {result.n_process_rows:,} 行，"
+          f"耗时 {elapsed:.2f}s")
+    totals = result.totals
+    print(f"材料: 标准 {totals['材料标准成本']:,.2f}  实际 {totals['材料实际成本']:,.2f}  "
+          f"用量差异 {totals['用量差异']:+,.2f}  价格差异 {totals['价格差异']:+,.2f}")
+    print(f"工序: 标准 {totals['工序标准成本']:,.2f}  实际 {totals['工序实际成本']:,.2f}  "
+          f"效率差异 {totals['效率差异']:+,.2f}  耗费差异 {totals['耗费差异']:+,.2f}")
+
+    departments = result.departments
+    print(f"\n{'部门':<12}{'标准成本':>14}{'实际成本':>14}{'数量差异':>12}{'价格差异':>12}")
+    for i, name in enumerate(departments["部门"].tolist()):
+        print(f"{name:<12}{departments['标准成本'][i]:>16,.2f}{departments['实际成本'][i]:>16,.2f}"
+              f"{departments['数量差异'][i]:>+14,.2f}{departments['价格差异'][i]:>+14,.2f}")
+
+    orders = result.orders
+    variance = sum(orders[name] for name in ("用量差异", "价格差异", "效率差异", "耗费差异"))
+    print("\n差异最大的订单（正数为不利差异）")
+    print(f"{'订单编号':<14}{'用量差异':>12}{'价格差异':>12}{'效率差异':>12}{'耗费差异':>12}{'合计':>12}")
+    for i in abs(variance).argsort()[::-1][:args.top]:
+        print(f"{orders['订单编号'][i]:<14}" + "".join(
+            f"{orders[name][i]:>+14,.2f}" for name in ("用量差异", "价格差异", "效率差异", "耗费差异"))
+              + f"{variance[i]:>+12,.2f}")
+
+    for name, file_name in SUMMARY_FILES.items():
+        bearing_variance.write_summary_csv(getattr(result, name), os.path.join(args.output_dir, file_name))
+    print(f"\n✓ 汇总CSV: {'、'.join(SUMMARY_FILES.values())}（{os.path.abspath(args.output_dir)}）")
+    if args.details:
+        print(f"✓ 明细差异: {args.details}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+轴承供应链成本核算 - 订单成本核算
+读取 轴承供应链成本核算模型系统/ 下的订单及消耗明细CSV，计算每张订单的
+材料、工序和作业成本，输出CSV和/或Excel
+
+用法：
+    python 轴承订单成本核算.py
+    python 轴承订单成本核算.py --data-dir 数据目录 --csv 订单成本.csv --xlsx 订单成本.xlsx
+"""
+
+import argparse
+import time
+
+import abc_data
+import bearing_costing
+
+DEFAULT_CSV = "轴承订单成本核算.csv"
+DEFAULT_XLSX = "轴承订单成本核算.xlsx"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="轴承生产订单成本核算（材料 + 工序 + 作业）")
+    parser.add_argument("--data-dir", default=bearing_costing.DEFAULT_DATA_DIR,
+                        help="CSV所在目录（默认为 轴承供应链成本核算模型系统）")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="输出CSV文件（为空则不输出）")
+    parser.add_argument("--xlsx", default=DEFAULT_XLSX, help="输出Excel文件（为空则不输出）")
+    parser.add_argument("--top", type=int, default=20, help="屏幕上列出的订单数")
+    parser.add_argument("--no-cache", action="store_true", help="忽略解析缓存，重新解析CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        dataset = bearing_costing.load_bearing_dataset(args.data_dir, cache=not args.no_cache)
+        loaded = time.perf_counter()
+        result = bearing_costing.compute_order_costs(dataset)
+    except abc_data.DataValidationError as e:
+        parser.error(str(e))
+    computed = time.perf_counter()
+
+    print(f"订单 {len(result.order_ids):,} 张，材料消耗明细 {len(dataset.material_consumption):,} 行，"
+          f"工序消耗明细 {len(dataset.process_consumption):,} 行")
+    print(f"读取 {loaded - start:.2f}s，核算 {computed - loaded:.2f}s")
+    if result.unmeasured:
+        print(f"提示: 以下作业的动因无法从工序消耗明细取得，未计入作业成本: {', '.join(result.unmeasured)}")
+
+    print(f"\n{'订单编号':<14}{'数量':>8}{'材料成本':>12}{'工序成本':>10}{'作业成本':>12}"
+          f"{'总成本':>12}{'单位成本':>10}")
+    for row in list(result.rows())[:args.top]:
+        print(f"{row[0]:<14}{row[3]:>10,}{row[4]:>14,.2f}{row[5]:>12,.2f}{row[6]:>14,.2f}"
+              f"{row[7]:>14,.2f}{row[8]:>12,.2f}")
+
+    if args.csv:
+        bearing_costing.write_csv(result, args.csv)
+        print(f"✓ CSV保存为: {args.csv}")
+    if args.xlsx:
+        try:
+            bearing_costing.write_xlsx(result, args.xlsx)
+        except ValueError as e:
+            print(f"✗ 未生成Excel: {e}")
+        else:
+            print(f"✓ 文件保存为: {args.xlsx}")
+
+
+if __name__ == "__main__":
+    main()